@@ -17,6 +17,27 @@ Usage: %s [options] <ifile>
 Options:
   -c, --pre-command=<string>     Command string with which to prefix the execution of the 
                                  Orio-built code, e.g., tau_exec
+  --cache-dir=<dir>              reuse performance costs measured in previous tuning sessions,
+                                 stored in <dir> (default: no caching)
+  --exe-cache-size=<MB>          maximum size of the compiled test executable cache, kept in
+                                 <cache-dir>/executables or in a temporary directory (default: 512)
+  --results-file=<file>          record the measurements of all the tested coordinates in <file>,
+                                 one JSON object per line (default: tuning_<ifile>_<pid>.results.jsonl)
+  --checkpoint=<file>            checkpoint the searches in <file> after each batch of measurements
+                                 (default: tuning_<ifile>_<pid>.checkpoint.jsonl)
+  --resume=<file>                resume the searches of an interrupted session from its checkpoint
+                                 <file> without measuring again, and go on checkpointing in <file>
+  --shard=<i>/<N>                explore only the i-th (0 <= i < N) of N disjoint parts of the search
+                                 space (Exhaustive search), see ormerge to combine the results files
+  --warm-start=<file>            seed the searches with the best coordinates of the results file
+                                 <file> of a prior session (nearest problem size first); can be repeated
+  --warm-start-seeds=<n>         the number of prior coordinates seeded into each search (default: 5)
+  --codegen-procs=<n>            transform the code of the coordinates in <n> worker processes, while
+                                 the codes transformed so far are built and measured (default: 0, the
+                                 code is transformed in the search process)
+  --transform-cache-size=<n>     the number of transformed annotated code regions kept for reuse by the
+                                 coordinates that share the values of the parameters they depend on,
+                                 0 to transform every region for every coordinate (default: 256)
   --post-command=<string>        Command string to run after each execution of Orio-built code,
                                  e.g., taudb_loadtrial
   -d <level>, --debug=<level>    Enable debugging output [default off], level is an int between 
@@ -132,7 +153,9 @@ class CmdParser:
                                        ['pre-command=','debug=','config=','configfile=', 'erase-annot', 'help', 'keep-temps',' output=',
                                         'output-prefix=', 'rename-objects',  'spec=', 'stop-on-error', 'verbose', 'extern',
                                         'validate', 'post-command=', 'meta', 'marker-loops',
-                                        'logdir='])
+                                        'logdir=', 'cache-dir=', 'exe-cache-size=', 'results-file=',
+                                        'checkpoint=', 'resume=', 'shard=', 'warm-start=', 'warm-start-seeds=',
+                                        'transform-cache-size=', 'codegen-procs='])
         except Exception as e:
             sys.stderr.write('Orio command-line error: %s' % e)
             sys.stderr.write(USAGE_MSG + '\n')
@@ -179,6 +202,61 @@ class CmdParser:
                 cmdline['marker-loops'] = True  # generate fake loops for Meliora
             elif opt in ('--logdir'):
                 cmdline['logdir'] = arg   # tuning logs directory
+            elif opt in ('--cache-dir'):
+                cmdline['cache_dir'] = arg   # persistent result cache directory
+            elif opt in ('--exe-cache-size'):
+                try:
+                    cmdline['exe_cache_size'] = int(arg)   # executable cache size limit (MB)
+                except ValueError:
+                    cmdline['exe_cache_size'] = -1
+                if cmdline['exe_cache_size'] < 0:
+                    sys.stderr.write('Orio command-line error: --exe-cache-size expects a non-negative integer, ' +
+                                     'not "%s"\n' % arg)
+                    sys.exit(1)
+            elif opt in ('--results-file'):
+                cmdline['results_file'] = arg   # per-session measurement records
+            elif opt in ('--checkpoint'):
+                cmdline['checkpoint_file'] = arg   # search checkpoints
+            elif opt in ('--resume'):
+                cmdline['resume_file'] = arg   # checkpoint of the session to resume
+            elif opt in ('--shard'):
+                try:
+                    shard, num_shards = [int(x) for x in arg.split('/')]
+                except ValueError:
+                    shard, num_shards = -1, 0
+                if not 0 <= shard < num_shards:
+                    sys.stderr.write('Orio command-line error: --shard expects <i>/<N> with 0 <= i < N, not "%s"\n' % arg)
+                    sys.exit(1)
+                cmdline['shard'] = (shard, num_shards)   # part of the search space to explore
+            elif opt in ('--warm-start'):
+                cmdline.setdefault('warm_start_files', []).append(arg)   # results of prior sessions
+            elif opt in ('--warm-start-seeds'):
+                try:
+                    cmdline['warm_start_seeds'] = int(arg)
+                except ValueError:
+                    cmdline['warm_start_seeds'] = -1
+                if cmdline['warm_start_seeds'] < 0:
+                    sys.stderr.write('Orio command-line error: --warm-start-seeds expects a non-negative integer, ' +
+                                     'not "%s"\n' % arg)
+                    sys.exit(1)
+            elif opt in ('--codegen-procs'):
+                try:
+                    cmdline['codegen_procs'] = int(arg)
+                except ValueError:
+                    cmdline['codegen_procs'] = -1
+                if cmdline['codegen_procs'] < 0:
+                    sys.stderr.write('Orio command-line error: --codegen-procs expects a non-negative integer, ' +
+                                     'not "%s"\n' % arg)
+                    sys.exit(1)
+            elif opt in ('--transform-cache-size'):
+                try:
+                    cmdline['transform_cache_size'] = int(arg)
+                except ValueError:
+                    cmdline['transform_cache_size'] = -1
+                if cmdline['transform_cache_size'] < 0:
+                    sys.stderr.write('Orio command-line error: --transform-cache-size expects a non-negative ' +
+                                     'integer, not "%s"\n' % arg)
+                    sys.exit(1)
                 
         # check on the arguments
         if len(srcfiles) < 1:
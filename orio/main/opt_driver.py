@@ -5,6 +5,7 @@
 import sys, traceback, os
 from orio.main.util.globals import *
 import orio.main.code_frag, orio.main.dyn_loader, orio.main.tuner.tuner
+from orio.main.transform_cache import TransformCache, recordedMetadata
 from functools import reduce
 
 #----------------------------------------------------------------
@@ -28,6 +29,7 @@ class OptDriver:
         self.ptuner = orio.main.tuner.tuner.PerfTuner(self)
         self.dloader = orio.main.dyn_loader.DynLoader()
         self.input_params = None
+        self.transform_cache = TransformCache(Globals().transform_cache_size)
     
     #-------------------------------------------------------------
 
@@ -155,58 +157,19 @@ class OptDriver:
                 # get the optimized body code
                 optimized_body_code, _, inner_ext = optimized_body_code_seq[0]
 
-                # dynamically load the transformation module class
-                class_name = cfrag.leader_ann.mod_name
-                mod_name = '.'.join([TMOD_NAME, class_name.lower(), class_name.lower()])
-                
-                debug('about to load module.class %s.%s corresponding to annotation %s' % (mod_name,class_name,class_name), self)
-                try:
-                    mod_class = self.dloader.loadClass(mod_name, class_name)
-                except Exception as e:
-                    err('orio.main.opt_driver: %s: unable to load class %s.%s' % (cfrag.leader_ann.mod_name_line_no,mod_name,class_name))
-                    
-                debug("about to instantiate transformation class: %s.%s" %(mod_name,class_name), self)
-                debug("perf_params=" + str(perf_params),self,level=6)
-
-                # apply code transformations
-                # This instantiates the transformation module and initializes it with the
-                # code fragments and tuning spec information
-                try:
-                    if self.lang == 'cuda' or self.lang == 'opencl':
-                        transformation = mod_class(perf_params,
-                                                  cfrag.leader_ann.mod_code,
-                                                  optimized_body_code,
-                                                  cfrag.leader_ann.mod_code_line_no,
-                                                  cfrag.leader_ann.indent_size,
-                                                  language=self.lang,
-                                                  tinfo=self.ptuner.tinfo)
-                    else:
-                        transformation = mod_class(perf_params,
-                                                  cfrag.leader_ann.mod_code,
-                                                  optimized_body_code,
-                                                  cfrag.leader_ann.mod_code_line_no,
-                                                  cfrag.leader_ann.indent_size,
-                                                  language=self.lang,
-                                                  tinfo=self.ptuner.tinfo)
-                except Exception as e:
-                    err('orio.main.opt_driver: %s: encountered an error when transforming annotation "%s"\n --> %s: %s' %
-                           (cfrag.leader_ann.mod_name_line_no, cfrag.leader_ann.mod_name,e.__class__.__name__, e))
-                    
-                debug("successfully instantiated transformation class: %s.%s" %(mod_name,class_name),self)
-                
-                try:
-                    optimized_code = transformation.transform()
-                except Exception as e:
-                    err('orio.main.opt_driver: encountered an error during transformation %s:\n %s' % (transformation,e)) 
-
-                
-                # create the optimized code sequence
-                g = Globals()
-                externals = ''
-                if len(g.cunit_declarations) > 0:
-                    externals = reduce(lambda x,y: x + y, g.cunit_declarations)
-                    g.cunit_declarations = []
-                optimized_code_seq = [(optimized_code, [], inner_ext + externals)]
+                # reuse the transformed code of the region if the parameters it depends on did not change
+                region_key = (self.lang, cfrag.leader_ann.mod_name, cfrag.leader_ann.mod_code_line_no,
+                              cfrag.leader_ann.mod_code, cfrag.leader_ann.indent_size, optimized_body_code)
+                cached = self.transform_cache.lookup(region_key, perf_params)
+                if cached is not None:
+                    debug('reusing the transformed code of the %s annotation at %s' %
+                          (cfrag.leader_ann.mod_name, cfrag.leader_ann.mod_name_line_no), self, level=6)
+                    optimized_code, externals, metadata = cached
+                    Globals().metadata.update(metadata)
+                    optimized_code_seq = [(optimized_code, [], inner_ext + externals)]
+                else:
+                    optimized_code_seq = self.__transformCodeFrag(cfrag, perf_params, optimized_body_code,
+                                                                  inner_ext, region_key)
 
             # prepend the leader annotation and append the trailer annotation to each of
             # the optimized code
@@ -222,3 +185,67 @@ class OptDriver:
         else:
             err('orio.main.opt_driver internal error:  unexpected type of code fragment',doexit=True)
 
+    #-------------------------------------------------------------
+
+    def __transformCodeFrag(self, cfrag, perf_params, optimized_body_code, inner_ext, region_key):
+        '''
+        Apply the transformation module of an annotated code region to its optimized body code, and
+        cache the transformed code with the performance parameters the module read
+        '''
+        # dynamically load the transformation module class
+        class_name = cfrag.leader_ann.mod_name
+        mod_name = '.'.join([TMOD_NAME, class_name.lower(), class_name.lower()])
+        
+        debug('about to load module.class %s.%s corresponding to annotation %s' % (mod_name,class_name,class_name), self)
+        try:
+            mod_class = self.dloader.loadClass(mod_name, class_name)
+        except Exception as e:
+            err('orio.main.opt_driver: %s: unable to load class %s.%s' % (cfrag.leader_ann.mod_name_line_no,mod_name,class_name))
+            
+        debug("about to instantiate transformation class: %s.%s" %(mod_name,class_name), self)
+        debug("perf_params=" + str(perf_params),self,level=6)
+
+        # apply code transformations
+        # This instantiates the transformation module and initializes it with the
+        # code fragments and tuning spec information; it is given a copy of the performance
+        # parameters that records the ones it reads, and the metadata it writes are recorded
+        tracked_params = self.transform_cache.track(perf_params)
+        with recordedMetadata() as metadata:
+            try:
+                if self.lang == 'cuda' or self.lang == 'opencl':
+                    transformation = mod_class(tracked_params,
+                                              cfrag.leader_ann.mod_code,
+                                              optimized_body_code,
+                                              cfrag.leader_ann.mod_code_line_no,
+                                              cfrag.leader_ann.indent_size,
+                                              language=self.lang,
+                                              tinfo=self.ptuner.tinfo)
+                else:
+                    transformation = mod_class(tracked_params,
+                                              cfrag.leader_ann.mod_code,
+                                              optimized_body_code,
+                                              cfrag.leader_ann.mod_code_line_no,
+                                              cfrag.leader_ann.indent_size,
+                                              language=self.lang,
+                                              tinfo=self.ptuner.tinfo)
+            except Exception as e:
+                err('orio.main.opt_driver: %s: encountered an error when transforming annotation "%s"\n --> %s: %s' %
+                       (cfrag.leader_ann.mod_name_line_no, cfrag.leader_ann.mod_name,e.__class__.__name__, e))
+            
+            debug("successfully instantiated transformation class: %s.%s" %(mod_name,class_name),self)
+        
+            try:
+                optimized_code = transformation.transform()
+            except Exception as e:
+                err('orio.main.opt_driver: encountered an error during transformation %s:\n %s' % (transformation,e))
+
+        # create the optimized code sequence
+        g = Globals()
+        externals = ''
+        if len(g.cunit_declarations) > 0:
+            externals = reduce(lambda x,y: x + y, g.cunit_declarations)
+            g.cunit_declarations = []
+        self.transform_cache.store(region_key, cfrag.leader_ann.mod_code, tracked_params,
+                                   (optimized_code, externals, metadata))
+        return [(optimized_code, [], inner_ext + externals)]
+
@@ -0,0 +1,164 @@
+#
+# The memoization of the transformed code of the annotated code regions
+#
+
+import collections, contextlib, re
+from orio.main.util.globals import *
+
+#----------------------------------------------------------------
+
+class TrackedParams(dict):
+    '''
+    The performance parameters given to a transformation module, recording the names of the ones it
+    reads (e.g., through the eval(rhs, perf_params) calls of the loop submodules); going through all
+    of them (e.g., iterating over them or copying them) counts as reading them all
+    '''
+
+    def __init__(self, perf_params):
+        dict.__init__(self, perf_params)
+        self.names = set()
+        self.read_all = False
+
+    def __getitem__(self, name):
+        self.names.add(name)
+        return dict.__getitem__(self, name)
+
+    def get(self, name, default=None):
+        self.names.add(name)
+        return dict.get(self, name, default)
+
+    def __contains__(self, name):
+        self.names.add(name)
+        return dict.__contains__(self, name)
+
+    def __iter__(self):
+        self.read_all = True
+        return dict.__iter__(self)
+
+    def keys(self):
+        self.read_all = True
+        return dict.keys(self)
+
+    def values(self):
+        self.read_all = True
+        return dict.values(self)
+
+    def items(self):
+        self.read_all = True
+        return dict.items(self)
+
+    def copy(self):
+        self.read_all = True
+        return dict.copy(self)
+
+class MetadataRecorder(dict):
+    '''
+    A copy of the metadata of the tuning (Globals().metadata) recording the names of the entries
+    written to it, e.g., the arguments and device properties set by the OpenCL transformation
+    '''
+
+    def __init__(self, metadata):
+        dict.__init__(self, metadata)
+        self.names = set()
+
+    def __setitem__(self, name, value):
+        self.names.add(name)
+        dict.__setitem__(self, name, value)
+
+    def update(self, *args, **kwargs):
+        entries = dict(*args, **kwargs)
+        self.names.update(entries)
+        dict.update(self, entries)
+
+    def setdefault(self, name, default=None):
+        self.names.add(name)
+        return dict.setdefault(self, name, default)
+
+    def written(self):
+        '''Return the entries written so far'''
+        return dict([(n, dict.__getitem__(self, n)) for n in self.names if dict.__contains__(self, n)])
+
+@contextlib.contextmanager
+def recordedMetadata():
+    '''
+    Record the entries written to the metadata of the tuning (Globals().metadata) within a block in
+    the dictionary it is given, so that a transformation result reused later can write them again
+    '''
+    g = Globals()
+    metadata = g.metadata
+    recorder = MetadataRecorder(metadata)
+    written = {}
+    g.metadata = recorder
+    try:
+        yield written
+    finally:
+        written.update(recorder.written())
+        g.metadata = metadata
+        metadata.update(written)
+
+#----------------------------------------------------------------
+
+class TransformCache:
+    '''
+    A least-recently-used cache of the transformed code of the annotated code regions, indexed by
+    region and by the values of the performance parameters the region depends on: those that its
+    transformation read, and those named in its annotation. Changing a parameter that only another
+    region depends on (e.g., the tile size of the other loop nest) leaves the code of a region
+    cached. A region may depend on different parameters for different coordinates (e.g., a tile size
+    that is only read when tiling is enabled), so that each cached code keeps its own dependencies.
+    The cached results are the (transformed code, externals, metadata written by the transformation)
+    of the regions.
+    '''
+
+    def __init__(self, size):
+        '''@param size: the maximum number of cached codes (0 disables the cache)'''
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__deps = {}                             # region key -> the tuples of dependency names
+        self.__entries = collections.OrderedDict()   # (region key, names, values) -> transformed code
+
+    def __values(self, names, perf_params):
+        return tuple([repr(dict.get(perf_params, n)) for n in names])
+
+    def track(self, perf_params):
+        '''Return the performance parameters to give to a transformation (tracked if they are cached)'''
+        if self.size <= 0 or not isinstance(perf_params, dict):
+            return perf_params
+        return TrackedParams(perf_params)
+
+    def lookup(self, region_key, perf_params):
+        '''Return the cached transformation result of a region for the given parameters, or None'''
+        if self.size <= 0 or not isinstance(perf_params, dict):
+            return None
+        for names in self.__deps.get(region_key, []):
+            key = (region_key, names, self.__values(names, perf_params))
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return self.__entries[key]
+        self.misses += 1
+        return None
+
+    def store(self, region_key, annotation, tracked_params, result):
+        '''
+        Cache the transformation result of a region
+        @param annotation: the text of the annotation of the region, whose identifiers are the
+                           parameters it names
+        @param tracked_params: the performance parameters given to the transformation (see track)
+        '''
+        if not isinstance(tracked_params, TrackedParams):
+            return
+        params = [n for n in dict.keys(tracked_params) if n != '__builtins__']
+        if tracked_params.read_all:
+            names = params
+        else:
+            named = set(re.findall(r'[A-Za-z_]\w*', annotation)) | tracked_params.names
+            names = [n for n in params if n in named]
+        names = tuple(sorted(names))
+        deps = self.__deps.setdefault(region_key, [])
+        if names not in deps:
+            deps.append(names)
+        self.__entries[(region_key, names, self.__values(names, tracked_params))] = result
+        if len(self.__entries) > self.size:
+            self.__entries.popitem(last=False)
@@ -1,25 +1,30 @@
 # 
 # A PLY-based parser for the TSpec (Tuning Specifier)
 #
-import re
-import orio.tool.ply.lex, orio.tool.ply.yacc
+import re, sys
 import orio.main.util.globals as g
+import orio.main.util.parser_registry as parser_registry
 
 #----------------------------------------------------------------------------------------------------------------------
 # LEXER
 # reserved keywords
 keywords = [
     'def', 'arg', 'param', 'decl', 'let', 'spec', 'constraint', 'option',
-    'build', 'build_command', 'prebuild_command', 'postbuild_command', 'postrun_command', 'batch_command', 'status_command', 'num_procs', 'libs',
+    'build', 'build_command', 'prebuild_command', 'postbuild_command', 'postrun_command', 'batch_command', 'status_command', 'num_procs', 'num_workers', 'variants_per_binary', 'shared_libraries', 'libs',
+    'build_timeout', 'run_timeout', 'memory_limit', 'cpu_limit', 'timeout_penalty',
     'input_params', 'input_vars', 'static', 'dynamic', 'managed', 'void', 'char', 'short', 'int', 'long', 'float', 'double', '__device__',
-    'performance_params', 'performance_counter', 'power', 'cmdline_params', 'method', 'repetitions',
-    'search', 'time_limit', 'total_runs', 'use_z3', 'resume', 'algorithm',
+    'performance_params', 'performance_counter', 'power', 'cmdline_params', 'method', 'repetitions', 'max_repetitions',
+    'search', 'time_limit', 'total_runs', 'use_z3', 'resume', 'algorithm', 'promote_fraction',
+    'objectives', 'objective_weights',
     'init_file', 'decl_file',
     'exhaustive_start_coord',
     'msimplex_reflection_coef', 'msimplex_expansion_coef',
     'msimplex_contraction_coef', 'msimplex_shrinkage_coef', 'msimplex_size', 'msimplex_x0',
     'simplex_reflection_coef', 'simplex_expansion_coef',
     'simplex_contraction_coef', 'simplex_shrinkage_coef', 'simplex_local_distance', 'simplex_x0',
+    'randomlocal_local_distance', 'annealing_local_distance', 'annealing_first_improvement',
+    'mlsearch_local_distance', 'mlsearch_history', 'mlsearch_trees', 'mlsearch_trees_per_batch', 'mlsearch_pool_size',
+    'bayesopt_init_samples', 'bayesopt_candidates', 'bayesopt_gamma', 'bayesopt_local_distance',
     'cudacfg_instmix',
     'validation', 'validation_file', 'expected_output',
     'macro', 'performance_test_code', 'skeleton_test_code', 'skeleton_code_file',
@@ -198,13 +203,25 @@ def p_arg_type(p):
                 | BATCH_COMMAND
                 | STATUS_COMMAND
                 | NUM_PROCS
+                | NUM_WORKERS
+                | VARIANTS_PER_BINARY
+                | SHARED_LIBRARIES
+                | BUILD_TIMEOUT
+                | RUN_TIMEOUT
+                | MEMORY_LIMIT
+                | CPU_LIMIT
+                | TIMEOUT_PENALTY
                 | METHOD
                 | REPETITIONS
+                | MAX_REPETITIONS
                 | ALGORITHM
                 | TIME_LIMIT
                 | TOTAL_RUNS
                 | USE_Z3
                 | RESUME
+                | PROMOTE_FRACTION
+                | OBJECTIVES
+                | OBJECTIVE_WEIGHTS
                 | LIBS
                 | INIT_FILE
                 | DECL_FILE
@@ -221,6 +238,18 @@ def p_arg_type(p):
                 | SIMPLEX_SHRINKAGE_COEF
                 | SIMPLEX_LOCAL_DISTANCE    
                 | SIMPLEX_X0
+                | RANDOMLOCAL_LOCAL_DISTANCE
+                | ANNEALING_LOCAL_DISTANCE
+                | ANNEALING_FIRST_IMPROVEMENT
+                | MLSEARCH_LOCAL_DISTANCE
+                | MLSEARCH_HISTORY
+                | MLSEARCH_TREES
+                | MLSEARCH_TREES_PER_BATCH
+                | MLSEARCH_POOL_SIZE
+                | BAYESOPT_INIT_SAMPLES
+                | BAYESOPT_CANDIDATES
+                | BAYESOPT_GAMMA
+                | BAYESOPT_LOCAL_DISTANCE
                 | CUDACFG_INSTMIX
                 | VALIDATION_FILE
                 | EXPECTED_OUTPUT
@@ -344,10 +373,8 @@ def p_error(p):
 
 #----------------------------------------------------------------------------------------------------------------------
 def getParser(start_symbol):
-    '''Create the parser'''
-    _ = orio.tool.ply.lex.lex()
-    parser = orio.tool.ply.yacc.yacc(method='LALR', debug=0, start=start_symbol, check_recursion=0, tabmodule="pparsetab", optimize=1, write_tables=0)
-    return parser
+    '''Return the parser of a start symbol (built once, its lexer is created for each parse)'''
+    return parser_registry.getParser(sys.modules[__name__], start=start_symbol, check_recursion=0)
 
 
 #--------------------------------------------------------------------------------
@@ -3,6 +3,7 @@
 #
 
 import io, sys, os, tokenize
+import orio.main.tuner.search.objectives
 from orio.main.util.globals import *
 
 
@@ -23,9 +24,10 @@ class TuningInfo:
 
         # unpack all information
 
-        pcount_method, pcount_reps, random_seed, timing_array_size = pcount_info
+        pcount_method, pcount_reps, pcount_max_reps, random_seed, timing_array_size = pcount_info
         power_method, power_reps, random_seed, power_array_size = power_info
-        search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts = search_info
+        (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_promote_fraction,
+         search_objectives, search_objective_weights, search_opts) = search_info
         pparam_params, pparam_constraints = pparam_info
         cmdline_params, cmdline_constraints = cmdline_info
         iparam_params, iparam_constraints = iparam_info
@@ -48,13 +50,25 @@ class TuningInfo:
         self.batch_cmd = build_info.get('batch_cmd')  # command for requesting a batch job
         self.status_cmd = build_info.get('status_cmd')  # command for checking status of submitted batch
         self.num_procs = build_info.get('num_procs')  # the number of processes used to run the test driver
+        self.num_workers = build_info.get('num_workers', 1)  # the number of variants compiled concurrently (local, non-batch)
+        self.variants_per_binary = build_info.get(
+            'variants_per_binary', 1)  # the number of variants timed by one test executable (sequential search)
+        self.shared_libs = build_info.get(
+            'shared_libs', False)  # time variants compiled into shared libraries in one harness process (sequential C)
         self.timer_file = build_info.get('timer_file')  # user-specified implementation of the getClock() function
+        self.build_timeout = build_info.get('build_timeout')  # wall-clock limit (seconds) of each build command
+        self.run_timeout = build_info.get('run_timeout')  # wall-clock limit (seconds) of each test run
+        self.memory_limit = build_info.get('memory_limit')  # address space limit (MB) of each test run
+        self.cpu_limit = build_info.get('cpu_limit')  # CPU time limit (seconds) of each test run
+        self.timeout_penalty = build_info.get(
+            'timeout_penalty')  # a timed-out test costs timeout_penalty times the best cost so far (infinite if None)
         self.post_run_cmd = build_info.get(
             'postrun_cmd')  # command to run after executing timing test (will be passed the executable name and coordinate string as an argument)
 
         # performance counter arguments
         self.pcount_method = pcount_method  # default: 'basic timer' --> in microseconds
         self.pcount_reps = pcount_reps  # default: 5
+        self.pcount_max_reps = pcount_max_reps  # default: None (always run pcount_reps repetitions)
         # self.pcount_subreps = pcount_subreps           # mandatory subrepetitions (to enable timing of very small computations), default: 10
         self.random_seed = random_seed  # default: None
         self.timing_array_size = timing_array_size  # default an odd number >= pcount_reps
@@ -69,6 +83,9 @@ class TuningInfo:
         self.search_total_runs = search_total_runs  # default: -1
         self.search_use_z3 = search_use_z3  # default: False
         self.search_resume = search_resume  # default: False
+        self.search_promote_fraction = search_promote_fraction  # default: None (search each problem size fully)
+        self.search_objectives = search_objectives  # default: ['time']
+        self.search_objective_weights = search_objective_weights  # default: None (all 1)
         self.search_opts = search_opts  # default: []
 
         # performance parameters
@@ -119,8 +136,17 @@ class TuningInfo:
         s += ' batch command: %s \n' % self.batch_cmd
         s += ' status command: %s \n' % self.status_cmd
         s += ' num-processors: %s \n' % self.num_procs
+        s += ' num-workers: %s \n' % self.num_workers
+        s += ' variants per binary: %s \n' % self.variants_per_binary
+        s += ' shared-library variants: %s \n' % self.shared_libs
+        s += ' build timeout (seconds): %s \n' % self.build_timeout
+        s += ' run timeout (seconds): %s \n' % self.run_timeout
+        s += ' memory limit (MB): %s \n' % self.memory_limit
+        s += ' CPU time limit (seconds): %s \n' % self.cpu_limit
+        s += ' timeout penalty: %s \n' % self.timeout_penalty
         s += ' perf-counting method: %s \n' % self.pcount_method
         s += ' perf-counting repetitions: %s \n' % self.pcount_reps
+        s += ' perf-counting maximum (adaptive) repetitions: %s \n' % self.pcount_max_reps
         s += ' number of timing results to store: %s \n ' % self.timing_array_size
         s += ' power measurement method: %s \n' % self.power_method
         s += ' power measurement repetitions: %s \n' % self.power_reps
@@ -131,6 +157,9 @@ class TuningInfo:
         s += ' search total runs: %s \n' % self.search_total_runs
         s += ' search use z3 [True/False]: %s \n' % self.search_use_z3
         s += ' search resume [True/False]: %s\n' % self.search_resume
+        s += ' search promote fraction (successive halving): %s\n' % self.search_promote_fraction
+        s += ' search objectives: %s\n' % self.search_objectives
+        s += ' search objective weights: %s\n' % self.search_objective_weights
         s += ' search options: \n'
         for id_name, rhs in self.search_opts:
             s += '    %s: %s \n' % (id_name, rhs)
@@ -222,7 +251,15 @@ class TuningInfoGen:
         BATCHCMD = 'batch_command'
         STATUSCMD = 'status_command'
         NUMPROCS = 'num_procs'
+        NUMWORKERS = 'num_workers'
+        VARIANTS = 'variants_per_binary'
+        SHLIBS = 'shared_libraries'
         TIMER_FILE = 'timer_file'
+        BUILDTIMEOUT = 'build_timeout'
+        RUNTIMEOUT = 'run_timeout'
+        MEMLIMIT = 'memory_limit'
+        CPULIMIT = 'cpu_limit'
+        TIMEOUTPENALTY = 'timeout_penalty'
 
         # all expected build information
         prebuild_cmd = None
@@ -235,7 +272,11 @@ class TuningInfoGen:
         batch_cmd = None
         status_cmd = None
         num_procs = 1
+        num_workers = 1
+        variants_per_binary = 1
+        shared_libs = False
         timer_file = None
+        limits = {}  # timeouts and resource limits of the build and run commands (none by default)
 
         # iterate over each statement
         for stmt in stmt_seq:
@@ -255,7 +296,8 @@ class TuningInfoGen:
 
             # unknown argument name
             if id_name not in (
-            BUILDCMD, PREBUILDCMD, POSTBUILDCMD, POSTRUNCMD, BATCHCMD, STATUSCMD, NUMPROCS, LIBS, CC, TIMER_FILE):
+            BUILDCMD, PREBUILDCMD, POSTBUILDCMD, POSTRUNCMD, BATCHCMD, STATUSCMD, NUMPROCS, NUMWORKERS, VARIANTS, SHLIBS,
+            LIBS, CC, TIMER_FILE, BUILDTIMEOUT, RUNTIMEOUT, MEMLIMIT, CPULIMIT, TIMEOUTPENALTY):
                 err('orio.main.tspec.tune_info: %s: unknown build argument: "%s"' % (id_line_no, id_name))
 
             # evaluate the pre-build command
@@ -333,6 +375,29 @@ class TuningInfoGen:
 
                 num_procs = rhs
 
+            # evaluate the number of concurrent local build workers
+            elif id_name == NUMWORKERS:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err(
+                        'orio.main.tspec.tune_info: %s: number of workers in build section must be a positive integer' % rhs_line_no)
+
+                num_workers = rhs
+
+            # evaluate the number of variants timed by each test executable
+            elif id_name == VARIANTS:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err(
+                        'orio.main.tspec.tune_info: %s: number of variants per binary in build section must be a positive integer' % rhs_line_no)
+
+                variants_per_binary = rhs
+
+            # evaluate whether the variants are compiled into shared libraries timed by a persistent harness
+            elif id_name == SHLIBS:
+                if not isinstance(rhs, bool):
+                    err('orio.main.tspec.tune_info: %s: shared_libraries in build section must be a boolean' % rhs_line_no)
+
+                shared_libs = rhs
+
             # User-specified timer file
             elif id_name == TIMER_FILE:
                 if not isinstance(rhs, str) or not os.path.exists(rhs):
@@ -340,9 +405,18 @@ class TuningInfoGen:
 
                 timer_file = rhs
 
+            # evaluate the timeouts and resource limits
+            elif id_name in (BUILDTIMEOUT, RUNTIMEOUT, MEMLIMIT, CPULIMIT, TIMEOUTPENALTY):
+                if not isinstance(rhs, (int, float)) or isinstance(rhs, bool) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: %s in build section must be a positive number' %
+                        (rhs_line_no, id_name))
+
+                limits[id_name] = rhs
+
         # return all build information
         return (
-        prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd, num_procs, libs, cc, fc, timer_file)
+        prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd, num_procs, num_workers,
+        variants_per_binary, shared_libs, libs, cc, fc, timer_file, limits)
 
     # -----------------------------------------------------------
 
@@ -352,12 +426,14 @@ class TuningInfoGen:
         # all expected argument names
         METHOD = 'method'
         REPS = 'repetitions'
+        MAX_REPS = 'max_repetitions'
         RANDOM_SEED = 'random_seed'
         TIMING_ARRAY_SIZE = 'timing_array_size'
 
         # all expected performance counting information
         pcount_method = None
         pcount_reps = None
+        pcount_max_reps = None
         random_seed = None
         timing_array_size = None
 
@@ -378,7 +454,7 @@ class TuningInfoGen:
             _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
 
             # unknown argument name
-            if id_name not in (METHOD, REPS, RANDOM_SEED, TIMING_ARRAY_SIZE):
+            if id_name not in (METHOD, REPS, MAX_REPS, RANDOM_SEED, TIMING_ARRAY_SIZE):
                 err('orio.main.tspec.tune_info: %s: unknown performance counter argument: "%s"' % (id_line_no, id_name))
 
             # evaluate build command
@@ -396,6 +472,14 @@ class TuningInfoGen:
 
                 pcount_reps = rhs
 
+            # evaluate the maximum number of repetitions (enables adaptive repetitions)
+            elif id_name == MAX_REPS:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err(
+                        'orio.main.tspec.tune_info: %s: maximum performance counting repetitions must be a positive integer' % rhs_line_no)
+
+                pcount_max_reps = rhs
+
             elif id_name == TIMING_ARRAY_SIZE:
                 if not isinstance(rhs, int) or rhs <= 0:
                     warn(
@@ -411,7 +495,7 @@ class TuningInfoGen:
                 random_seed = rhs
 
         # return all performance counting information
-        return (pcount_method, pcount_reps, random_seed, timing_array_size)
+        return (pcount_method, pcount_reps, pcount_max_reps, random_seed, timing_array_size)
 
     # -----------------------------------------------------------
 
@@ -493,6 +577,9 @@ class TuningInfoGen:
         TRUNS = 'total_runs'
         USE_Z3 = 'use_z3'
         RESUME = 'resume'
+        PROMOTE = 'promote_fraction'
+        OBJECTIVES = 'objectives'
+        OBJ_WEIGHTS = 'objective_weights'
 
         # all expected search information
         search_algo = None
@@ -500,6 +587,9 @@ class TuningInfoGen:
         search_total_runs = None
         search_resume = False
         search_use_z3 = False
+        search_promote_fraction = None
+        search_objectives = ['time']
+        search_objective_weights = None
         search_opts = []
 
         # iterate over each statement
@@ -519,7 +609,7 @@ class TuningInfoGen:
             _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
 
             # unknown argument name
-            if id_name not in (ALGO, TLIMIT, TRUNS, RESUME, USE_Z3):
+            if id_name not in (ALGO, TLIMIT, TRUNS, RESUME, USE_Z3, PROMOTE, OBJECTIVES, OBJ_WEIGHTS):
                 if search_algo == None or not id_name.startswith(search_algo.lower() + '_'):
                     err('orio.main.tspec.tune_info: %s: unknown search argument: "%s"' % (id_line_no, id_name))
 
@@ -554,6 +644,34 @@ class TuningInfoGen:
 
                 search_use_z3 = rhs
 
+            # evaluate the fraction of coordinates promoted from a problem size to the next larger one
+            elif id_name == PROMOTE:
+                if (not isinstance(rhs, int) and not isinstance(rhs, float)) or rhs <= 0 or rhs > 1:
+                    err(
+                        'orio.main.tspec.tune_info: %s: search promote_fraction must be a number in (0,1]' % rhs_line_no)
+
+                search_promote_fraction = rhs
+
+            # evaluate the objectives of a multi-objective search, and the weights of their product
+            elif id_name == OBJECTIVES:
+                if isinstance(rhs, str):
+                    rhs = [rhs]
+                if not isinstance(rhs, (list, tuple)) or not rhs or \
+                        [n for n in rhs if n not in orio.main.tuner.search.objectives.OBJECTIVES] or \
+                        len(set(rhs)) != len(rhs):
+                    err('orio.main.tspec.tune_info: %s: search objectives must be a list of distinct names among: %s' %
+                        (rhs_line_no, ', '.join(orio.main.tuner.search.objectives.OBJECTIVES)))
+
+                search_objectives = list(rhs)
+
+            elif id_name == OBJ_WEIGHTS:
+                if not isinstance(rhs, (list, tuple)) or \
+                        [w for w in rhs if not isinstance(w, (int, float)) or isinstance(w, bool) or w <= 0]:
+                    err('orio.main.tspec.tune_info: %s: search objective_weights must be a list of positive numbers' %
+                        rhs_line_no)
+
+                search_objective_weights = list(rhs)
+
             # evaluate all other algorithm-specific arguments
             elif search_algo != None and id_name.startswith(search_algo.lower() + '_'):
                 id_name_orig = id_name
@@ -572,8 +690,13 @@ class TuningInfoGen:
                 else:
                     search_resume = rhs
 
+        if search_objective_weights is not None and len(search_objective_weights) != len(search_objectives):
+            err('orio.main.tspec.tune_info: %s: search objective_weights must have one weight per objective' %
+                def_line_no)
+
         # return all search information
-        return (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts)
+        return (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume,
+                search_promote_fraction, search_objectives, search_objective_weights, search_opts)
 
     # -----------------------------------------------------------
 
@@ -954,9 +1077,9 @@ class TuningInfoGen:
 
         # all expected definition information
         build_info = {'build_cmd': 'gcc -O3', 'libs': ''}
-        pcount_info = ('basic timer', 5, None, None)
+        pcount_info = ('basic timer', 5, None, None, None)
         power_info = ('none', 5, None, None)
-        search_info = ('Exhaustive', -1, -1, False, False, [])
+        search_info = ('Exhaustive', -1, -1, False, False, None, ['time'], None, [])
         pparam_info = ([], [])
         cmdline_info = ([], [])
         iparam_info = ([], [])
@@ -989,7 +1112,8 @@ class TuningInfoGen:
             # build definition
             if dname == BUILD:
                 (prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd,
-                 num_procs, libs, cc, fc, timer_file) = self.__genBuildInfo(body_stmt_seq, line_no)
+                 num_procs, num_workers, variants_per_binary, shared_libs, libs, cc, fc, timer_file,
+                 limits) = self.__genBuildInfo(body_stmt_seq, line_no)
                 if build_cmd == None:
                     err('orio.main.tspec.tune_info: %s: missing build command in the build section' % line_no)
 
@@ -1002,6 +1126,10 @@ class TuningInfoGen:
                     warn(('orio.main.tspec.tune_info: %s: number of processors in build section must be greater than ' +
                           'one for non-batch (or non-parallel) search') % line_no)
 
+                if batch_cmd != None and num_workers > 1:
+                    warn(('orio.main.tspec.tune_info: %s: number of workers in build section is ignored for ' +
+                          'batch (parallel) search') % line_no)
+
                 build_info = {'prebuild_cmd': prebuild_cmd,
                               'build_cmd': build_cmd,
                               'postbuild_cmd': postbuild_cmd,
@@ -1009,23 +1137,31 @@ class TuningInfoGen:
                               'batch_cmd': batch_cmd,
                               'status_cmd': status_cmd,
                               'num_procs': num_procs,
+                              'num_workers': num_workers,
+                              'variants_per_binary': variants_per_binary,
+                              'shared_libs': shared_libs,
                               'libs': libs,
                               'cc': cc,
                               'fc': fc,
                               'timer_file': timer_file}
+                build_info.update(limits)
 
             # performance counter definition
             elif dname == PERF_COUNTER:
-                pcount_method, pcount_reps, random_seed, timing_array_size = self.__genPerfCounterInfo(body_stmt_seq,
-                                                                                                       line_no)
-                default_p_method, default_p_reps, _, _ = pcount_info
+                (pcount_method, pcount_reps, pcount_max_reps, random_seed,
+                 timing_array_size) = self.__genPerfCounterInfo(body_stmt_seq, line_no)
+                default_p_method, default_p_reps, _, _, _ = pcount_info
                 if pcount_method == None:
                     pcount_method = default_p_method
                 if pcount_reps == None:
                     pcount_reps = default_p_reps
+                if pcount_max_reps != None and pcount_max_reps < pcount_reps:
+                    warn(('orio.main.tspec.tune_info: %s: maximum repetitions in performance counter section must ' +
+                          'not be smaller than the repetitions, ignoring it') % line_no)
+                    pcount_max_reps = None
                 if not timing_array_size:
                     timing_array_size = pcount_reps + (pcount_reps + 1) % 2
-                pcount_info = (pcount_method, pcount_reps, random_seed, timing_array_size)
+                pcount_info = (pcount_method, pcount_reps, pcount_max_reps, random_seed, timing_array_size)
 
             # Power/energy measurement
             elif dname == POWER:
@@ -1043,9 +1179,9 @@ class TuningInfoGen:
             # search definition
             elif dname == SEARCH:
                 (search_algo, search_time_limit,
-                 search_total_runs, search_use_z3, search_resume,
-                 search_opts) = self.__genSearchInfo(body_stmt_seq, line_no)
-                default_s_algo, default_s_tlimit, default_s_truns, default_s_resume, _, _= search_info
+                 search_total_runs, search_use_z3, search_resume, search_promote_fraction,
+                 search_objectives, search_objective_weights, search_opts) = self.__genSearchInfo(body_stmt_seq, line_no)
+                default_s_algo, default_s_tlimit, default_s_truns, default_s_resume, _, _, _, _, _ = search_info
                 if search_algo == None:
                     search_algo = default_s_algo
                 if search_time_limit == None:
@@ -1055,7 +1191,8 @@ class TuningInfoGen:
                 if search_resume == None:
                     search_resume = False
                 search_info = (search_algo, search_time_limit, search_total_runs, search_use_z3,
-                               search_resume, search_opts)
+                               search_resume, search_promote_fraction, search_objectives,
+                               search_objective_weights, search_opts)
 
             # performance parameters definition
             elif dname == PERF_PARAMS:
@@ -0,0 +1,88 @@
+#
+# Adaptive number of timing repetitions, with statistical early stopping
+#
+
+import math
+
+#-----------------------------------------------------
+
+# two-sided 95% critical values of Student's t distribution, indexed by the degrees of freedom
+_T95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+def confidenceInterval(samples):
+    '''Return the (mean, half width) of the 95% confidence interval of the mean of the given samples'''
+    n = len(samples)
+    mean = sum(samples) / n
+    if n < 2:
+        return (mean, float('inf'))
+    var = sum([(x - mean) ** 2 for x in samples]) / (n - 1)
+    df = n - 1
+    if df < len(_T95):
+        t = _T95[df]
+    elif df <= 60:
+        t = 2.000
+    else:
+        t = 1.960
+    return (mean, t * math.sqrt(var / n))
+
+#-----------------------------------------------------
+
+class AdaptiveRepetitions:
+    '''
+    Decide, after each timing repetition of a test, whether more repetitions are needed. Like the
+    search engines, the first (warm-up) repetition is left out of the mean. A test is stopped:
+     - as soon as its confidence interval lies entirely above the one of the best test so far
+       (it cannot be the best),
+     - after min_reps repetitions, unless its confidence interval overlaps the one of the best test
+       (the two are statistically tied, so sampling continues up to max_reps repetitions).
+    '''
+
+    def __init__(self, min_reps, max_reps):
+        self.min_reps = min_reps
+        self.max_reps = max_reps
+        self.best = None          # the (mean, half width) of the best test measured so far
+
+        # statistics reported in the search summary
+        self.num_runs = 0
+        self.num_samples = 0
+        self.num_stopped = 0      # tests stopped before min_reps repetitions
+
+    #-----------------------------------------------------
+
+    def __interval(self, times):
+        samples = times[1:] if len(times) > 1 else times
+        return confidenceInterval(samples)
+
+    def keepSampling(self, times):
+        '''Return True if the test whose repetitions so far took the given times should keep running'''
+        if len(times) >= self.max_reps:
+            return False
+        if self.best is None:
+            return len(times) < self.min_reps
+        if any([math.isinf(t) for t in times]):
+            return False
+
+        mean, hwidth = self.__interval(times)
+        best_mean, best_hwidth = self.best
+        if mean - hwidth > best_mean + best_hwidth:
+            return False          # significantly slower than the best test
+        if len(times) < self.min_reps:
+            return True
+        # keep sampling while the test cannot be told apart from the best one
+        return mean + hwidth >= best_mean - best_hwidth
+
+    def update(self, times):
+        '''Record the times of a completed (or stopped) test'''
+        if not times:
+            return
+        self.num_runs += 1
+        self.num_samples += len(times)
+        if len(times) < self.min_reps:
+            self.num_stopped += 1
+        if any([math.isinf(t) for t in times]):
+            return
+        mean, hwidth = self.__interval(times)
+        if self.best is None or mean < self.best[0]:
+            self.best = (mean, hwidth)
@@ -0,0 +1,146 @@
+#
+# Checkpoints of the searches, from which an interrupted tuning session can be resumed
+#
+
+import hashlib, json, random, threading
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class Checkpoint:
+    '''
+    An append-only file recording, one JSON object per line, the state of each search:
+       {"kind": "start", "search": <key>, "random_state": [...]}
+       {"kind": "cost", "search": <key>, "coord": "[2, 4, 1]", "times": [...], "transfers": [...]}
+    (the cost records of multi-objective searches also hold the "metrics" of the coordinate),
+    where the search key identifies the search engine, search space and problem size. The search
+    engines are deterministic given the state of the random number generator when they start and the
+    performance costs they get, so a search is restored by running it again from the start with the
+    recorded random state, taking the recorded performance costs instead of measuring them: the
+    engine goes through the same states (simplex vertices, temperature, training set, ...) up to the
+    point where it was interrupted. The file is flushed after each record; a truncated last line (e.g.,
+    of a preempted job) is ignored.
+    '''
+
+    def __init__(self, filename, resume_filename=None):
+        '''
+        @param filename: the checkpoint file written by this session
+        @param resume_filename: the checkpoint file of the interrupted session to resume, if any (it
+                                can be the same file, which is then appended to)
+        '''
+        self.filename = filename
+        self.__lock = threading.Lock()
+        self.__file = None
+        self.__starts = {}     # search key -> recorded random state
+        self.__costs = {}      # search key -> {coordinate key: (times, transfers)}, in recording order
+        self.__metrics = {}    # search key -> {coordinate key: metrics}
+        if resume_filename:
+            lines, truncated = self.__load(resume_filename)
+            if resume_filename != filename:
+                self.__write(lines)
+            elif truncated:
+                self.__write(['\n'])   # end the truncated line before appending to it
+            info('resuming %d searches with %d performance costs from the checkpoint file "%s"' %
+                 (len(self.__starts), sum([len(c) for c in self.__costs.values()]), resume_filename))
+
+    #-----------------------------------------------------
+
+    def __load(self, filename):
+        '''Read the records of a checkpoint file, return the valid lines and whether the last one is truncated'''
+        try:
+            f = open(filename)
+        except Exception as e:
+            err('orio.main.tuner.checkpoint: cannot open the checkpoint file "%s"\n --> %s: %s' %
+                (filename, e.__class__.__name__, e))
+        lines = []
+        line = '\n'
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    key = rec['search']
+                    if rec['kind'] == 'start':
+                        self.__starts.setdefault(key, rec['random_state'])
+                    elif rec['kind'] == 'cost':
+                        self.__costs.setdefault(key, {})[rec['coord']] = (rec['times'], rec['transfers'])
+                        if rec.get('metrics') is not None:
+                            self.__metrics.setdefault(key, {})[rec['coord']] = rec['metrics']
+                    else:
+                        continue
+                except (ValueError, KeyError, TypeError):
+                    warn('orio.main.tuner.checkpoint: ignoring a malformed line of "%s": %s' % (filename, line.strip()))
+                    continue
+                lines.append(line if line.endswith('\n') else line + '\n')
+        return lines, not line.endswith('\n')
+
+    def __write(self, lines):
+        with self.__lock:
+            try:
+                if self.__file is None:
+                    self.__file = open(self.filename, 'a')
+                self.__file.writelines(lines)
+            except Exception as e:
+                warn('orio.main.tuner.checkpoint: cannot write to the checkpoint file "%s"\n --> %s: %s' %
+                     (self.filename, e.__class__.__name__, e))
+
+    #-----------------------------------------------------
+
+    def searchKey(self, parts):
+        '''Return the key of a search described by the given list of strings'''
+        return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def start(self, key):
+        '''
+        Start (or restart) a search: restore the random state recorded when it started, or record the
+        current one. Return the performance costs recorded for it, indexed by coordinate key.
+        '''
+        if key in self.__starts:
+            state = self.__starts[key]
+            random.setstate((state[0], tuple(state[1]), state[2]))
+        else:
+            self.__starts[key] = random.getstate()
+            self.__write([json.dumps({'kind': 'start', 'search': key, 'random_state': self.__starts[key]}) + '\n'])
+            self.flush()
+        return dict(self.__costs.get(key, {}))
+
+    def metrics(self, key):
+        '''Return the metrics recorded for the coordinates of a search, indexed by coordinate key'''
+        return dict(self.__metrics.get(key, {}))
+
+    def record(self, key, coord_key, perf_cost, metrics=None):
+        '''Record the (times, transfer times) of a coordinate, and its metrics (if any)'''
+        times, transfers = perf_cost
+        self.__costs.setdefault(key, {})[coord_key] = (times, transfers)
+        rec = {'kind': 'cost', 'search': key, 'coord': coord_key, 'times': times, 'transfers': transfers}
+        if metrics is not None:
+            self.__metrics.setdefault(key, {})[coord_key] = metrics
+            rec['metrics'] = metrics
+        self.__write([json.dumps(rec) + '\n'])
+        self.flush()
+
+    def lastCoord(self, key):
+        '''Return the key of the last coordinate recorded for a search, or None'''
+        coords = list(self.__costs.get(key, {}).keys())
+        return coords[-1] if coords else None
+
+    def flush(self):
+        with self.__lock:
+            if self.__file is not None:
+                try:
+                    self.__file.flush()
+                except Exception as e:
+                    warn('orio.main.tuner.checkpoint: cannot write to the checkpoint file "%s"\n --> %s: %s' %
+                         (self.filename, e.__class__.__name__, e))
+
+#-----------------------------------------------------
+
+_checkpoints = {}
+
+def sessionCheckpoint():
+    '''Return the checkpoint of this tuning session, or None if there is none'''
+    filename = Globals().checkpoint_file
+    if not filename:
+        return None
+    if filename not in _checkpoints:
+        _checkpoints[filename] = Checkpoint(filename, Globals().resume_file)
+    return _checkpoints[filename]
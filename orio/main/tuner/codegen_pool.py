@@ -0,0 +1,81 @@
+#
+# The transformation of the annotated code for the coordinates of a search, one at a time or in a pool
+# of worker processes
+#
+
+import multiprocessing, sys, time
+from orio.main.util.globals import *
+from orio.main.transform_cache import recordedMetadata
+
+#-----------------------------------------------------
+
+def transformCode(odriver, cfrags, perf_params):
+    '''
+    Transform the annotated code fragments for the given performance parameters; return the
+    transformed code sequence (None if the transformation failed), the transformation time and the
+    error (None if it succeeded)
+    '''
+    start = time.time()
+    try:
+        return odriver.optimizeCodeFrags(cfrags, perf_params), time.time() - start, None
+    except Exception:
+        return None, time.time() - start, str(sys.exc_info()[0])
+
+# the optimization driver and code fragments of a worker process
+_worker_odriver = None
+_worker_cfrags = None
+
+def _initWorker(odriver, cfrags):
+    global _worker_odriver, _worker_cfrags
+    _worker_odriver = odriver
+    _worker_cfrags = cfrags
+    Globals().startWorker()
+
+def _transformInWorker(perf_params):
+    Globals().resetTransformState()
+    try:
+        with recordedMetadata() as metadata:
+            result = transformCode(_worker_odriver, _worker_cfrags, perf_params)
+        return result + (metadata,)
+    except BaseException:
+        # e.g., an error that stops the tuning (--stop-on-error): the coordinate fails, the search
+        # process reports it (and stops)
+        return None, 0.0, str(sys.exc_info()[0]), {}
+
+#-----------------------------------------------------
+
+class CodeGenPool:
+    '''
+    A pool of worker processes transforming the annotated code for the coordinates of a search, in
+    parallel with each other and with the search process, which builds and measures the codes
+    transformed so far. The workers are forked from the search process when the pool is created,
+    so that the optimization driver and the code fragments are shipped to each worker once; each
+    worker then receives the performance parameters of a coordinate and returns its transformed
+    code. The transformations modify the global state (Globals) of the worker only, except for the
+    metadata they write, which are returned with the transformed code.
+    '''
+
+    def __init__(self, odriver, cfrags, num_procs):
+        self.num_procs = num_procs
+        # the buffered output of the search process would otherwise be written again by each worker
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.__pool = multiprocessing.get_context('fork').Pool(num_procs, _initWorker, (odriver, cfrags))
+        info('transforming the code in %d worker processes' % num_procs)
+
+    @staticmethod
+    def isAvailable():
+        '''Return True if the worker processes can be forked on this platform'''
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    def imap(self, perf_params_seq):
+        '''
+        Generate the (transformed code sequence, transformation time, error, metadata written by the
+        transformation) of each of the given performance parameters, in order, as soon as it is
+        transformed
+        '''
+        return self.__pool.imap(_transformInWorker, perf_params_seq)
+
+    def close(self):
+        self.__pool.terminate()
+        self.__pool.join()
@@ -0,0 +1,95 @@
+#
+# A ccache-like cache of compiled performance-testing executables
+#
+
+import os, shutil, hashlib, threading
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class ExeCache:
+    '''
+    A directory of test executables indexed by a hash of everything that goes into building them
+    (the test source, the expanded build command, libraries, compiler version, ...). Variants that
+    generate identical code are linked and run without being recompiled. The least recently used
+    executables are removed once the total size of the cache exceeds max_size bytes.
+    '''
+
+    # the suffix of the cached executables
+    __EXT = '.exe'
+
+    #-----------------------------------------------------
+
+    def __init__(self, cache_dir, max_size):
+        '''
+        @param cache_dir: the directory holding the cached executables (created if needed)
+        @param max_size: the maximum total size of the cached executables, in bytes
+        '''
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+        except Exception as e:
+            err('orio.main.tuner.exe_cache: cannot create the executable cache directory "%s"\n --> %s: %s' %
+                (cache_dir, e.__class__.__name__, e))
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.__lock = threading.Lock()
+
+    #-----------------------------------------------------
+
+    def key(self, parts):
+        '''Return the cache key of the given list of strings'''
+        return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def __path(self, key):
+        return os.path.join(self.cache_dir, key + self.__EXT)
+
+    def fetch(self, key, exe_name):
+        '''Copy the cached executable with the given key to exe_name, return False if it is not cached'''
+        path = self.__path(key)
+        with self.__lock:
+            if not os.path.exists(path):
+                return False
+            try:
+                shutil.copy2(path, exe_name)
+                os.utime(path, None)   # mark as recently used
+            except Exception as e:
+                warn('orio.main.tuner.exe_cache: cannot copy cached executable %s\n --> %s: %s' %
+                     (path, e.__class__.__name__, e))
+                return False
+            self.hits += 1
+        return True
+
+    def store(self, key, exe_name):
+        '''Add a copy of the freshly built exe_name to the cache'''
+        path = self.__path(key)
+        with self.__lock:
+            try:
+                shutil.copy2(exe_name, path + '.tmp')
+                os.replace(path + '.tmp', path)
+                os.utime(path, None)
+            except Exception as e:
+                warn('orio.main.tuner.exe_cache: cannot cache executable %s\n --> %s: %s' %
+                     (exe_name, e.__class__.__name__, e))
+                return
+            self.__evict()
+
+    def __evict(self):
+        '''Remove the least recently used executables until the cache fits in max_size bytes'''
+        entries = []
+        total_size = 0
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith(self.__EXT):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, fname))
+            entries.append((st.st_mtime, st.st_size, fname))
+            total_size += st.st_size
+        entries.sort()
+        while total_size > self.max_size and len(entries) > 1:
+            _, size, fname = entries.pop(0)
+            try:
+                os.unlink(os.path.join(self.cache_dir, fname))
+            except OSError:
+                pass
+            total_size -= size
@@ -0,0 +1,105 @@
+#
+# Merge the results files of several tuning sessions, e.g., the shards of an exhaustive search
+#
+
+import argparse, json, sys
+
+#-----------------------------------------------------
+
+def meanCost(times):
+    '''
+    Return the mean of the timing repetitions of a result (all but the first one, like the exhaustive
+    search), or None if the coordinate failed
+    '''
+    if not times or None in times:
+        return None
+    times = [float(t) for t in times]
+    if len(times) > 1:
+        times = times[1:]
+    return sum(times) / len(times)
+
+def problemKey(rec):
+    '''Return the key of the problem size (input parameters) of a result record'''
+    return json.dumps(sorted(rec.get('input_params', {}).items()))
+
+def readResults(filenames):
+    '''
+    Read the records of the given results files; a coordinate recorded several times for the same
+    problem size keeps its first successful record. Return the dictionary
+    {problem key: {coordinate key: record}} and the number of lines that could not be parsed.
+    '''
+    results = {}
+    num_bad = 0
+    for filename in filenames:
+        with open(filename) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rec = json.loads(line)
+                    coord_key = rec['coord']
+                except (ValueError, KeyError, TypeError):
+                    num_bad += 1
+                    continue
+                rec['file'] = filename
+                table = results.setdefault(problemKey(rec), {})
+                old = table.get(coord_key)
+                if old is None or (meanCost(old['times']) is None and meanCost(rec['times']) is not None):
+                    table[coord_key] = rec
+    return results, num_bad
+
+def bestResults(results):
+    '''Return the record with the lowest mean cost of each problem size, {problem key: record or None}'''
+    best = {}
+    for pkey, table in results.items():
+        best[pkey] = None
+        best_cost = float('inf')
+        for rec in table.values():
+            cost = meanCost(rec['times'])
+            if cost is not None and cost > 0.0 and cost < best_cost:
+                best[pkey] = rec
+                best_cost = cost
+    return best
+
+#-----------------------------------------------------
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='ormerge',
+                                     description='Combine the results files (--results-file) of several Orio tuning ' +
+                                                 'sessions, e.g., of the shards (--shard=i/N) of an exhaustive search, ' +
+                                                 'and report the best coordinate of each problem size.')
+    parser.add_argument('files', nargs='+', metavar='RESULTS_FILE', help='the results files to merge')
+    parser.add_argument('-o', '--output', help='write the merged results table to this file, one JSON object per line')
+    args = parser.parse_args(argv[1:])
+
+    try:
+        results, num_bad = readResults(args.files)
+    except IOError as e:
+        sys.stderr.write('ormerge: %s\n' % e)
+        return 1
+    if num_bad:
+        sys.stderr.write('ormerge: ignored %d malformed lines\n' % num_bad)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            for pkey in sorted(results.keys()):
+                for coord_key in sorted(results[pkey].keys(), key=json.loads):
+                    rec = dict(results[pkey][coord_key])
+                    del rec['file']
+                    f.write(json.dumps(rec) + '\n')
+
+    for pkey, rec in sorted(bestResults(results).items()):
+        table = results[pkey]
+        num_failed = len([r for r in table.values() if meanCost(r['times']) is None])
+        inputs = ', '.join(['%s=%s' % (k, v) for k, v in json.loads(pkey)])
+        sys.stdout.write('problem size: %s\n' % (inputs or '-'))
+        sys.stdout.write(' coordinates: %d (%d failed)\n' % (len(table), num_failed))
+        if rec is None:
+            sys.stdout.write(' best coordinate: none\n')
+        else:
+            sys.stdout.write(' best coordinate: %s=%s, cost=%e (%s)\n' %
+                             (rec['coord'], rec['params'], meanCost(rec['times']), rec['file']))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -5,7 +5,7 @@
 import random, re
 from . import skeleton_code 
 from orio.main.util.globals import *
-from orio.main.tuner.skeleton_code import SEQ_TIMER
+from orio.main.tuner.skeleton_code import SEQ_TIMER, ENERGY_CODE
 
 #-----------------------------------------------------
 
@@ -364,11 +364,25 @@ const char *__wattprof_conf_file = "1_conf.rnp";
 
         # Default timing code
         if Globals().language != 'cuda':
-            begin_inner_measure_code = 'orio_t_start = getClock();'
+            begin_inner_measure_code = '''
+#ifdef ORIO_ENERGY
+                                    orio_energyStart();
+#endif
+                                    orio_t_start = getClock();'''
             end_inner_measure_code = '''
                                     orio_t_end = getClock();
                                     orio_t = orio_t_end - orio_t_start;
-                                    printf("{'/*@ coordinate @*/' : %g}\\\\n", orio_t);
+#ifdef ORIO_ENERGY
+                                    {
+                                      int orio_energy_reps;
+                                      double orio_energy = orio_energyEnd(orio_i == ORIO_REPS - 1, &orio_energy_reps);
+                                      printf("{\\\\"coord\\\\": \\\\"/*@ coordinate @*/\\\\", \\\\"time\\\\": %g, \\\\"energy\\\\": %g, \\\\"energy_reps\\\\": %d}\\\\n",
+                                             orio_t, orio_energy, orio_energy_reps);
+                                    }
+#else
+                                    printf("{\\\\"coord\\\\": \\\\"/*@ coordinate @*/\\\\", \\\\"time\\\\": %g}\\\\n", orio_t);
+#endif
+                                    fflush(stdout);
                                     '''
         else:
             end_inner_measure_code = ''
@@ -413,15 +427,21 @@ const char *__wattprof_conf_file = "1_conf.rnp";
         
         # create code for the global definition section
 
+        # a test compiled with -DORIO_SHLIB_HARNESS only initializes the input variables and then times the
+        # variants that are compiled (with -DORIO_SHLIB_VARIANT) into shared libraries sharing those inputs
+        global_code += '#ifdef ORIO_SHLIB_HARNESS\nint orio_shlib_harness(int argc, char *argv[]);\n#endif\n'
+        global_code += ENERGY_CODE + '\n'
         global_code += init_code + '\n'
         global_code += decl_code + '\n'
         global_code += include_validation_code + '\n'
 
         # create code for the prologue section
-        prologue_code = ''
+        prologue_code = '\n#ifndef ORIO_SHLIB_VARIANT\n  '
         if not self.decl_file:
             prologue_code += ('%s();' % self.malloc_func_name) + '\n  '
         prologue_code += ('%s();' % self.init_func_name) + '\n'
+        prologue_code += '#endif\n'
+        prologue_code += '#ifdef ORIO_SHLIB_HARNESS\n  return orio_shlib_harness(argc, argv);\n#endif\n'
         if Globals().language == 'opencl':
             for (k, v) in Globals().metadata.items():
                 prologue_code += 'TAU_METADATA("%s", "%s");\n' % (k, v)
@@ -2,10 +2,15 @@
 # To compile and execute the performance-testing code to get the performance cost
 #
 
-import os, time, re, datetime, uuid
+import os, ast, time, re, math, datetime, uuid, shutil, threading, tempfile, atexit, signal
+import concurrent.futures
 
 from orio.main.util.globals import *
 import subprocess as sp
+from orio.main.tuner.exe_cache import ExeCache
+from orio.main.tuner.adaptive_reps import AdaptiveRepetitions
+from orio.main.tuner.skeleton_code import SEQ_SHLIB_HARNESS
+from orio.main.tuner.result_stream import parseResultLine
 
 # -----------------------------------------------------
 
@@ -25,6 +30,7 @@ class PerfTestDriver:
     __PCOUNT_BASIC = 'basic timer'  # in microseconds (not accurate, large overhead)
     __PCOUNT_BGP = 'bgp counter'  # in clock cycles (accurate, low overhead)
     __POWER_WATTPROF = 'wattprof'
+    __POWER_RAPL = 'rapl'    # the energy of the timing repetitions, read from the RAPL counters (Linux)
 
     # -----------------------------------------------------
 
@@ -77,14 +83,29 @@ class PerfTestDriver:
         if self.tinfo.pcount_method not in (self.__PCOUNT_BASIC, self.__PCOUNT_BGP):
             err('orio.main.tuner.ptest_driver:  unknown performance-counting method: "%s"' % self.tinfo.pcount_method)
 
-        if self.tinfo.power_method not in (self.__POWER_WATTPROF, "none"):
-            err('orio.main.tuner.ptest_driver:  unknown power measurement method: "%s"' % self.tinfo.pcount_method)
+        if self.tinfo.power_method not in (self.__POWER_WATTPROF, self.__POWER_RAPL, "none"):
+            err('orio.main.tuner.ptest_driver:  unknown power measurement method: "%s"' % self.tinfo.power_method)
 
         # get all extra options
         self.extra_compiler_opts = ''
         if self.tinfo.pcount_method == self.__PCOUNT_BGP:
             self.extra_compiler_opts += ' -DBGP_COUNTER'
-        self.extra_compiler_opts += ' -DORIO_REPS=%s' % self.tinfo.pcount_reps
+        # with adaptive repetitions, tests run up to pcount_max_reps times and are stopped when their
+        # streamed timings show that more repetitions would not change the outcome of the search
+        self.adaptive_reps = None
+        if self.tinfo.pcount_max_reps and not self.use_parallel_search:
+            self.adaptive_reps = AdaptiveRepetitions(self.tinfo.pcount_reps, self.tinfo.pcount_max_reps)
+            self.extra_compiler_opts += ' -DORIO_REPS=%s' % self.tinfo.pcount_max_reps
+        else:
+            self.extra_compiler_opts += ' -DORIO_REPS=%s' % self.tinfo.pcount_reps
+        # the energy is measured with the RAPL power method, or if it is a search objective
+        self.measure_energy = self.tinfo.power_method == self.__POWER_RAPL or \
+                              'energy' in (self.tinfo.search_objectives or [])
+        if self.measure_energy and (self.use_parallel_search or self.language != 'c'):
+            warn('orio.main.tuner.ptest_driver: the energy is only measured by the sequential C search')
+            self.measure_energy = False
+        if self.measure_energy:
+            self.extra_compiler_opts += ' -DORIO_ENERGY'
         # self.extra_compiler_opts += ' -DORIO_TIMES_ARRAY_SIZE=%s' % self.tinfo.timing_array_size
 
         # for efficiency
@@ -97,6 +118,56 @@ class PerfTestDriver:
         # For processing output
         self.resultre = re.compile(r'\w*({.*})')
 
+        # the number of test codes compiled concurrently by runMany (each in its own scratch directory)
+        self.num_workers = self.tinfo.num_workers
+
+        # the number of variants timed one after the other by each sequential test executable
+        self.variants_per_binary = self.tinfo.variants_per_binary
+        if self.use_parallel_search or self.language != 'c':
+            self.variants_per_binary = 1
+        elif self.variants_per_binary > 1 and (self.adaptive_reps is not None or Globals().validationMode):
+            warn('orio.main.tuner.ptest_driver: variants_per_binary is ignored with adaptive repetitions or validation')
+            self.variants_per_binary = 1
+        self.__counter_lock = threading.Lock()
+
+        # with shared_libraries, each variant is compiled into a shared library that a long-lived harness
+        # process (built once per input problem size) loads, times and unloads, so that the inputs are
+        # allocated and initialized once, and the variants are only compiled, not linked into executables
+        self.shared_libs = self.tinfo.shared_libs
+        if self.shared_libs and (self.use_parallel_search or self.language != 'c'):
+            warn('orio.main.tuner.ptest_driver: shared_libraries is only supported by the sequential C search')
+            self.shared_libs = False
+        elif self.shared_libs and (self.adaptive_reps is not None or Globals().validationMode or
+                                   self.tinfo.post_run_cmd or Globals().post_cmd is not None):
+            warn('orio.main.tuner.ptest_driver: shared_libraries is ignored with adaptive repetitions, validation ' +
+                 'or post-run commands')
+            self.shared_libs = False
+        self.__harness = None          # the running harness process
+        self.__harness_key = None      # a hash of the harness code and build command
+        self.__harness_timed_out = threading.Event()
+        if self.shared_libs:
+            atexit.register(self.__stopHarness)
+
+        # test executables built so far, reused by variants whose code and build command are identical
+        # (persistent if a cache directory is given, otherwise kept for this session only)
+        self.exe_cache = None
+        if not self.use_parallel_search:
+            if Globals().cache_dir:
+                exe_cache_dir = os.path.join(Globals().cache_dir, 'executables')
+            else:
+                exe_cache_dir = tempfile.mkdtemp(prefix='orio_exes_')
+                atexit.register(shutil.rmtree, exe_cache_dir, True)
+            self.exe_cache = ExeCache(exe_cache_dir, Globals().exe_cache_size * 1024 * 1024)
+        self.__compiler_versions = {}
+
+        # the coordinates whose test run exceeded the run timeout (their cost is set by the search)
+        self.timed_out = set()
+
+        # the energies of the timing repetitions of the last test of each coordinate (None if it could not
+        # be measured), and the size of its test executable
+        self.energy = {}
+        self.binary_size = {}
+
         pass
 
     # -----------------------------------------------------
@@ -177,39 +248,126 @@ class PerfTestDriver:
 
     # -----------------------------------------------------
 
+    def __setRunLimits(self):
+        '''Apply the memory and CPU time limits of the tuning spec (in the forked child, before exec)'''
+        import resource
+        if self.tinfo.memory_limit:
+            nbytes = int(self.tinfo.memory_limit * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+        if self.tinfo.cpu_limit:
+            nsecs = int(math.ceil(self.tinfo.cpu_limit))
+            resource.setrlimit(resource.RLIMIT_CPU, (nsecs, nsecs))
+
+    def __runCommand(self, cmd, timeout=None, limit_resources=False, line_handler=None):
+        '''Run a shell command, killing it (and all its children) if it is still running after timeout seconds
+        @param limit_resources: apply the memory and CPU time limits of the tuning spec
+        @param line_handler: called with each line of standard output as soon as it is printed, the command
+                             is stopped (without being considered failed) when it returns True
+        @return: a (exit status, standard output lines, standard error, timed out) tuple
+        '''
+        preexec_fn = None
+        if limit_resources and (self.tinfo.memory_limit or self.tinfo.cpu_limit):
+            preexec_fn = self.__setRunLimits
+        try:
+            proc = sp.Popen(cmd, shell=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True,
+                            errors='replace', start_new_session=True, preexec_fn=preexec_fn)
+        except Exception as e:
+            warn('orio.main.tuner.ptest_driver: failed to execute "%s"\n --> %s: %s' % (cmd, e.__class__.__name__, e))
+            return (-1, [], str(e), False)
+
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, kill)
+            timer.daemon = True
+            timer.start()
+
+        # drain standard error concurrently so that neither pipe can fill up and block the command
+        errout = []
+        err_reader = threading.Thread(target=lambda: errout.append(proc.stderr.read()))
+        err_reader.daemon = True
+        err_reader.start()
+
+        out = []
+        stopped = False
+        for line in proc.stdout:
+            out.append(line)
+            if line_handler is not None and line_handler(line):
+                stopped = True
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                break
+        status = proc.wait()
+        if stopped:
+            status = 0
+        err_reader.join()
+        if timer is not None:
+            timer.cancel()
+        proc.stdout.close()
+        proc.stderr.close()
+
+        if timed_out.is_set():
+            warn('orio.main.tuner.ptest_driver: command timed out after %s seconds: "%s"' % (timeout, cmd))
+            status = status or -1
+        return (status, out, ''.join(errout), timed_out.is_set())
+
+    def __system(self, cmd, timeout=None):
+        '''Run a (build) command like os.system, return its exit status (nonzero on failure or timeout)'''
+        status, out, errout, _ = self.__runCommand(cmd, timeout=timeout)
+        output = (''.join(out) + errout).strip()
+        if output:
+            if status:
+                info(output)
+            else:
+                debug(output, level=3)
+        return status
+
+    # -----------------------------------------------------
+
     def __preprocess(self):
         ''' 
         Apply PBound to generated code. 
         Some of the build options (include paths, etc.) are used. 
         '''
-        if self.tinfo.pre_build_cmd:
-            # apply the pre-build command if defined
+        self.src_name2 = self.__preprocessSource(self.src_name, self.src_name2)
+        return
 
-            cmd = ('%s %s -o %s %s' % (self.tinfo.pre_build_cmd, self.extra_compiler_opts,
-                                       self.src_name2, self.src_name))
-            # TODO: log all commands
-            status = os.system(cmd)
-            if status:
-                err('orio.main.tuner.ptest_driver:  failed to apply the pre-build command: "%s"' % cmd)
+    def __preprocessSource(self, src_name, src_name2):
+        '''Apply the pre-build command (if any) to src_name and return the name of the file to compile'''
+        if not self.tinfo.pre_build_cmd:
+            return src_name
 
-        else:
-            self.src_name2 = self.src_name
-        return
+        # apply the pre-build command if defined
+        cmd = ('%s %s -o %s %s' % (self.tinfo.pre_build_cmd, self.extra_compiler_opts,
+                                   src_name2, src_name))
+        # TODO: log all commands
+        status = self.__system(cmd, timeout=self.tinfo.build_timeout)
+        if status:
+            err('orio.main.tuner.ptest_driver:  failed to apply the pre-build command: "%s"' % cmd)
+        return src_name2
 
     # -----------------------------------------------------
 
-    def __build(self, perf_params=None, coord=None):
-        '''Compile the testing code'''
-
-        # compile the timing code (if needed)
+    def __getTimerObjFile(self):
+        '''Return the name of the timer object file linked into every test executable'''
+        if self.use_parallel_search:
+            return ''
         if self.timer_file:
-            timer_objfile = self.timer_file[:self.timer_file.rfind('.')] + '.o'
-        else:
-            timer_objfile = None
+            return self.timer_file[:self.timer_file.rfind('.')] + '.o'
+        return None
 
-        if self.use_parallel_search: timer_objfile = ''
-
-        # build_cmd
+    def expandBuildCmd(self, perf_params):
+        '''Substitute the @CFLAGS and @<param>@ tags in the build command with performance parameter values'''
         cflags_tag = '@CFLAGS'
         build_cmd = self.tinfo.build_cmd
         if perf_params is not None:
@@ -218,18 +376,56 @@ class PerfTestDriver:
                 build_cmd = re.sub(cflags_tag, perf_params.get('CFLAGS', ''), build_cmd)
             while True:
                 match_obj = None
-                match_obj = re.search('@(?P<alphanum>\w*)@', build_cmd)
+                match_obj = re.search(r'@(?P<alphanum>\w*)@', build_cmd)
                 if match_obj is None:
                     break
                 else:
                     param_val = match_obj.group('alphanum')
                     build_cmd = re.sub(match_obj.group(), str(perf_params.get(param_val, '')), build_cmd)
+        return build_cmd
+
+    # -----------------------------------------------------
+
+    def compilerVersion(self, build_cmd):
+        '''Return the version banner of the compiler invoked by build_cmd (cached per compiler)'''
+        compiler = build_cmd.split()[0] if build_cmd.split() else ''
+        with self.__counter_lock:
+            if compiler not in self.__compiler_versions:
+                try:
+                    p = sp.Popen('%s --version' % compiler, shell=True, stdout=sp.PIPE, stderr=sp.STDOUT)
+                    version = p.communicate()[0].decode('utf-8', 'replace')
+                except Exception:
+                    version = ''
+                self.__compiler_versions[compiler] = version
+            return self.__compiler_versions[compiler]
+
+    def __exeCacheKey(self, test_code, build_cmd, timer_objfile, coord):
+        '''Return the executable cache key of a test code, or None if it cannot be cached'''
+        if self.exe_cache is None or coord is None:
+            return None
+        # the coordinate is only used to label the printed timings, which __execute
+        # attributes to the requested coordinate anyway
+        return self.exe_cache.key([test_code.replace(coord, ''), self.language, build_cmd,
+                                   self.extra_compiler_opts, str(self.tinfo.pre_build_cmd),
+                                   str(self.tinfo.post_build_cmd), self.tinfo.libs, str(timer_objfile),
+                                   self.timer_code, self.compilerVersion(build_cmd)])
+
+    # -----------------------------------------------------
+
+    def __build(self, perf_params=None, coord=None, test_code=None):
+        '''Compile the testing code'''
+
+        # compile the timing code (if needed)
+        timer_objfile = self.__getTimerObjFile()
+
+        # build_cmd
+        build_cmd = self.expandBuildCmd(perf_params)
 
         if timer_objfile and not os.path.exists(timer_objfile):
             # TODO: Too crude, need to make sure object is newer than source
             cmd = ('%s -O0 -c -o %s %s' % (build_cmd, timer_objfile, self.timer_file))
             info(' compiling timer:\n\t' + cmd)
-            status = os.system(cmd)
+            status = self.__system(cmd, timeout=self.tinfo.build_timeout)
             if status or not os.path.exists(timer_objfile):
                 err('orio.main.tuner.ptest_driver:  failed to compile the timer code: "%s"' % cmd)
 
@@ -239,7 +435,7 @@ class PerfTestDriver:
                 cmd = ('%s %s -DORIGINAL -o %s -c %s' % (
                 build_cmd, self.extra_compiler_opts, self.original_obj_name, self.src_name2))
                 info(' compiling the original code:\n\t' + cmd)
-                status = os.system(cmd)
+                status = self.__system(cmd, timeout=self.tinfo.build_timeout)
                 if status:
                     err('orio.main.tuner.ptest_driver: failed to compile the original version of cuda code: "%s"' % cmd)
                 cmd = ('%s %s -DORIGINAL -o %s %s' % (
@@ -255,31 +451,55 @@ class PerfTestDriver:
                                                              self.tinfo.libs))
 
             info(' building the original code:\n\t' + cmd)
-            status = os.system(cmd)
+            status = self.__system(cmd, timeout=self.tinfo.build_timeout)
             if status:
                 err('orio.main.tuner.ptest_driver:  failed to compile the original version of the code: "%s"' % cmd)
 
         # compile the test code
+        return self.__buildTestCode(build_cmd, self.src_name, self.src_name2, self.obj_name, self.exe_name,
+                                    timer_objfile, coord=coord, test_code=test_code)
+
+    def __buildTestCode(self, build_cmd, src_name, src_name2, obj_name, exe_name, timer_objfile, coord=None,
+                        test_code=None, shared_lib=False):
+        '''Compile and link a single test code into exe_name, return the build status (0 on success)
+        @param shared_lib: build a shared library to be timed by the harness (see runShlibs) instead of an executable
+        '''
+        exe_key = None
+        if test_code is not None:
+            exe_key = self.__exeCacheKey(test_code, build_cmd + (' -shared' if shared_lib else ''),
+                                         timer_objfile, coord)
+        if exe_key is not None:
+            start = time.time()
+            if self.exe_cache.fetch(exe_key, exe_name):
+                info(' reusing cached test executable %s' % exe_key)
+                self.compile_time[coord] = time.time() - start
+                self.binary_size[coord] = os.path.getsize(exe_name)
+                return 0
+
         if self.language == 'cuda':
-            cmd = ('%s %s -o %s -c %s' % (build_cmd, self.extra_compiler_opts, self.obj_name, self.src_name))
+            cmd = ('%s %s -o %s -c %s' % (build_cmd, self.extra_compiler_opts, obj_name, src_name))
             info(' compiling test:\n\t' + cmd)
-            status = os.system(cmd)
+            status = self.__system(cmd, timeout=self.tinfo.build_timeout)
             if status:
                 err('orio.main.tuner.ptest_driver: failed to compile the test cuda code: "%s"' % cmd)
-            cmd = ('%s %s -o %s %s' % (build_cmd, self.extra_compiler_opts, self.exe_name, self.obj_name))
+            cmd = ('%s %s -o %s %s' % (build_cmd, self.extra_compiler_opts, exe_name, obj_name))
         elif self.language == 'opencl':
             cmd = ('%s %s -o %s %s %s' % (build_cmd, self.extra_compiler_opts,
-                                          self.exe_name, self.src_name2,
+                                          exe_name, src_name2,
                                           self.tinfo.libs))
+        elif shared_lib:
+            # the timer and the input variables are resolved to those of the harness when the library is loaded
+            cmd = ('%s %s -fPIC -shared -Dmain=orio_variant -DORIO_SHLIB_VARIANT -o %s %s %s' %
+                   (build_cmd, self.extra_compiler_opts, exe_name, src_name2, self.tinfo.libs))
         else:
             cmd = ('%s %s -o %s %s %s %s' % (build_cmd, self.extra_compiler_opts,
-                                             self.exe_name, self.src_name2,
+                                             exe_name, src_name2,
                                              timer_objfile, self.tinfo.libs))
         info(' building test:\n\t' + cmd)
 
         start = time.time()
         # TODO: log all commands
-        status = os.system(cmd)
+        status = self.__system(cmd, timeout=self.tinfo.build_timeout)
         elapsed = time.time() - start
         if coord is not None:
             self.compile_time[coord] = elapsed
@@ -289,15 +509,47 @@ class PerfTestDriver:
 
         if self.tinfo.post_build_cmd:
             # Run the postbuild command
-            cmd = ('%s %s' % (self.tinfo.post_build_cmd, self.exe_name))
+            cmd = ('%s %s' % (self.tinfo.post_build_cmd, exe_name))
             # TODO: log all commands
-            status = os.system(cmd)
+            status = self.__system(cmd, timeout=self.tinfo.build_timeout)
             if status:
                 err('orio.main.tuner.ptest_driver:  failed to apply the post-build command: "%s"' % cmd)
+
+        if coord is not None and not status and os.path.exists(exe_name):
+            self.binary_size[coord] = os.path.getsize(exe_name)
+        if exe_key is not None and not status:
+            self.exe_cache.store(exe_key, exe_name)
         return status
 
     # -----------------------------------------------------
 
+    def __parseTimingLine(self, line, coord, perf_costs):
+        '''Add the timing printed on a line of test output to perf_costs
+        @return: True if the test does not need to run more repetitions
+        '''
+        result = parseResultLine(line)
+        if result is None:
+            return False
+        key, cost, transfer, energy, energy_reps = result
+        if coord is not None:  # a reused executable prints the coordinate it was built for
+            key = coord
+        if key not in perf_costs:
+            perf_costs[key] = ([], [])
+            self.energy[key] = []
+        perf_costs_reps, transfers = perf_costs[key]
+        perf_costs_reps.append(cost)
+        transfers.append(transfer)
+        if self.measure_energy:
+            # the energy of a window of repetitions ending with this one is divided among them
+            energies = self.energy[key]
+            energies.append(None)
+            if energy is not None:
+                count = min(energy_reps, len(energies))
+                energies[-count:] = [energy / energy_reps] * count
+        if self.adaptive_reps is not None and coord is not None and not math.isinf(cost):
+            return not self.adaptive_reps.keepSampling(perf_costs_reps)
+        return False
+
     def __execute(self, perf_params, coord):
         '''Execute the test to get the performance costs. 
         @param perf_params: a dictionary of current parameter name-value pairs
@@ -329,18 +581,16 @@ class PerfTestDriver:
             info(' running test:\n\t' + cmd)
             # TODO: redo this to take output file name
             try:
-                f = os.popen(cmd)
-                output = f.read()
-                f.close()
+                _, out, _, _ = self.__runCommand(cmd)
+                output = ''.join(out)
                 # TODO: very bad assumption that the last number out is the batch job name
                 jobid = output.strip().split('\n')[-1]
                 status_cmd = '%s %s | grep %s | wc -l' % (self.tinfo.status_cmd, jobid, jobid)
                 status = '1'
                 while status == '1':
                     time.sleep(3)
-                    f = os.popen(status_cmd)
-                    status = f.read().strip()
-                    f.close()
+                    _, out, _, _ = self.__runCommand(status_cmd)
+                    status = ''.join(out).strip()
                 # TODO: generate an output file, instead of reading the batch-generated file
                 outfile = '%s.output' % jobid
                 while not os.path.exists(outfile):
@@ -348,7 +598,7 @@ class PerfTestDriver:
                 f = open(outfile)
                 output = f.read()
                 f.close()
-                if output: perf_costs = eval(output)
+                if output: perf_costs = ast.literal_eval(output.strip())
             except Exception as e:
                 err('orio.main.tuner.ptest_driver: failed to execute the test code: "%s"\n --> %s: %s' % (
                 cmd, e.__class__.__name__, e))
@@ -357,23 +607,38 @@ class PerfTestDriver:
         else:
             cmd = '%s ./%s %s' % (Globals().pre_cmd, self.exe_name, cmdlineargs)
             info(' running test:\n\t' + cmd)
-            try:
-                # process = sp.Popen(cmd, 'w', shell=True, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-                # retCode = process.stdin.close()
-                # out = process.stdout.readlines()
-                f = os.popen(cmd)
-                out = f.readlines()
-                f.close()
-            except Exception as e:
-                self.failedruns += 1
-                err('orio.main.tuner.ptest_driver: failed to execute the test code: "%s"\n --> %s: %s' \
-                    % (cmd, e.__class__.__name__, e), doexit=False)
+
+            # Parse the output to get the times (and in some cases, e.g., for GPU code, the data transfer times)
+            # as it is printed, one line per repetition (of each variant timed by the executable)
+            parse_errors = []
+
+            def parseLine(line):
+                if parse_errors:
+                    return
+                try:
+                    return self.__parseTimingLine(line, coord, perf_costs)
+                except Exception as e:
+                    parse_errors.append(e)
+
+            status, out, errout, timed_out = self.__runCommand(cmd, timeout=self.tinfo.run_timeout,
+                                                               limit_resources=True, line_handler=parseLine)
+            if errout.strip():
+                debug(errout.strip(), level=3)
+
+            if timed_out:
+                # the timings of the repetitions completed before the timeout are not representative
+                self.failedRuns += 1
+                perf_costs = {}
+                if coord is not None:
+                    self.timed_out.add(coord)
+                    perf_costs[coord] = ([float('inf')], [float('inf')])
+                return perf_costs
 
             if self.tinfo.post_run_cmd:
                 # Run the post-run command from the build section of the tuning spec (not command-line option)
                 cmd = ('%s %s "%s"' % (self.tinfo.post_run_cmd, self.exe_name, coord))
                 info(' running postrun_command:\n\t' + cmd)
-                status = os.system(cmd)
+                status = self.__system(cmd)
                 if status:
                     err('orio.main.tuner.ptest_driver:  failed to run the postrun_command: "%s"' % cmd)
 
@@ -384,7 +649,7 @@ class PerfTestDriver:
                     cmd = cmd.replace("%unique", uniq)
                     cmd = cmd.replace("%iter", str(last_counter))
                     cmd = cmd.replace("%exe", self.exe_name)
-                    status = os.system(cmd)
+                    status = self.__system(cmd)
                     if status:
                         err(
                             'orio.main.tuner.ptest_driver: failed to execute the post-command: "%s"' % Globals().post_cmd,
@@ -393,43 +658,16 @@ class PerfTestDriver:
                     err('orio.main.tuner.ptest_driver: failed to execute the post-command: "%s"\n --> %s: %s' \
                         % (Globals().post_cmd, e.__class__.__name__, e), doexit=False)
 
-            # Parse the output to get the times (and in some cases, e.g., for GPU code, the data transfer times)
-            try:
-                if out:
-                    # info('out:\n %s' % out)
-                    perf_costs = {}
-                    perf_costs_reps = []
-                    transfers = []
-                    for line in out:
-                        # info('the line:\n%s' % line)
-                        # Output lines have the form {'[coordinate]' : time} or {'[coordinate]' : (time, transfer_time)}
-                        # where [coordinate] is a list of indices, e.g., [2,4,1,0,0]
-                        if line.strip().startswith('{'):
-                            output = line.strip()
-                            rep = eval(str(output))
-                            key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
-                            if isinstance(rep[key], tuple):  # cases where we have (time, transfer_time) values
-                                perf_costs_reps.append(rep[key][0])
-                                transfers.append(rep[key][1])
-                            else:  # cases where we have just time values
-                                perf_costs_reps.append(rep[key])
-                                transfers.append(float('inf'))
-                            perf_costs[key] = (perf_costs_reps, transfers)
-                        else:
-                            # warn(errmsg="Error processing test result: %s" % line)
-                            parts = line.strip().split('@')
-                            rep = eval(str(parts[1]))
-                            key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
-                            perf_costs_reps.append(float('inf'))  # time
-                            transfers.append(float('inf'))  # transfer time
-                            perf_costs[key] = (perf_costs_reps, transfers)
-                # if output: perf_costs = eval(str(output))
-                self.successfulRuns += 1
-            except Exception as e:
+            if parse_errors:
+                e = parse_errors[0]
                 self.failedRuns += 1
                 err(
                     'orio.main.tuner.ptest_driver: failed to process test result, command was "%s", output: "%s\n --> %s: %s' %
                     (cmd + cmdlineargs, perf_costs, e.__class__.__name__, str(e)), doexit=False)
+            else:
+                self.successfulRuns += 1
+                if self.adaptive_reps is not None and coord in perf_costs:
+                    self.adaptive_reps.update(perf_costs[coord][0])
 
         # exit()
         # check if the performance cost is already acquired
@@ -443,7 +681,7 @@ class PerfTestDriver:
         if Globals().validationMode and Globals().executedOriginal:
             cmd = 'diff ./newexec.out ./origexec.out'
             info(' running diff:\n\t' + cmd)
-            status = os.system(cmd)
+            status = self.__system(cmd)
             if status:
                 infpair = (float('inf'), float('inf'))
                 for k in list(perf_costs.keys()): perf_costs[k] = infpair
@@ -494,7 +732,7 @@ class PerfTestDriver:
         self.__preprocess()
 
         # compile the testing code
-        if self.__build(perf_params=perf_params, coord=coord):
+        if self.__build(perf_params=perf_params, coord=coord, test_code=test_code):
             return {}
 
         # execute the testing code to get performance costs
@@ -505,3 +743,240 @@ class PerfTestDriver:
 
         # return the performance costs
         return perf_costs
+
+    # -----------------------------------------------------
+
+    def __buildInScratchDir(self, test_code, perf_params, coord, shared_lib=False):
+        '''Write and compile a single test code in a fresh scratch directory (safe to call concurrently)
+        @return: a (scratch directory, executable name, build status) tuple
+        '''
+        global perftest_counter
+        with self.__counter_lock:
+            suffix = str(perftest_counter)
+            perftest_counter += 1
+
+        scratch_dir = self.__PTEST_FNAME + '_build' + suffix
+        base_name = os.path.join(scratch_dir, os.path.basename(self.__PTEST_FNAME))
+        src_name = base_name + self.ext
+        src_name2 = base_name + '_preprocessed' + self.ext
+        obj_name = base_name + '.o'
+        exe_name = base_name + ('.so' if shared_lib else '.exe')
+
+        paraminfo = '/*\n'
+        if perf_params is not None:
+            for pname, pval in list(perf_params.items()):
+                paraminfo += '%s:%s\n' % (pname, pval)
+        paraminfo += '*/'
+
+        try:
+            os.makedirs(scratch_dir, exist_ok=True)
+            f = open(src_name, 'w')
+            f.write(paraminfo)
+            f.write(test_code)
+            f.close()
+        except:
+            err('orio.main.tuner.ptest_driver: cannot open file for writing: %s' % src_name)
+
+        src_name2 = self.__preprocessSource(src_name, src_name2)
+        status = self.__buildTestCode(self.expandBuildCmd(perf_params), src_name, src_name2, obj_name, exe_name,
+                                      self.__getTimerObjFile(), coord=coord, test_code=test_code,
+                                      shared_lib=shared_lib)
+        return (scratch_dir, exe_name, status)
+
+    def __removeScratchDir(self, scratch_dir):
+        '''Delete a scratch directory created by __buildInScratchDir'''
+        if Globals().keep_temps:
+            return
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    # -----------------------------------------------------
+
+    def runMany(self, test_codes):
+        '''To compile several testing codes concurrently and to execute them one at a time
+        @param test_codes: a list of (test_code, perf_params, coord) tuples, one per search space coordinate
+        @return: a dictionary of the times corresponding to each coordinate in the search space
+        '''
+        perf_costs = {}
+        test_codes = list(test_codes)
+
+        # the first test also builds the timer and the original code, so it is always run on its own
+        if self.first and test_codes:
+            test_code, perf_params, coord = test_codes.pop(0)
+            perf_costs.update(self.run(test_code, perf_params=perf_params, coord=coord))
+        if not test_codes:
+            return perf_costs
+
+        # compile all variants in a pool of num_workers threads (the compiler processes do the real work)
+        num_workers = max(1, min(self.num_workers, len(test_codes)))
+        info(' building %d tests with %d workers' % (len(test_codes), num_workers))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as pool:
+            builds = list(pool.map(lambda tc: self.__buildInScratchDir(*tc), test_codes))
+
+        # execute the tests serially, after all builds are done, so that the timings are not
+        # polluted by concurrent compilations or by each other
+        for (test_code, perf_params, coord), (scratch_dir, exe_name, status) in zip(test_codes, builds):
+            if not status:
+                self.exe_name = exe_name
+                perf_costs.update(self.__execute(perf_params, coord=coord))
+            self.__removeScratchDir(scratch_dir)
+
+        return perf_costs
+
+    # -----------------------------------------------------
+
+    def __startHarness(self, harness_code):
+        '''Build and start the shared-library test harness of the given code, unless it is already running
+        @return: True if the harness is running
+        '''
+        build_cmd = self.expandBuildCmd({})   # the tuned build flags only apply to the variants
+        key = self.exe_cache.key([harness_code, build_cmd, self.extra_compiler_opts, self.tinfo.libs])
+        if self.__harness is not None and self.__harness.poll() is None and self.__harness_key == key:
+            return True
+        self.__stopHarness()
+
+        src_name = self.__PTEST_FNAME + '_harness' + self.ext
+        main_src_name = self.__PTEST_FNAME + '_harness_main' + self.ext
+        exe_name = self.__PTEST_FNAME + '_harness.exe'
+        try:
+            f = open(src_name, 'w')
+            f.write(harness_code)
+            f.close()
+            f = open(main_src_name, 'w')
+            f.write(SEQ_SHLIB_HARNESS)
+            f.close()
+        except:
+            err('orio.main.tuner.ptest_driver: cannot open file for writing: %s' % src_name)
+
+        # export the symbols of the harness (the timer, the input variables) to the loaded variants
+        cmd = ('%s %s -DORIO_SHLIB_HARNESS -rdynamic -o %s %s %s %s %s -ldl' %
+               (build_cmd, self.extra_compiler_opts, exe_name, src_name, main_src_name,
+                self.__getTimerObjFile(), self.tinfo.libs))
+        info(' building test harness:\n\t' + cmd)
+        status = self.__system(cmd, timeout=self.tinfo.build_timeout)
+        if status:
+            warn('orio.main.tuner.ptest_driver:  failed to compile the test harness: "%s"' % cmd)
+            return False
+
+        cmd = '%s ./%s' % (Globals().pre_cmd, exe_name)
+        info(' starting test harness:\n\t' + cmd)
+        preexec_fn = None
+        if self.tinfo.memory_limit or self.tinfo.cpu_limit:
+            preexec_fn = self.__setRunLimits
+        try:
+            self.__harness = sp.Popen(cmd, shell=True, stdin=sp.PIPE, stdout=sp.PIPE, universal_newlines=True,
+                                      errors='replace', bufsize=1, start_new_session=True, preexec_fn=preexec_fn)
+        except Exception as e:
+            warn('orio.main.tuner.ptest_driver: failed to execute "%s"\n --> %s: %s' % (cmd, e.__class__.__name__, e))
+            self.__harness = None
+            return False
+        self.__harness_key = key
+
+        if not Globals().keep_temps:
+            for fname in [src_name, main_src_name]:
+                if os.path.exists(fname):
+                    os.unlink(fname)
+        return True
+
+    def __stopHarness(self):
+        '''Kill the running test harness (if any)'''
+        if self.__harness is None:
+            return
+        try:
+            os.killpg(self.__harness.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.__harness.wait()
+        self.__harness.stdin.close()
+        self.__harness.stdout.close()
+        self.__harness = None
+        self.__harness_key = None
+        exe_name = self.__PTEST_FNAME + '_harness.exe'
+        if not Globals().keep_temps and os.path.exists(exe_name):
+            os.unlink(exe_name)
+
+    def __executeShlib(self, lib_name, coord):
+        '''Time the variant compiled into the given shared library in the running harness'''
+        info(' running test in harness:\n\t' + lib_name)
+        harness = self.__harness
+        self.__harness_timed_out.clear()
+
+        def kill():
+            self.__harness_timed_out.set()
+            try:
+                os.killpg(harness.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+        timer = None
+        if self.tinfo.run_timeout:
+            timer = threading.Timer(self.tinfo.run_timeout, kill)
+            timer.daemon = True
+            timer.start()
+
+        perf_costs = {}
+        parse_error = None
+        done = False
+        try:
+            harness.stdin.write(os.path.abspath(lib_name) + '\n')
+            harness.stdin.flush()
+            for line in harness.stdout:
+                if line.strip() == '@@done':
+                    done = True
+                    break
+                try:
+                    self.__parseTimingLine(line, coord, perf_costs)
+                except Exception as e:
+                    parse_error = parse_error or e
+        except (OSError, ValueError):
+            pass   # the harness has died
+        if timer is not None:
+            timer.cancel()
+
+        if not done:
+            # the variant crashed the harness or was killed by the timeout, the harness is restarted for the next one
+            self.__stopHarness()
+            self.failedRuns += 1
+            if self.__harness_timed_out.is_set():
+                warn('orio.main.tuner.ptest_driver: test %s timed out after %s seconds' % (coord, self.tinfo.run_timeout))
+                self.timed_out.add(coord)
+            else:
+                err('orio.main.tuner.ptest_driver:  performance testing failed: "%s"' % lib_name, doexit=False)
+            return {coord: ([float('inf')], [float('inf')])}
+        if parse_error is not None or coord not in perf_costs:
+            self.failedRuns += 1
+            err('orio.main.tuner.ptest_driver: failed to process test result of "%s", output: "%s"\n --> %s' %
+                (lib_name, perf_costs, parse_error), doexit=False)
+            return {coord: ([float('inf')], [float('inf')])}
+        self.successfulRuns += 1
+        return perf_costs
+
+    def runShlibs(self, harness_code, test_codes):
+        '''To compile several testing codes into shared libraries and to time them in a single harness process
+        @param harness_code: the testing code (without variants) that initializes the input variables
+        @param test_codes: a list of (test_code, perf_params, coord) tuples, one per search space coordinate
+        @return: a dictionary of the times corresponding to each coordinate in the search space
+        '''
+        perf_costs = {}
+        test_codes = list(test_codes)
+
+        # the first test also builds the timer and the original code, so it is always run on its own
+        if self.first and test_codes:
+            test_code, perf_params, coord = test_codes.pop(0)
+            perf_costs.update(self.run(test_code, perf_params=perf_params, coord=coord))
+        if not test_codes:
+            return perf_costs
+
+        num_workers = max(1, min(self.num_workers, len(test_codes)))
+        info(' building %d shared-library tests with %d workers' % (len(test_codes), num_workers))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as pool:
+            builds = list(pool.map(lambda tc: self.__buildInScratchDir(*tc, shared_lib=True), test_codes))
+
+        for (test_code, perf_params, coord), (scratch_dir, lib_name, status) in zip(test_codes, builds):
+            if not status:
+                if self.__startHarness(harness_code):
+                    perf_costs.update(self.__executeShlib(lib_name, coord))
+                else:
+                    perf_costs[coord] = ([float('inf')], [float('inf')])
+            self.__removeScratchDir(scratch_dir)
+
+        return perf_costs
@@ -0,0 +1,109 @@
+#
+# A persistent cache of measured performance costs, shared across tuning sessions
+#
+
+import os, json, time, hashlib, platform, socket, sqlite3
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+def codeFragsSource(cfrags):
+    '''Return the complete (annotated) source text of the given code fragments'''
+    import orio.main.code_frag
+
+    code = ''
+    for cf in cfrags:
+        if isinstance(cf, orio.main.code_frag.AnnCodeRegion):
+            code += cf.leader_ann.code
+            code += codeFragsSource(cf.cfrags)
+            code += cf.trailer_ann.code
+        else:
+            code += cf.code
+    return code
+
+def hostFingerprint():
+    '''Return a string identifying the machine the tests are measured on'''
+
+    cpu = platform.processor()
+    try:
+        f = open('/proc/cpuinfo')
+        for line in f:
+            if line.startswith('model name'):
+                cpu = line.split(':', 1)[1].strip()
+                break
+        f.close()
+    except:
+        pass
+    return '%s|%s|%s|%s' % (socket.gethostname(), platform.system(), platform.machine(), cpu)
+
+#-----------------------------------------------------
+
+class ResultCache:
+    '''
+    An on-disk (SQLite) table of performance costs, indexed by a hash of everything that determines
+    a measurement: the annotated source of the tuned code, the performance parameter values, the
+    build command, the version of the compiler, the input problem size and the host. Coordinates
+    found in the cache are not transformed, compiled or run again.
+    '''
+
+    # the name of the database file inside the cache directory
+    __DB_NAME = 'results.sqlite'
+
+    #-----------------------------------------------------
+
+    def __init__(self, cache_dir, context):
+        '''
+        @param cache_dir: the directory holding the cache database (created if needed)
+        @param context: a list of strings describing what is common to all lookups of this tuning run
+        '''
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            self.db_name = os.path.join(cache_dir, self.__DB_NAME)
+            self.conn = sqlite3.connect(self.db_name)
+            self.conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, coord TEXT, ' +
+                              'perf_params TEXT, perf_cost TEXT, timestamp REAL)')
+            self.conn.commit()
+        except Exception as e:
+            err('orio.main.tuner.result_cache: cannot open the result cache in "%s"\n --> %s: %s' %
+                (cache_dir, e.__class__.__name__, e))
+
+        self.context = hashlib.sha1('\n'.join(context).encode('utf-8')).hexdigest()
+        self.hits = 0
+
+    #-----------------------------------------------------
+
+    def key(self, perf_params):
+        '''Return the cache key of the given performance parameters'''
+        pparams = sorted([(k, repr(v)) for k, v in perf_params.items() if k != '__builtins__'])
+        return hashlib.sha1((self.context + repr(pparams)).encode('utf-8')).hexdigest()
+
+    def lookup(self, perf_params, with_metrics=False):
+        '''
+        Return the cached (times, transfer times) pair of the given parameters, or None; with_metrics,
+        return a (pair, metrics) tuple, where the metrics are None if none were recorded with the pair
+        '''
+        row = self.conn.execute('SELECT perf_cost FROM results WHERE key=?', (self.key(perf_params),)).fetchone()
+        if row is None:
+            return (None, None) if with_metrics else None
+        self.hits += 1
+        record = json.loads(row[0])
+        perf_cost = (record[0], record[1])
+        if with_metrics:
+            return perf_cost, (record[2] if len(record) > 2 else None)
+        return perf_cost
+
+    def store(self, perf_params, coord, perf_cost, metrics=None):
+        '''
+        Record the (times, transfer times) pair measured for the given parameters, and the metrics of
+        the coordinate (a dictionary indexed by objective name) of a multi-objective search
+        '''
+        times, transfers = perf_cost
+        record = [list(times), list(transfers)]
+        if metrics is not None:
+            record.append(metrics)
+        pparams = dict([(k, v) for k, v in perf_params.items() if k != '__builtins__'])
+        self.conn.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?)',
+                          (self.key(perf_params), str(coord), json.dumps(pparams, default=str),
+                           json.dumps(record), time.time()))
+        self.conn.commit()
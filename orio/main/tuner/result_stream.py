@@ -0,0 +1,116 @@
+#
+# The line-delimited JSON protocol of the test results, and the per-session results file
+#
+
+import ast, json, math, re, threading, time
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+# C's printf("%g") spells the non-finite numbers differently than JSON
+_NONFINITE_RE = re.compile(r'(?<![\w"])(-?)(inf|nan)(?![\w"])', re.IGNORECASE)
+
+def _jsonNumber(m):
+    return m.group(1) + ('Infinity' if m.group(2).lower() == 'inf' else 'NaN')
+
+def parseResultLine(line):
+    '''
+    Parse a line of test output, return a (coordinate, time, transfer time, energy, energy repetitions)
+    tuple, or None if the line is not a timing result. Test codes print one JSON object per timing
+    repetition:
+       {"coord": "[2, 4, 1]", "time": 1.2e-03}
+       {"coord": "[2, 4, 1]", "time": 1.2e-03, "transfer": 3.1e-04}
+       {"coord": "[2, 4, 1]", "time": 1.2e-03, "energy": 5.6e-02, "energy_reps": 4}
+    The energy is measured over a window of repetitions ending with this one (energy_reps of them, 1 by
+    default); it is None if it was not measured, if the window is still open (energy_reps is 0), or if
+    the RAPL counters could not be read or did not change during the window. The Python dictionaries
+    printed by the Fortran and user-supplied skeletons, {'[2, 4, 1]' : 1.2e-03} or
+    {'[2, 4, 1]' : (1.2e-03, 3.1e-04)}, and failure lines ending with @{'[2, 4, 1]' : ...} are also
+    accepted. A malformed result raises ValueError.
+    '''
+    line = line.strip()
+    if line.startswith('{"'):
+        try:
+            rep = json.loads(line)
+        except ValueError:
+            rep = json.loads(_NONFINITE_RE.sub(_jsonNumber, line))
+        energy = rep.get('energy')
+        energy_reps = int(rep.get('energy_reps', 1))
+        if energy is not None and (not energy > 0 or math.isinf(energy) or energy_reps <= 0):
+            energy = None
+        return (rep['coord'], float(rep['time']), float(rep.get('transfer', float('inf'))),
+                None if energy is None else float(energy), energy_reps)
+    if line.startswith('{'):
+        rep = ast.literal_eval(line)
+        coord, cost = list(rep.items())[0]
+        if isinstance(cost, tuple):  # (time, transfer_time)
+            return (coord, float(cost[0]), float(cost[1]), None, 1)
+        return (coord, float(cost), float('inf'), None, 1)
+    if '@' in line:
+        rep = ast.literal_eval(line.split('@')[1])
+        return (list(rep.keys())[0], float('inf'), float('inf'), None, 1)
+    return None
+
+def coordFromKey(coord_key):
+    '''Return the coordinate (a list of indices) of its string key, e.g., "[2, 4, 1]"'''
+    return json.loads(coord_key)
+
+#-----------------------------------------------------
+
+def _finite(values):
+    '''Replace the infinite (failed or unmeasured) values by None, which is valid JSON'''
+    return [v if not (math.isinf(v) or math.isnan(v)) else None for v in values]
+
+class ResultsFile:
+    '''
+    A file recording every coordinate measured (or found in the result cache) during a tuning
+    session, one JSON object per line with the keys: coord, params, input_params, times, transfers
+    (null if not measured), compile_time, transform_time, status ("ok", "failed", "timeout" or
+    "cached") and timestamp, and, if they are known, energies (of the timing repetitions, in joules)
+    and binary_size (of the test executable, in bytes).
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.__file = None
+        self.__lock = threading.Lock()
+
+    def record(self, coord, perf_params, input_params, times, transfers, compile_time=0.0,
+               transform_time=0.0, status='ok', energies=None, binary_size=None):
+        '''Append the result of a coordinate to the file'''
+        rec = {'coord': coord,
+               'params': dict([(k, v) for k, v in perf_params.items() if k != '__builtins__']),
+               'input_params': dict(input_params or []),
+               'times': _finite(times),
+               'transfers': _finite(transfers),
+               'compile_time': compile_time,
+               'transform_time': transform_time,
+               'status': status,
+               'timestamp': time.time()}
+        if energies:
+            rec['energies'] = [e if e is None else _finite([e])[0] for e in energies]
+        if binary_size is not None:
+            rec['binary_size'] = binary_size
+        line = json.dumps(rec, default=str) + '\n'
+        with self.__lock:
+            try:
+                if self.__file is None:
+                    self.__file = open(self.filename, 'a')
+                self.__file.write(line)
+                self.__file.flush()
+            except Exception as e:
+                warn('orio.main.tuner.result_stream: cannot write to the results file "%s"\n --> %s: %s' %
+                     (self.filename, e.__class__.__name__, e))
+
+#-----------------------------------------------------
+
+_results_files = {}
+
+def sessionResultsFile():
+    '''Return the results file of this tuning session, or None if there is none'''
+    filename = Globals().results_file
+    if not filename:
+        return None
+    if filename not in _results_files:
+        _results_files[filename] = ResultsFile(filename)
+    return _results_files[filename]
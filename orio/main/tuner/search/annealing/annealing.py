@@ -22,6 +22,9 @@ class Annealing(orio.main.tuner.search.search.Search):
       final_temperature_ratio   the percentage of the temperature used as the final temperature
       trials_limit              the maximum limit of numbers of trials at each temperature
       moves_limit               the maximum limit of numbers of successful moves at each temperature
+      first_improvement         whether the local search moves to the first better neighbors found
+                                (examined in a random order, batch by batch) instead of the best
+                                neighbor (default: False)
     '''
 
     # algorithm-specific argument names
@@ -30,6 +33,7 @@ class Annealing(orio.main.tuner.search.search.Search):
     __FTEMP_RATIO = 'final_temperature_ratio'   # default: 0.05
     __TR_LIMIT = 'trials_limit'                 # default: 100
     __MV_LIMIT = 'moves_limit'                  # default: 20
+    __FIRST_IMPR = 'first_improvement'          # default: False
     
     #--------------------------------------------------
     
@@ -44,6 +48,7 @@ class Annealing(orio.main.tuner.search.search.Search):
         self.final_temp_ratio = 0.05
         self.trials_limit = 100
         self.moves_limit = 20
+        self.first_improvement = False
         self.bignum = 13124314.0
 
         # read all algorithm-specific arguments
@@ -61,6 +66,15 @@ class Annealing(orio.main.tuner.search.search.Search):
         '''
         
         # TODO: implement startCoord support
+        return self.askTellSearch()
+
+    # Method required by the ask/tell interface
+    def proposals(self):
+        '''
+        The simulated annealing search, proposing the coordinates it evaluates in batches: each batch
+        holds batch_size random neighbors of the current coordinate, which are then tried in turn (the
+        ones left after a move are not neighbors of the new coordinate, and are dropped)
+        '''
 
         info('\n----- begin simulated annealing search -----')
 
@@ -70,6 +84,9 @@ class Annealing(orio.main.tuner.search.search.Search):
 
         # initialize a storage to remember all initial coordinates that have been explored
         coord_records = {}
+
+        # the first runs start from the coordinates seeded from prior tuning sessions (if any)
+        seed_coords = self.warmStartCoords()
                 
         # record the best global coordinate and its best performance cost
         best_global_coord = None
@@ -78,7 +95,7 @@ class Annealing(orio.main.tuner.search.search.Search):
         info('--> begin temperature initialization')
         
         # calculate the initial and final temperatures
-        init_temperature = self.__initTemperature()
+        init_temperature = yield from self.__initTemperature()
         final_temperature = self.final_temp_ratio * init_temperature
 
         info('--> end temperature initialization')
@@ -95,15 +112,16 @@ class Annealing(orio.main.tuner.search.search.Search):
             # initialize the temperature
             temperature = init_temperature
 
-            # randomly pick an initial coordinate in the search space
-            coord = self.__initRandomCoord(coord_records)
+            # pick the next seeded coordinate, or randomly pick an initial coordinate in the search space
+            coord = self.__initRandomCoord(coord_records, seed_coords)
 
             # if all initial coordinates in the search space have been used before
             if coord == None:
                 break
 
             # get the performance cost of the current initial coordinate (list of times)
-            perf_cost = self.__get_perf_cost_avg(self.getPerfCost(coord))
+            [perf_cost] = yield from self.proposeCoords([coord])
+            perf_cost = self.__get_perf_cost_avg(perf_cost)
 
             # record the best coordinate and its best performance cost
             best_coord = coord
@@ -123,58 +141,75 @@ class Annealing(orio.main.tuner.search.search.Search):
                 good_moves = 0
                 
                 # the trial loop (i.e. the Metropolis Monte Carlo simulation loop)
-                for trial in range(0, self.trials_limit):
-                
-                    # get a new coordinate (i.e. a random neighbor)
-                    new_coord = self.__getRandomNeighbor(coord)
-                    
+                trial = 0
+                stop = False
+                while trial < self.trials_limit and not stop:
+
+                    # get a batch of new coordinates (i.e. random neighbors)
+                    new_coords = []
+                    while len(new_coords) < min(self.batch_size, self.trials_limit - trial):
+                        new_coord = self.__getRandomNeighbor(coord)
+                        if new_coord == None:
+                            break
+                        new_coords.append(new_coord)
+
                     # check if no neighboring coordinate can be found
-                    if new_coord == None:
+                    if not new_coords:
                         break
 
-                    # get the performance cost of the new coordinate
-                    new_perf_cost = self.__get_perf_cost_avg(self.getPerfCost(new_coord))
-                    
-                    # compare to the best result so far
-                    if new_perf_cost < best_perf_cost and new_perf_cost > 0.0:
-                        best_coord = new_coord
-                        best_perf_cost = new_perf_cost
-                        info('--> best annealing coordinate found: %s, cost: %e' %
-                             (best_coord, best_perf_cost))
-
-                    # calculate the performance cost difference
-                    delta = new_perf_cost - perf_cost
-                        
-                    # if the new coordinate has a better performance cost
-                    if delta < 0 and new_perf_cost > 0.0:
-                        coord = new_coord
-                        perf_cost = new_perf_cost
-                        good_moves += 1
-                        info('--> move to BETTER coordinate: %s, cost: %e' %
-                             (coord, perf_cost))
-
-                    # compute the acceptance probability (i.e. the Boltzmann probability or
-                    # the Metropolis criterion) to see whether a move to the new coordinate is
-                    # needed
-                    # the acceptance probability formula: p = e^(-delta/temperature)
-                    else:
-
-                        # count the probability of moving to the new coordinate
-                        delta = self.bignum
-                        p = math.exp(-delta / temperature)
-                        if self.getRandomReal(0,1) < p:
+                    # get the performance costs of the new coordinates
+                    new_perf_costs = yield from self.proposeCoords(new_coords)
+
+                    for new_coord, new_perf_cost in zip(new_coords, new_perf_costs):
+                        trial += 1
+                        new_perf_cost = self.__get_perf_cost_avg(new_perf_cost)
+                        moved = False
+
+                        # compare to the best result so far
+                        if new_perf_cost < best_perf_cost and new_perf_cost > 0.0:
+                            best_coord = new_coord
+                            best_perf_cost = new_perf_cost
+                            info('--> best annealing coordinate found: %s, cost: %e' %
+                                 (best_coord, best_perf_cost))
+
+                        # calculate the performance cost difference
+                        delta = new_perf_cost - perf_cost
+
+                        # if the new coordinate has a better performance cost
+                        if delta < 0 and new_perf_cost > 0.0:
                             coord = new_coord
                             perf_cost = new_perf_cost
                             good_moves += 1
-                            info('--> move to WORSE coordinate: %s, cost: %e' % (coord, perf_cost))
-
-                    # check if the maximum limit of the good moves is reached
-                    if good_moves > self.moves_limit:
-                        break
-
-                    # check if the time is up
-                    if self.time_limit > 0 and (time.time()-start_time) > self.time_limit:
-                        break
+                            moved = True
+                            info('--> move to BETTER coordinate: %s, cost: %e' %
+                                 (coord, perf_cost))
+
+                        # compute the acceptance probability (i.e. the Boltzmann probability or
+                        # the Metropolis criterion) to see whether a move to the new coordinate is
+                        # needed
+                        # the acceptance probability formula: p = e^(-delta/temperature)
+                        else:
+
+                            # count the probability of moving to the new coordinate
+                            delta = self.bignum
+                            p = math.exp(-delta / temperature)
+                            if self.getRandomReal(0,1) < p:
+                                coord = new_coord
+                                perf_cost = new_perf_cost
+                                good_moves += 1
+                                moved = True
+                                info('--> move to WORSE coordinate: %s, cost: %e' % (coord, perf_cost))
+
+                        # check if the maximum limit of the good moves is reached
+                        if good_moves > self.moves_limit:
+                            stop = True
+
+                        # check if the time is up
+                        if self.time_limit > 0 and (time.time()-start_time) > self.time_limit:
+                            stop = True
+
+                        if stop or moved:
+                            break
                 
                 # reduce the temperature (i.e. the cooling/annealing schedule)
                 temperature *= self.cooling_factor
@@ -192,7 +227,9 @@ class Annealing(orio.main.tuner.search.search.Search):
             if self.time_limit <= 0 or (time.time()-start_time) <= self.time_limit:
                 
                 # perform a local search on the best annealing coordinate
-                best_coord, best_perf_cost_list = self.searchBestNeighbor(best_coord, self.local_distance)
+                best_coord, best_perf_cost_list = yield from self.proposeBestNeighbor(
+                    best_coord, self.local_distance, first_improvement=self.first_improvement,
+                    randomized=self.first_improvement)
                 best_perf_cost = self.__get_perf_cost_avg(best_perf_cost_list)
 
                 # if the neighboring coordinate has a better performance cost
@@ -268,6 +305,13 @@ class Annealing(orio.main.tuner.search.search.Search):
                            % (self.__class__.__name__, vname))
                 self.moves_limit = rhs
 
+            # the first-improvement local search
+            elif vname == self.__FIRST_IMPR:
+                if not isinstance(rhs, bool):
+                    err('orio.main.tuner.search.annealing: %s argument "%s" must be a boolean'
+                           % (self.__class__.__name__, vname))
+                self.first_improvement = rhs
+
             # unrecognized algorithm-specific argument
             else:
                 err('orio.main.tuner.search.annealing: unrecognized %s algorithm-specific argument: "%s"' %
@@ -280,6 +324,7 @@ class Annealing(orio.main.tuner.search.search.Search):
         '''
         Provide an estimation of the initial temperature by taking the average of
         the performance-cost differences among randomly chosen coordinates
+        (a proposals generator, the random coordinates are proposed at once)
         '''
 
         # set some useful variables
@@ -289,19 +334,16 @@ class Annealing(orio.main.tuner.search.search.Search):
 
         # randomly pick several random coordinates with their performance costs
         random_coords = []
-        perf_costs = []
         while True:
             if len(cur_coord_records) >= max_distinct_coords:
                 break
             coord = self.getRandomCoord()
             if str(coord) not in cur_coord_records:
                 cur_coord_records[str(coord)] = None
-                perf_cost = self.getPerfCost(coord)
-                if perf_cost != self.MAXFLOAT:
-                    random_coords.append(coord)
-                    perf_costs.append(perf_cost)
-                    if len(random_coords) >= max_random_coords:
-                        break
+                random_coords.append(coord)
+                if len(random_coords) >= max_random_coords:
+                    break
+        perf_costs = yield from self.proposeCoords(random_coords)
 
         # check if not enough random coordinates are found
         if len(random_coords) == 0:
@@ -339,12 +381,19 @@ class Annealing(orio.main.tuner.search.search.Search):
 
     #--------------------------------------------------
 
-    def __initRandomCoord(self, coord_records):
-        '''Randomly initialize a coordinate in the search space'''
+    def __initRandomCoord(self, coord_records, seed_coords=None):
+        '''Randomly initialize a coordinate in the search space (the given seed coordinates first)'''
 
         # check if all coordinates have been explored
         if len(coord_records) >= self.space_size:
             return None
+
+        # take the next seed coordinate that has never been explored before
+        while seed_coords:
+            coord = seed_coords.pop(0)
+            if str(coord) not in coord_records:
+                coord_records[str(coord)] = None
+                return coord
         
         # randomly pick a coordinate that has never been explored before
         while True:
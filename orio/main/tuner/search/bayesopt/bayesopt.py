@@ -0,0 +1,308 @@
+#
+# Implementation of a Bayesian optimization search, with a tree-structured Parzen estimator (TPE) surrogate
+#
+
+import time, math, random
+import orio.main.tuner.search.search
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class Bayesopt(orio.main.tuner.search.search.Search):
+    '''
+    The search engine that uses Bayesian optimization: the measured coordinates are split into the
+    good ones (the best gamma fraction) and the others, a density of each group is estimated axis by
+    axis (a discrete Gaussian kernel over the value indices of the numeric axes, smoothed frequencies
+    for the boolean and string ones), and the next coordinate measured is the candidate that maximizes
+    the ratio of the two densities, which is equivalent to maximizing the expected improvement of
+    this surrogate. The candidates are feasible coordinates, sampled uniformly and from the density of
+    the good coordinates. Batches of coordinates are proposed with the constant liar heuristic: each
+    coordinate picked is counted among the bad ones before the next one is picked.
+
+    Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      init_samples              the number of random coordinates measured before the surrogate is
+                                used (default: number of dimensions + 1, at least 5)
+      candidates                the number of candidate coordinates scored for each coordinate
+                                picked (default: 500)
+      gamma                     the fraction of the measured coordinates considered good (default: 0.25)
+      local_distance            the distance number used in the local search of the best
+                                neighboring coordinate of the best coordinate found (default: 0)
+    '''
+
+    # algorithm-specific argument names
+    __INIT_SAMPLES = 'init_samples'
+    __CANDIDATES = 'candidates'
+    __GAMMA = 'gamma'
+    __LOCAL_DIST = 'local_distance'
+
+    # the weight of the uniform prior in the density estimates, in number of observations
+    __PRIOR_WEIGHT = 1.0
+
+    #--------------------------------------------------
+
+    def __init__(self, params):
+        '''To instantiate a Bayesian optimization search engine'''
+
+        random.seed(1)
+
+        orio.main.tuner.search.search.Search.__init__(self, params)
+
+        # set all algorithm-specific arguments to their default values
+        self.init_samples = max(5, self.total_dims + 1)
+        self.candidates = 500
+        self.gamma = 0.25
+        self.local_distance = 0
+
+        # read all algorithm-specific arguments
+        self.__readAlgoArgs()
+
+        # complain if both the search time limit and the total number of search runs are undefined
+        if self.time_limit <= 0 and self.total_runs <= 0:
+            err(('orio.main.tuner.search.bayesopt.bayesopt: %s search requires either (both) the search ' +
+                 'time limit or (and) the total number of search runs to be defined') % self.__class__.__name__)
+
+        # the kind of each axis: numeric values are ordered, boolean and string values are not
+        self.ordered_axes = []
+        for vals in (self.axis_val_ranges or []):
+            self.ordered_axes.append(len(vals) > 0 and not isinstance(vals[0], (bool, str)))
+
+    # Method required by the search interface
+    def searchBestCoord(self, startCoord=None):
+        '''
+        To explore the search space and return the coordinate that yields the best performance
+        (i.e. minimum performance cost).
+        '''
+        # TODO: implement startCoord support
+        return self.askTellSearch()
+
+    # Method required by the ask/tell interface
+    def proposals(self):
+        '''The Bayesian optimization search, proposing batches of batch_size coordinates'''
+
+        info('\n----- begin Bayesian optimization search -----')
+
+        # the measured coordinates and their costs (the mean of the repetitions)
+        eval_coords = []
+        eval_costs = []
+        eval_keys = set()
+
+        best_coord = None
+        best_perf_cost = self.MAXFLOAT
+        num_eval_best = 0
+        runs = 0
+        fruns = 0
+
+        start_time = time.time()
+
+        # the initial design: the default code without transformation, the coordinates seeded from prior
+        # tuning sessions (if any), then random valid coordinates
+        max_runs = self.total_runs if self.total_runs > 0 else self.space_size
+        num_init = min(self.init_samples, max_runs)
+        init_coords = []
+        default_coord = [0] * self.total_dims
+        if self.feasible_space.isValidCoord(default_coord):
+            init_coords.append(default_coord)
+        init_coords += [c for c in self.warmStartCoords() if c not in init_coords][:max(0, max_runs - len(init_coords))]
+        init_coords += self.feasible_space.sample(num_init - len(init_coords),
+                                                  exclude=[str(c) for c in init_coords] + [str(default_coord)])
+        batch = init_coords
+
+        while batch:
+
+            # measure the batch
+            perf_costs = yield from self.proposeCoords(batch)
+            for coord, perf_cost in zip(batch, perf_costs):
+                runs += 1
+                mean_perf_cost = self.__mean(perf_cost)
+                eval_coords.append(coord)
+                eval_costs.append(mean_perf_cost)
+                eval_keys.add(str(coord))
+                if math.isinf(mean_perf_cost):
+                    fruns += 1
+                debug('(run %s) coordinate: %s, cost: %s' % (runs, coord, mean_perf_cost), obj=self, level=3)
+                if mean_perf_cost < best_perf_cost and mean_perf_cost > 0.0:
+                    best_coord = coord
+                    best_perf_cost = mean_perf_cost
+                    num_eval_best = runs
+                    info('>>>> best coordinate found: %s, cost: %e' % (coord, mean_perf_cost))
+
+            # check if the time is up
+            if self.time_limit > 0 and (time.time() - start_time) > self.time_limit:
+                break
+
+            # check if the maximum limit of runs is reached
+            if runs >= max_runs:
+                break
+
+            # pick the next batch with the surrogate
+            batch = self.__pickBatch(eval_coords, eval_costs, eval_keys, min(self.batch_size, max_runs - runs))
+
+        # perform a local search on the best coordinate
+        if best_coord is not None and self.local_distance > 0 and \
+                (self.time_limit <= 0 or (time.time() - start_time) <= self.time_limit):
+            coord, perf_cost = yield from self.proposeBestNeighbor(best_coord, self.local_distance)
+            perf_cost = self.__mean(perf_cost)
+            if perf_cost < best_perf_cost and perf_cost > 0.0:
+                best_coord = coord
+                best_perf_cost = perf_cost
+                info('>>>> best coordinate found (local search): %s, cost: %e' % (coord, perf_cost))
+
+        # compute the total search time
+        search_time = time.time() - start_time
+
+        info('----- end Bayesian optimization search -----')
+        info('----- begin Bayesian optimization search summary -----')
+        info(' total completed runs: %s' % runs)
+        info(' total successful runs: %s' % (runs - fruns))
+        info(' total failed runs: %s' % fruns)
+        info(' found at: %s' % num_eval_best)
+        info('----- end Bayesian optimization search summary -----')
+
+        # return the best coordinate
+        return best_coord, best_perf_cost, search_time, runs - fruns
+
+    # Private methods
+    #--------------------------------------------------
+
+    def __readAlgoArgs(self):
+        '''To read all algorithm-specific arguments'''
+
+        # check for algorithm-specific arguments
+        for vname, rhs in self.search_opts.items():
+
+            # the number of initial random samples
+            if vname == self.__INIT_SAMPLES:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tuner.search.bayesopt: %s argument "%s" must be a positive integer'
+                        % (self.__class__.__name__, vname))
+                self.init_samples = rhs
+
+            # the number of candidates scored
+            elif vname == self.__CANDIDATES:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tuner.search.bayesopt: %s argument "%s" must be a positive integer'
+                        % (self.__class__.__name__, vname))
+                self.candidates = rhs
+
+            # the fraction of good coordinates
+            elif vname == self.__GAMMA:
+                if not isinstance(rhs, (int, float)) or rhs <= 0 or rhs >= 1:
+                    err('orio.main.tuner.search.bayesopt: %s argument "%s" must be a real number between 0 and 1'
+                        % (self.__class__.__name__, vname))
+                self.gamma = float(rhs)
+
+            # local search distance
+            elif vname == self.__LOCAL_DIST:
+                if not isinstance(rhs, int) or rhs < 0:
+                    err('orio.main.tuner.search.bayesopt: %s argument "%s" must be a positive integer or zero'
+                        % (self.__class__.__name__, vname))
+                self.local_distance = rhs
+
+            elif vname == 'total_runs':
+                self.total_runs = rhs
+
+            # unrecognized algorithm-specific argument
+            else:
+                err('orio.main.tuner.search.bayesopt: unrecognized %s algorithm-specific argument: "%s"' %
+                    (self.__class__.__name__, vname))
+
+    #--------------------------------------------------
+
+    def __mean(self, perf_cost):
+        '''Return the mean of the timing repetitions of a coordinate (infinite if it failed)'''
+        try:
+            return sum([float(x) for x in perf_cost]) / len(perf_cost)
+        except (TypeError, ZeroDivisionError):
+            return self.MAXFLOAT
+
+    def __density(self, coords):
+        '''
+        Return, for each axis, the list of the probabilities of its value indices estimated from the
+        given coordinates (mixed with a uniform prior)
+        '''
+        prior = self.__PRIOR_WEIGHT
+        total = prior + len(coords)
+        tables = []
+        for dim, n in enumerate(self.dim_uplimits):
+            probs = [prior / n] * n
+            if self.ordered_axes[dim] and n > 1:
+                # discrete Gaussian kernels, narrower as observations accumulate
+                width = max(1.0, (n - 1) / (1.0 + len(coords)))
+                kernels = {}
+                for coord in coords:
+                    i = coord[dim]
+                    if i not in kernels:
+                        kernel = [math.exp(-0.5 * ((k - i) / width) ** 2) for k in range(n)]
+                        norm = sum(kernel)
+                        kernels[i] = [x / norm for x in kernel]
+                    for k, x in enumerate(kernels[i]):
+                        probs[k] += x
+            else:
+                for coord in coords:
+                    probs[coord[dim]] += 1.0
+            tables.append([p / total for p in probs])
+        return tables
+
+    def __sampleDensity(self, tables, count):
+        '''Draw up to count feasible coordinates from the given per-axis densities'''
+        coords = []
+        for _ in range(4 * count):
+            coord = []
+            for probs in tables:
+                r = random.random()
+                k = 0
+                while k < len(probs) - 1 and r >= probs[k]:
+                    r -= probs[k]
+                    k += 1
+                coord.append(k)
+            if self.feasible_space.isValidCoord(coord):
+                coords.append(coord)
+                if len(coords) >= count:
+                    break
+        return coords
+
+    def __pickBatch(self, eval_coords, eval_costs, eval_keys, count):
+        '''
+        Return up to count unmeasured feasible coordinates maximizing the density ratio of the good and
+        bad coordinates, picked one after the other with the constant liar heuristic
+        '''
+
+        # split the measured coordinates (the failed ones are always bad)
+        order = sorted(range(len(eval_coords)), key=lambda i: eval_costs[i])
+        num_finite = len([c for c in eval_costs if not math.isinf(c)])
+        num_good = min(num_finite, max(1, int(math.ceil(self.gamma * len(eval_coords)))))
+        good = [eval_coords[i] for i in order[:num_good]]
+        bad = [eval_coords[i] for i in order[num_good:]]
+
+        # the candidates: uniform samples and samples of the density of the good coordinates
+        candidates = self.__sampleDensity(self.__density(good), self.candidates)
+        candidates += self.feasible_space.sample(self.candidates // 4, exclude=eval_keys)
+
+        batch = []
+        batch_keys = set()
+        while len(batch) < count:
+            good_tables = self.__density(good)
+            bad_tables = self.__density(bad)
+            ratio_tables = [[math.log(g) - math.log(b) for g, b in zip(gprobs, bprobs)]
+                            for gprobs, bprobs in zip(good_tables, bad_tables)]
+
+            best_score = None
+            best_coord = None
+            for coord in candidates:
+                key = str(coord)
+                if key in eval_keys or key in batch_keys:
+                    continue
+                score = sum([ratio_tables[dim][i] for dim, i in enumerate(coord)])
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best_coord = coord
+            if best_coord is None:
+                break
+
+            # the constant liar: assume the picked coordinate performs badly
+            batch.append(best_coord)
+            batch_keys.add(str(best_coord))
+            bad.append(best_coord)
+
+        debug('Bayesian optimization batch: %s' % batch, obj=self, level=3)
+        return batch
@@ -0,0 +1,211 @@
+#
+# The coordinate system of a search space: coordinates ranked as integers, and cost tables indexed by rank
+#
+
+import itertools, math
+from array import array
+
+#-----------------------------------------------------
+
+class CoordSpace:
+    '''
+    The coordinates of a search space (the lists of the value indices of its axes), ranked as integers:
+    the rank of a coordinate is the mixed-radix number whose digits are its indices, the first axis
+    varying fastest (the order of the exhaustive search). Ranks are the compact keys of the coordinates
+    in the tables of the search engines; the string keys (str(coord)) remain the keys of the test code
+    output and of the performance costs returned by getPerfCosts.
+    '''
+
+    def __init__(self, dim_uplimits):
+        '''@param dim_uplimits: the number of values of each axis'''
+        self.dim_uplimits = list(dim_uplimits)
+        self.total_dims = len(self.dim_uplimits)
+        self.strides = []
+        size = 1
+        for n in self.dim_uplimits:
+            self.strides.append(size)
+            size *= n
+        self.size = size if self.dim_uplimits else 0
+
+    #-----------------------------------------------------
+
+    def rank(self, coord):
+        '''Return the rank of a coordinate'''
+        r = 0
+        for i, stride in zip(coord, self.strides):
+            r += i * stride
+        return r
+
+    def unrank(self, rank):
+        '''Return the coordinate of a rank'''
+        coord = []
+        for n in self.dim_uplimits:
+            rank, i = divmod(rank, n)
+            coord.append(i)
+        return coord
+
+    def rankOfKey(self, coord_key):
+        '''Return the rank of the coordinate of a string key, e.g., "[2, 4, 1]"'''
+        return self.rank([int(x) for x in coord_key[1:-1].split(',')])
+
+    def keyOfRank(self, rank):
+        '''Return the string key of the coordinate of a rank'''
+        return str(self.unrank(rank))
+
+    def contains(self, coord):
+        '''Return True if the coordinate lies within the search space'''
+        for i, n in zip(coord, self.dim_uplimits):
+            if i < 0 or i >= n:
+                return False
+        return True
+
+    #-----------------------------------------------------
+
+    def neighborRanks(self, rank, distance):
+        '''
+        Return the ranks of all the neighboring coordinates of a rank (within the specified distance
+        along each axis), the first axis varying slowest
+        '''
+        steps = [0] + list(range(1, distance + 1)) + list(range(-1, -distance - 1, -1))
+        coord = self.unrank(rank)
+        ranks = [0]
+        for i, n, stride in zip(coord, self.dim_uplimits, self.strides):
+            offsets = [d * stride for d in steps if 0 <= i + d < n]
+            ranks = [r + o for r in ranks for o in offsets]
+        # the first one is the coordinate itself
+        return [rank + r for r in ranks[1:]]
+
+    def neighbors(self, coord, distance):
+        '''
+        Return all the neighboring coordinates of a coordinate (within the specified distance along
+        each axis), in the order of neighborRanks
+        '''
+        steps = [0] + list(range(1, distance + 1)) + list(range(-1, -distance - 1, -1))
+        points = [[i + d for d in steps if 0 <= i + d < n] for i, n in zip(coord, self.dim_uplimits)]
+        # the first one is the coordinate itself
+        return [list(p) for p in itertools.islice(itertools.product(*points), 1, None)]
+
+    def iterNeighbors(self, coord, distance, rng=None):
+        '''
+        Generate the neighboring coordinates of a coordinate (within the specified distance along each
+        axis) one at a time, without building the whole neighborhood: in the order of neighbors, or
+        in a random order (without repetitions) if a random number generator (e.g., the random module)
+        is given
+        '''
+        steps = [0] + list(range(1, distance + 1)) + list(range(-1, -distance - 1, -1))
+        points = [[i + d for d in steps if 0 <= i + d < n] for i, n in zip(coord, self.dim_uplimits)]
+        if rng is None:
+            for p in itertools.islice(itertools.product(*points), 1, None):
+                yield list(p)
+            return
+
+        # the neighbors are numbered in the mixed radix of the numbers of points of each axis, the
+        # coordinate itself is number 0
+        total = 1
+        for p in points:
+            total *= len(p)
+        if total <= self.__SHUFFLE_LIMIT:
+            numbers = list(range(1, total))
+            rng.shuffle(numbers)
+        else:
+            numbers = self.__randomNumbers(total, rng)
+        for number in numbers:
+            neighbor = []
+            for p in reversed(points):
+                number, i = divmod(number, len(p))
+                neighbor.append(p[i])
+            neighbor.reverse()
+            yield neighbor
+
+    # the largest neighborhood shuffled as a list by iterNeighbors
+    __SHUFFLE_LIMIT = 4096
+
+    def __randomNumbers(self, total, rng):
+        '''
+        Generate the numbers 1 to total-1 in a random order, without repetitions, in constant memory:
+        the i-th number is 1 + (a*i + b) mod (total-1), a random affine bijection of 0..total-2 (a is
+        coprime with total-1)
+        '''
+        count = total - 1
+        a = 1 + int(rng.random() * (count - 1))
+        while math.gcd(a, count) != 1:
+            a = 1 + int(rng.random() * (count - 1))
+        b = int(rng.random() * count)
+        for i in range(count):
+            yield 1 + (a * i + b) % count
+
+    def distance(self, coord1, coord2):
+        '''Return the Euclidean distance between two coordinates'''
+        d_sqr = 0
+        for i, j in zip(coord1, coord2):
+            d_sqr += (j - i) ** 2
+        return math.sqrt(d_sqr)
+
+#-----------------------------------------------------
+
+class CostTable:
+    '''
+    The mean performance costs of the coordinates of a search space, indexed by rank: an array of
+    doubles (NaN for the coordinates not measured) if the space has at most ARRAY_LIMIT coordinates,
+    a dictionary otherwise.
+    '''
+
+    ARRAY_LIMIT = 1 << 20
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        if size <= self.ARRAY_LIMIT:
+            self.__costs = array('d', [float('nan')]) * size
+        else:
+            self.__costs = None
+            self.__dict = {}
+
+    def __setitem__(self, rank, cost):
+        if self.__costs is not None:
+            if math.isnan(self.__costs[rank]):
+                self.count += 1
+            self.__costs[rank] = cost
+        else:
+            if rank not in self.__dict:
+                self.count += 1
+            self.__dict[rank] = cost
+
+    def get(self, rank, default=None):
+        '''Return the cost of a rank, or default if it was not measured'''
+        if self.__costs is not None:
+            cost = self.__costs[rank]
+            return default if math.isnan(cost) else cost
+        return self.__dict.get(rank, default)
+
+    def __contains__(self, rank):
+        return self.get(rank) is not None
+
+    def __len__(self):
+        return self.count
+
+    def items(self):
+        '''Return the (rank, cost) pairs of the measured coordinates, in rank order'''
+        if self.__costs is not None:
+            return [(r, c) for r, c in enumerate(self.__costs) if not math.isnan(c)]
+        return sorted(self.__dict.items())
+
+    def ranked(self):
+        '''Return the ranks of the successfully measured coordinates, from the lowest to the highest cost'''
+        items = [(c, r) for r, c in self.items() if not math.isinf(c)]
+        items.sort()
+        return [r for _, r in items]
+
+#-----------------------------------------------------
+
+def meanCost(perf_cost):
+    '''
+    Return the mean cost of a (times, transfer times) pair or list of times: the mean of all the
+    repetitions but the first (warm-up) one, infinite if there is no time
+    '''
+    times = perf_cost[0] if isinstance(perf_cost, tuple) else perf_cost
+    if not times:
+        return float('inf')
+    if len(times) == 1:
+        return float(times[0])
+    return float(sum(times[1:])) / (len(times) - 1)
@@ -8,6 +8,7 @@ import random
 import csv
 import hashlib
 import orio.main.tuner.search.search
+from orio.main.tuner.result_stream import coordFromKey
 from orio.main.util.globals import *
 
 #-----------------------------------------------------
@@ -261,7 +262,7 @@ class CUDACFG(orio.main.tuner.search.search.Search):
             for i, (coord_str, pcost) in enumerate(pcost_items):
                 if type(pcost) == tuple: (perf_cost,_) = pcost    # ignore transfer costs -- GPUs only
                 else: perf_cost = pcost
-                coord_val = eval(coord_str)
+                coord_val = coordFromKey(coord_str)
                 #info('%s %s' % (coord_val,perf_cost))
                 perf_params = self.coordToPerfParams(coord_val)
                 if type(perf_cost) is list or type(perf_cost) is tuple:
@@ -17,6 +17,14 @@ class Direct(orio.main.tuner.search.search.Search):
         self.epsilon = 1e-4
 
     def searchBestCoord(self, startCoord=None):
+        return self.askTellSearch()
+
+    # Method required by the ask/tell interface
+    def proposals(self):
+        '''
+        The DIRECT search; the centers of the three parts of each trisected rectangle are proposed
+        together
+        '''
 
         # We are in a hyperrectangle. Initialization: take the whole parameter space.
 
@@ -37,7 +45,7 @@ class Direct(orio.main.tuner.search.search.Search):
         # initialize
 
         center = self.__getCentroid(rectangle)
-        cost = self.getPerfCost(center)
+        [cost] = yield from self.proposeCoords([center])
         fc = sum(cost) / len(cost)
         dist = 0
         for c in rectangle:
@@ -86,15 +94,15 @@ class Direct(orio.main.tuner.search.search.Search):
 
             new_fmin = fmin
             fstar = (1 - self.epsilon) * fmin
-            for rec, cor in r1, r2, r3:
 
-                info("working in rectangle: " + str(rec) + " corners " + str(cor))
+            # Evaluate the perf at the centers
+            centers = [self.__getCentroid(cor) for rec, cor in (r1, r2, r3)]
+            costs = yield from self.proposeCoords(centers)
 
-                # Take the center
-                center = self.__getCentroid(cor)
+            for (rec, cor), center, cost in zip((r1, r2, r3), centers, costs):
+
+                info("working in rectangle: " + str(rec) + " corners " + str(cor))
 
-                # Evaluate the perf at the center
-                cost = self.getPerfCost(center)
                 fc = sum(cost) / len(cost)
                 dist = 0
                 for c in cor:
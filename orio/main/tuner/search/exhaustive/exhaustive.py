@@ -4,12 +4,18 @@
 
 import sys, time, json
 import orio.main.tuner.search.search
+from orio.main.tuner.result_stream import coordFromKey
 from orio.main.util.globals import *
 
 #-----------------------------------------------------
 
 class Exhaustive(orio.main.tuner.search.search.Search):
-    '''The search engine that uses an exhaustive search approach'''
+    '''
+    The search engine that uses an exhaustive search approach. The coordinates are visited in the
+    order of their rank (a mixed-radix number over the dimension sizes, the first dimension varying
+    fastest, see CoordSpace); with the --shard=i/N command-line option, only the i-th of N equal
+    ranges of ranks is explored, so that N tuner instances can share the search space.
+    '''
 
     def __init__(self, params):
         '''
@@ -24,6 +30,16 @@ class Exhaustive(orio.main.tuner.search.search.Search):
         # read all algorithm-specific arguments
         self.__readAlgoArgs()
 
+        # the range of ranks of the explored coordinates
+        self.first_index = 0
+        self.end_index = self.space_size
+        if Globals().shard:
+            shard, num_shards = Globals().shard
+            self.first_index = self.space_size * shard // num_shards
+            self.end_index = self.space_size * (shard + 1) // num_shards
+            info('exhaustive search: shard %d of %d, coordinates %d to %d of %d' %
+                 (shard, num_shards, self.first_index, self.end_index - 1, self.space_size))
+
         # complain if the total number of search runs is defined (i.e. exhaustive search
         # only needs to be run once)
         if self.total_runs > 1:
@@ -45,9 +61,7 @@ class Exhaustive(orio.main.tuner.search.search.Search):
         info('\n----- begin exhaustive search -----')
 
         # get the total number of coordinates to be tested at the same time
-        coord_count = 1
-        if self.use_parallel_search:
-            coord_count = self.num_procs
+        coord_count = self.batch_size
         top_perf={}
         
         # record the best coordinate and its best performance cost
@@ -66,14 +80,21 @@ class Exhaustive(orio.main.tuner.search.search.Search):
                      " expected %d elements, but was given %d" 
                      % (startCoord, self.total_dims, len(startCoord)))
                 startCoord = None
+            elif not self.first_index <= self.coord_space.rank(startCoord) < self.end_index:
+                warn("orio.main.tuner.search.exhaustive: the starting coordinate %s is out of the shard" % startCoord)
+                startCoord = None
             else:
                 coord = startCoord
                 
         if not startCoord:
-            # start from the origin coordinate (i.e. [0,0,...])
-            coord = [0] * self.total_dims 
-            
+            # start from the first coordinate of the shard (i.e. the origin [0,0,...] if not sharded)
+            coord = self.coord_space.unrank(self.first_index)
+
         coords = [coord]
+        if self.first_index >= self.end_index:
+            warn('orio.main.tuner.search.exhaustive: the shard is empty (more shards than coordinates)')
+            coord = None
+            coords = []
         while len(coords) < coord_count:
             coord = self.__getNextCoord(coord)
             if coord:
@@ -92,7 +113,7 @@ class Exhaustive(orio.main.tuner.search.search.Search):
             # compare to the best result
             pcost_items = sorted(list(perf_costs.items()))
             for coord_str, (perf_cost,transfer_costs) in pcost_items:
-                coord_val = eval(coord_str)
+                coord_val = coordFromKey(coord_str)
                 #info('cost: %s' % (perf_cost))
                 floatNums = [float(x) for x in perf_cost]
                 transferFloats = [float(x) for x in transfer_costs]
@@ -191,7 +212,7 @@ class Exhaustive(orio.main.tuner.search.search.Search):
     def __getNextCoord(self, coord):
         '''
         Return the next neighboring coordinate to be considered in the search space.
-        Return None if all coordinates in the search space have been visited.
+        Return None if all coordinates in the search space (or shard) have been visited.
         
         @return: the next coordinate
         '''
@@ -206,5 +227,6 @@ class Exhaustive(orio.main.tuner.search.search.Search):
                 next_coord[i] = 0
                 if i == self.total_dims - 1:
                     return None
+        if self.end_index < self.space_size and self.coord_space.rank(next_coord) >= self.end_index:
+            return None
         return next_coord
-
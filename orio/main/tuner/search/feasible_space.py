@@ -0,0 +1,224 @@
+#
+# The feasible part of a search space: the coordinates that satisfy the performance parameter constraint
+#
+
+import ast, builtins, random
+from functools import reduce
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class Constraint:
+    '''
+    The combined performance parameter constraint (a Python expression), compiled once. Its top-level
+    conjuncts are also kept, with the performance parameters they refer to, so that they can be compiled
+    into checks that reject a partially assigned coordinate as soon as one of them is false.
+    '''
+
+    def __init__(self, constraint, param_names, input_params=None):
+        '''
+        @param constraint: the constraint expression, e.g., 'True and (T1 <= T2) and (U1*U2 <= 64)'
+        @param param_names: the names of the performance parameters
+        @param input_params: a list of (name, value) pairs of the input parameters the constraint may refer to
+        '''
+        self.constraint = constraint
+        try:
+            tree = ast.parse(constraint.strip(), mode='eval')
+            self.code = compile(tree, '<constraint>', 'eval')
+        except SyntaxError as e:
+            err('orio.main.tuner.search.feasible_space: invalid constraint expression: "%s"\n --> %s: %s' %
+                (constraint, e.__class__.__name__, e))
+
+        # the evaluation environment: the input parameters shadow the performance parameters, like the
+        # local variables of eval(constraint, perf_params, input_params)
+        self.input_params = dict(input_params or [])
+        self.env = {'__builtins__': builtins}
+
+        # the conjuncts, with the names of the performance parameters each of them depends on
+        body = tree.body
+        if isinstance(body, ast.BoolOp) and isinstance(body.op, ast.And):
+            nodes = body.values
+        else:
+            nodes = [body]
+        self.conjuncts = []
+        for node in nodes:
+            names = set([n.id for n in ast.walk(node) if isinstance(n, ast.Name)])
+            names = [p for p in param_names if p in names and p not in self.input_params]
+            self.conjuncts.append((names, node))
+
+    def compileConjuncts(self, nodes):
+        '''Return the code object of the conjunction of the given conjuncts (None if there are none)'''
+        if not nodes:
+            return None
+        body = nodes[0] if len(nodes) == 1 else ast.BoolOp(op=ast.And(), values=list(nodes))
+        return compile(ast.fix_missing_locations(ast.Expression(body=body)), '<constraint>', 'eval')
+
+    def isValid(self, perf_params):
+        '''Evaluate the constraint for the given performance parameters (a dictionary)'''
+        env = self.env
+        env.update(perf_params)
+        env.update(self.input_params)
+        return eval(self.code, env)
+
+#-----------------------------------------------------
+
+class FeasibleSpace:
+    '''
+    The coordinates of a search space that satisfy its constraint. Coordinates are enumerated (or
+    sampled) by assigning the axes one after the other, and checking each conjunct of the constraint
+    as soon as all the parameters it refers to are assigned, so that whole infeasible subspaces are
+    skipped. The feasible coordinates of spaces with at most INDEX_LIMIT points are listed once (the
+    index) and sampled directly; those of larger spaces are sampled uniformly by rejection.
+    '''
+
+    INDEX_LIMIT = 100000
+
+    # the number of values tried for an axis before a sampled coordinate is restarted (retry_axes)
+    __AXIS_TRIES = 64
+
+    def __init__(self, axis_names, axis_val_ranges, constraint, input_params=None):
+        self.axis_names = axis_names
+        self.axis_val_ranges = axis_val_ranges
+        self.dim_uplimits = [len(r) for r in axis_val_ranges]
+        self.space_size = reduce(lambda x, y: x * y, self.dim_uplimits, 1) if axis_names else 0
+        self.constraint = Constraint(constraint, axis_names, input_params)
+
+        # the conjunction to check once the axes 0..i are assigned (the constant one is checked first)
+        axis_nodes = [[] for _ in axis_names]
+        constant_nodes = []
+        for names, node in self.constraint.conjuncts:
+            if names:
+                axis_nodes[max([axis_names.index(n) for n in names])].append(node)
+            else:
+                constant_nodes.append(node)
+        self.axis_checks = [self.constraint.compileConjuncts(nodes) for nodes in axis_nodes]
+        self.constant_check = self.constraint.compileConjuncts(constant_nodes)
+
+        self.__index = None
+
+    #-----------------------------------------------------
+
+    def isValid(self, perf_params):
+        '''Return True if the given performance parameters (a dictionary) satisfy the constraint'''
+        return self.constraint.isValid(perf_params)
+
+    def isValidCoord(self, coord):
+        '''Return True if the given coordinate satisfies the constraint'''
+        return self.isValid(dict([(n, r[i]) for n, r, i in zip(self.axis_names, self.axis_val_ranges, coord)]))
+
+    def __env(self):
+        env = dict(self.constraint.env)
+        env.update(self.constraint.input_params)
+        return env
+
+    def __constraintError(self, e):
+        err('failed to evaluate the constraint expression: "%s"\n%s %s' %
+            (self.constraint.constraint, e.__class__.__name__, e))
+
+    #-----------------------------------------------------
+
+    def coords(self):
+        '''Generate all the feasible coordinates, in lexicographic order'''
+        try:
+            for coord in self.__coords():
+                yield coord
+        except Exception as e:
+            self.__constraintError(e)
+
+    def __coords(self):
+        env = self.__env()
+        if not self.axis_names or (self.constant_check is not None and not eval(self.constant_check, env)):
+            return
+        input_names = self.constraint.input_params
+        ndims = len(self.axis_names)
+        coord = [0] * ndims
+        dim = 0
+        while dim >= 0:
+            if coord[dim] < self.dim_uplimits[dim]:
+                name = self.axis_names[dim]
+                if name not in input_names:
+                    env[name] = self.axis_val_ranges[dim][coord[dim]]
+                check = self.axis_checks[dim]
+                if check is None or eval(check, env):
+                    if dim == ndims - 1:
+                        yield list(coord)
+                        coord[dim] += 1
+                    else:
+                        dim += 1
+                        coord[dim] = 0
+                else:
+                    coord[dim] += 1
+            else:
+                # backtrack
+                dim -= 1
+                if dim >= 0:
+                    coord[dim] += 1
+
+    def index(self):
+        '''Return the list of all the feasible coordinates, or None if the space is too large to list them'''
+        if self.__index is None and self.space_size <= self.INDEX_LIMIT:
+            self.__index = list(self.coords())
+        return self.__index
+
+    def size(self):
+        '''Return the number of feasible coordinates (None if unknown, see index)'''
+        index = self.index()
+        return None if index is None else len(index)
+
+    #-----------------------------------------------------
+
+    def sample(self, count, exclude=None, rng=random, retry_axes=False):
+        '''
+        Return up to count distinct feasible coordinates picked uniformly at random (fewer if the feasible
+        space is smaller, or if no new coordinate is found in a reasonable number of attempts)
+        @param exclude: a collection of coordinate keys (str(coord)) not to return
+        @param retry_axes: in spaces too large to be indexed, draw another value for an axis whose
+                           conjuncts fail instead of drawing another coordinate: this finds coordinates
+                           of tightly constrained spaces in fewer attempts, but not uniformly (the
+                           feasible values of an axis that has few of them are picked more often)
+        '''
+        exclude = set(exclude or [])
+        index = self.index()
+        if index is not None:
+            candidates = [c for c in index if str(c) not in exclude]
+            return rng.sample(candidates, min(count, len(candidates)))
+
+        env = self.__env()
+        coords = []
+        try:
+            if self.constant_check is not None and not eval(self.constant_check, env):
+                return []
+            input_names = self.constraint.input_params
+            failures = 0
+            max_failures = 100 + 10 * count if retry_axes else 1000 + 100 * count
+            while len(coords) < count and failures < max_failures:
+                coord = self.__sampleCoord(env, input_names, rng, retry_axes)
+                if coord is None or str(coord) in exclude:
+                    failures += 1
+                    continue
+                exclude.add(str(coord))
+                coords.append(coord)
+        except Exception as e:
+            self.__constraintError(e)
+        return coords
+
+    def __sampleCoord(self, env, input_names, rng, retry_axes):
+        '''
+        Pick each axis value at random, checking the conjuncts of each axis once it is assigned: return
+        None as soon as one fails (the coordinates returned are uniformly distributed), or with
+        retry_axes, retry the axis (see sample)
+        '''
+        tries = self.__AXIS_TRIES if retry_axes else 1
+        coord = []
+        for dim, name in enumerate(self.axis_names):
+            check = self.axis_checks[dim]
+            for _ in range(tries if check is not None else 1):
+                i = int(rng.random() * self.dim_uplimits[dim])
+                if name not in input_names:
+                    env[name] = self.axis_val_ranges[dim][i]
+                if check is None or eval(check, env):
+                    break
+            else:
+                return None
+            coord.append(i)
+        return coord
@@ -96,7 +96,7 @@ class Firefly(orio.main.tuner.search.search.Search):
             for index in range(self.problem_dim):
                 delta[ranked_indexes[index]] = delta_indexes[index]
             perf_params = self.coordToPerfParams(list(new_position + delta))
-            is_valid = eval(self.constraint, perf_params, dict(self.input_params))
+            is_valid = self.feasible_space.isValid(perf_params)
             if sum((new_position + delta - self.population[i].position) ** 2) > 0 and is_valid:
                 self.population[i].position = new_position + delta
                 return True
@@ -36,7 +36,7 @@ class Firefly(orio.main.tuner.search.search.Search):
 
     def is_valid(self, coord):
         perf_params = self.coordToPerfParams(coord)
-        return eval(self.constraint, perf_params, dict(self.input_params))
+        return self.feasible_space.isValid(perf_params)
 
     def get_population(self):
         info("Generating population...")
@@ -6,6 +6,7 @@ import sys, time
 import math
 import random
 import orio.main.tuner.search.search
+from orio.main.tuner.warm_start import problemMagnitude
 from orio.main.util.globals import *
 
 from sklearn import ensemble
@@ -24,10 +25,26 @@ class Mlsearch(orio.main.tuner.search.search.Search):
     the best neighboring coordinate.
 
     Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      local_distance            the distance number used in the local search of the best
+                                neighboring coordinate of the best coordinate found (default: 0)
+      trees                     the number of trees of the regression forest when it is refitted after
+                                each batch (default: 1000)
+      trees_per_batch           the number of trees added to the regression forest after each batch,
+                                trained on all the coordinates evaluated so far, or 0 to refit the whole
+                                forest instead (default: 100)
+      pool_size                 the number of unevaluated coordinates, picked at random, whose
+                                performance is predicted for each batch, or 0 for all of them (default: 0)
+      history                   whether the results of the prior tuning sessions (--warm-start) are added
+                                to the training set, with the problem size as an extra feature (default:
+                                False)
     '''
 
     # algorithm-specific argument names
     __LOCAL_DIST = 'local_distance'  # default: 0
+    __TREES = 'trees'
+    __TREES_PER_BATCH = 'trees_per_batch'
+    __POOL_SIZE = 'pool_size'
+    __HISTORY = 'history'
 
     # --------------------------------------------------
 
@@ -42,7 +59,11 @@ class Mlsearch(orio.main.tuner.search.search.Search):
         self.local_distance = 0
 
         self.init_samp = 10000
-        self.batch_size = 5
+        self.batch_size = max(5, self.batch_size)
+        self.trees = 1000
+        self.trees_per_batch = 100
+        self.pool_size = 0
+        self.history = False
 
         # read all algorithm-specific arguments
         self.__readAlgoArgs()
@@ -59,24 +80,20 @@ class Mlsearch(orio.main.tuner.search.search.Search):
         (i.e. minimum performance cost).
         '''
         # TODO: implement startCoord support
+        return self.askTellSearch()
 
-        info('\n----- begin ml search -----')
-
-        # get the total number of coordinates to be tested at the same time
-        coord_count = 1
-        if self.use_parallel_search:
-            coord_count = self.num_procs
-
-        # initialize a storage to remember all coordinates that have been explored
-        coord_records = {}
+    # Method required by the ask/tell interface
+    def proposals(self):
+        '''
+        The ml search; the initial samples, then each batch of the coordinates with the best predicted
+        performance, are proposed at once
+        '''
 
-        # initialize a list to store the neighboring coordinates
-        neigh_coords = []
+        info('\n----- begin ml search -----')
 
         # record the best coordinate and its best performance cost
         best_coord = None
         best_perf_cost = self.MAXFLOAT
-        old_perf_cost = best_perf_cost
 
         # record the number of runs
         runs = 0
@@ -85,224 +102,80 @@ class Mlsearch(orio.main.tuner.search.search.Search):
 
         # start the timer
         start_time = time.time()
-        init = True
 
-        # randomly pick coordinates to be empirically tested
-        coords = {}
+        # randomly pick coordinates to be empirically tested: the default code without transformation,
+        # the coordinates seeded from prior tuning sessions (if any), then valid coordinates picked at random
         uneval_coords = []
-        uneval_params = []
-
-        # default code without transformation
-        neigh_coords = [[0] * self.total_dims]
-
-# FIXME BN: The time_limit unfortunately puts the search in an invalid state, so temporarily disabling
-#        while (len(uneval_coords) < self.init_samp) and not ((time.time()-start_time) > self.time_limit > 0):
-        while (len(uneval_coords) < self.init_samp):
-            coord = self.__getNextCoord(coord_records, neigh_coords, init)
-
-            if coord is None:
-                break
-
-            coord_key = str(coord)
-
-            if len(coord) == 0:
-                break
-
-            if coord_key not in coords:
-                coords[coord_key] = coord
-                # if the given coordinate is out of the search space
-                is_out = False
-                for i in range(0, self.total_dims):
-                    if coord[i] < 0 or coord[i] >= self.dim_uplimits[i]:
-                        is_out = True
-                        break
-                if is_out:
-                    continue
-                # test if the performance parameters are valid
-                perf_params = self.coordToPerfParams(coord)
-                perf_params1 = copy.copy(perf_params)
-
-                try:
-                    is_valid = eval(self.constraint, perf_params1, dict(self.input_params))
-                except Exception as e:
-                    err('failed to evaluate the constraint expression: "%s"\n%s %s' % (
-                    self.constraint, e.__class__.__name__, e))
-                # if invalid performance parameters
-                if not is_valid:
-                    continue
-
-                temp = []
-                for k in sorted(perf_params):
-                    temp.append(perf_params[k])
-
-                uneval_coords.append(coord)
-                uneval_params.append(perf_params)
-
-        debug("# of coordinates=%d, unevaluated coords=%d, unevaluated params=%d" % (len(coords), len(uneval_coords), len(uneval_params)), obj=self)
-
+        default_coord = [0] * self.total_dims
+        if self.feasible_space.isValidCoord(default_coord):
+            uneval_coords.append(default_coord)
+        uneval_coords += [coord for coord in self.warmStartCoords() if coord not in uneval_coords]
+        num_init = max(1, len(uneval_coords))
+        uneval_coords += self.feasible_space.sample(self.init_samp - len(uneval_coords),
+                                                    exclude=[str(coord) for coord in uneval_coords] +
+                                                            [str(default_coord)])
+        uneval_params = [self.coordToPerfParams(coord) for coord in uneval_coords]
+
+        # the prior results added to the training set, with their problem size feature
+        hist_samples = self.priorSamples() if self.history else []
+        hist_params = [self.coordToPerfParams(coord) for coord, _, _, _ in hist_samples]
+
+        # the features of all the candidates (and prior results), encoded once (one-hot encoding of the
+        # string parameters, e.g., CFLAGS); the evaluated ones are masked out
+        X_all = pd.get_dummies(pd.DataFrame(uneval_params + hist_params)).to_numpy(dtype=float)
+        if hist_samples:
+            input_params = dict([(n, v) for n, v in self.input_params if n != '__builtins__'])
+            sizes = [problemMagnitude(input_params)] * len(uneval_params) + [s[3] for s in hist_samples]
+            X_all = np.hstack([X_all, np.array(sizes, dtype=float).reshape(-1, 1)])
+            X_hist = X_all[len(uneval_params):]
+            Y_hist = np.array([s[1] for s in hist_samples], dtype=float)
+            X_all = X_all[:len(uneval_params)]
+            info('ml search: %d prior results added to the training set' % len(hist_samples))
+        evaluated = np.zeros(len(uneval_coords), dtype=bool)
+        debug("# of candidate coordinates=%d, features=%d" % X_all.shape, obj=self)
+
+        eval_indices = []
         eval_coords = []
-        eval_params = []
         eval_cost = []
         num_eval_best = 0
 
-        indices = random.sample(list(range(1, len(uneval_coords))), self.total_dims)
-        # indices=random.sample(range(1,len(uneval_coords)),  5)
-        indices.insert(0, 0)
+        indices = list(range(min(num_init, len(uneval_coords))))
+        indices += random.sample(list(range(num_init, len(uneval_coords))),
+                                 max(0, min(self.total_dims, len(uneval_coords) - num_init)))
         debug("Indices: %s" % str(indices), obj=self)
 
-        for index in indices:
-            coord = uneval_coords[index]
-            params = uneval_params[index]
-            eval_coords.append(coord)
-            eval_params.append(params)
-
-            debug("Params: %s" % str(params), obj=self)
-            runs += 1
-
-            perf_costs = {}
-            try:
-                perf_costs = self.getPerfCosts([coord])
-            except Exception as e:
-                perf_costs[str(coords)] = [self.MAXFLOAT]
-                info('FAILED: %s %s' % (e.__class__.__name__, e))
-                fruns += 1
-
-            # compare to the best result
-            pcost_items = sorted(list(perf_costs.items()))
-            for i, (coord_str, pcost) in enumerate(pcost_items):
-                if type(pcost) == tuple:
-                    (perf_cost, _) = pcost  # ignore transfer costs -- GPUs only
-                else:
-                    perf_cost = pcost
-
-                try:
-                    floatNums = [float(x) for x in perf_cost]
-                    mean_perf_cost = sum(floatNums) / len(perf_cost)
-                except:
-                    mean_perf_cost = perf_cost
-
-            # transform_time=self.getTransformTime()
-            # compile_time=self.getCompileTime()
-            transform_time = self.getTransformTime(coord_key)
-            compile_time = self.getCompileTime(coord_key)
-
-            res_obj = {}
-            res_obj['run'] = runs
-            res_obj['coordinate'] = coord
-            res_obj['perf_params'] = params
-            res_obj['transform_time'] = transform_time
-            res_obj['compile_time'] = compile_time
-            res_obj['cost'] = perf_cost
-            info('(run %s) | ' % runs + json.dumps(res_obj))
-
-            # info('(run %s) coordinate: %s, perf_params: %s, transform_time: %s, compile_time: %s, cost: %s' % (runs, coord, params, transform_time, compile_time,perf_cost))
-
-            eval_cost.append(mean_perf_cost)
-
-            if mean_perf_cost < best_perf_cost and mean_perf_cost > 0.0:
-                best_coord = coord
-                best_perf_cost = mean_perf_cost
-                info('>>>> best coordinate found: %s, cost: %e' % (coord, mean_perf_cost))
-                num_eval_best = runs
-
-            if not math.isinf(mean_perf_cost):
-                sruns += 1
-
-            # remove the indices
-        indices = sorted(indices, reverse=True)
-        for index in indices:
-            uneval_coords.pop(index)
-            uneval_params.pop(index)
-
-        debug("# of coordinates=%d, unevaluated coords=%d, unevaluated params=%d, evaluated coords=%d" % (
-            len(coords), len(uneval_coords), len(uneval_params), len(eval_coords)), obj=self)
-
-        # sys.exit(0)
-
-        # Create linear regression object
+        # Create the regression object; with incremental updates, trees_per_batch trees trained on all
+        # the coordinates evaluated so far are added to the forest after each batch, instead of refitting
+        # the whole forest
         # regr = linear_model.LinearRegression()
         # regr = GradientBoostingRegressor(n_estimators=1000, random_state=0)# loss='quantile',alpha=0.05)
         # regr = ensemble.BaggingRegressor(n_estimators=1000)
-        regr = ensemble.ExtraTreesRegressor(n_estimators=1000, random_state=0)
+        incremental = self.trees_per_batch > 0
+        regr = ensemble.ExtraTreesRegressor(n_estimators=self.trees_per_batch if incremental else self.trees,
+                                            warm_start=incremental, random_state=0)
+        fitted = False
+
         while True:
-            batch_size = min(self.batch_size, self.total_runs - len(eval_coords))
-            debug("+++++++ new iteration; batch size = %d" % batch_size, obj=self, level=6)
-            if len(uneval_params) == 0: break
-
-            debug('Initial eval cost %s' % str(eval_cost), obj=self)
-            eval_cost = [min(x, 100) for x in eval_cost]
-            debug('Eval cost %s' % str(eval_cost), obj=self)
-
-            X_train = pd.DataFrame(eval_params)   #.select_dtypes(include=[np.number,np.bool])
-            X_test = pd.DataFrame(uneval_params)
-            X_all = pd.concat(objs=[X_train, X_test], axis=0)
-            X_preprocessed = pd.get_dummies(X_all)   # one-hot encoding
-            X_train_preprocessed = X_preprocessed[:len(eval_params)]
-            X_test_preprocessed = X_preprocessed[len(eval_params):]
-            # Some parameters, notably CFLAGS are strings; we could convert them to one-hot encoding.
-            #X_train = pd.concat([X_train, pd.get_dummies(X_train['CFLAGS'], prefix='CFLAGS')], axis=1)
-
-            #X_train["CFLAGS_cat"] = X_train["CFLAGS"].astype('category').cat.codes  # convert to categorical
-            #X_train.drop(['CFLAGS'], axis=1, inplace=True)  # drop original CFLAGS, no longer needed
-            debug("Train:\n%s" % str(X_train_preprocessed), obj=self, level=6)
-            debug("Test:\n%s" % str(X_test_preprocessed), obj=self, level=6)
-            Y_train = np.array(eval_cost)
-            #X_test = pd.DataFrame(uneval_params)  #.select_dtypes(include=[np.number,np.bool])
-            #X_test["CFLAGS_cat"] = X_test["CFLAGS"].astype('category').cat.codes  # convert to categorical
-
-            # Train the model using the training sets
-            debug("X train shape: %s" % str(X_train_preprocessed.shape), obj=self, level=6)
-            debug("Y train shape: %s" % str(Y_train.shape), obj=self, level=6)
-            debug("X test shape: %s" % str(X_test_preprocessed.shape), obj=self, level=6)
-
-            regr.fit(X_train_preprocessed, 1.0 / Y_train)
-
-            pred = 1.0 / regr.predict(X_test_preprocessed)
-            indices = np.argsort(pred)[:batch_size]
-
-            # prepare the batch
-            batch_coords = []
-            batch_params = []
-            batch_cost = []
-
-            debug("Number of unevaluated coordinates: %d" % len(uneval_coords), obj=self, level=6)
-            debug("Number of unevaluated parameters: %d" % len(uneval_params), obj=self, level=6)
-            indices = sorted(indices, reverse=True)
-            for index in indices:
-                coords = uneval_coords.pop(index)
-                params = uneval_params.pop(index)
-                batch_coords.append(coords)
-                batch_params.append(params)
 
             # evaluate the batch
-            for i in range(len(batch_coords)):     #range(batch_size):
-                coord = batch_coords[i]
+            batch_perf_costs = yield from self.proposeCoords([uneval_coords[index] for index in indices])
+            evaluated[indices] = True
+            for index, perf_cost in zip(indices, batch_perf_costs):
+                coord = uneval_coords[index]
                 coord_key = str(coord)
-                params = batch_params[i]
-                mean_perf_cost = [self.MAXFLOAT]
+                params = uneval_params[index]
+                runs += 1
 
-                perf_costs = {}
                 try:
-                    perf_costs = self.getPerfCosts([coord])
-                except Exception as e:
-                    perf_costs[str(coords)] = [self.MAXFLOAT]
-                    info('FAILED: %s %s' % (e.__class__.__name__, e))
-                    fruns += 1
-
-                pcost_items = sorted(list(perf_costs.items()))
-                for i, (coord_str, pcost) in enumerate(pcost_items):
-                    if type(pcost) == tuple:
-                        (perf_cost, _) = pcost  # ignore transfer costs -- GPUs only
-                    else:
-                        perf_cost = pcost
+                    floatNums = [float(x) for x in perf_cost]
+                    mean_perf_cost = sum(floatNums) / len(perf_cost)
+                except:
+                    mean_perf_cost = perf_cost
 
-                    try:
-                        floatNums = [float(x) for x in perf_cost]
-                        mean_perf_cost = sum(floatNums) / len(perf_cost)
-                    except:
-                        mean_perf_cost = perf_cost
+                eval_indices.append(index)
+                eval_coords.append(coord)
+                eval_cost.append(mean_perf_cost)
 
-                batch_cost.append(mean_perf_cost)
                 transform_time = self.getTransformTime(coord_key)
                 compile_time = self.getCompileTime(coord_key)
 
@@ -313,7 +186,7 @@ class Mlsearch(orio.main.tuner.search.search.Search):
                 res_obj['transform_time'] = transform_time
                 res_obj['compile_time'] = compile_time
                 res_obj['cost'] = perf_cost
-                info('(run %s) |' % runs + json.dumps(res_obj))
+                info('(run %s) | ' % runs + json.dumps(res_obj))
 
                 if mean_perf_cost < best_perf_cost and mean_perf_cost > 0.0:
                     best_coord = coord
@@ -323,34 +196,65 @@ class Mlsearch(orio.main.tuner.search.search.Search):
 
                 if not math.isinf(mean_perf_cost):
                     sruns += 1
-                    # info('(run %s) sruns: %s, fruns: %s, coordinate: %s, perf_params: %s, transform_time: %s, compile_time: %s, cost: %s' % (runs, sruns, fruns, coord, p, transform_time, compile_time,mean_perf_cost))
-
-                if self.total_runs > 0 and runs >= self.total_runs: break
-                runs += 1
-
-            debug('# of predicted values:\n%s' % str(np.sort(pred)[:batch_size]),obj=self)
-            debug('# of observed values=%s, successful runs=%d, total_runs=%d' % (str(batch_cost), sruns, self.total_runs), obj=self)
+                else:
+                    fruns += 1
 
-            # add to the training set
-            eval_coords.extend(batch_coords)
-            eval_params.extend(batch_params)
-            eval_cost.extend(batch_cost)
+            debug('# of observed values=%s, successful runs=%d, total_runs=%d' %
+                  (str(eval_cost[-len(indices):]), sruns, self.total_runs), obj=self)
 
             # check if the time is up
-            # info('%s' % self.time_limit)
             if self.time_limit > 0 and (time.time() - start_time) > self.time_limit:
                 break
             # check if the maximum limit of runs is reached
             if self.total_runs > 0 and runs >= self.total_runs:
                 break
 
+            batch_size = min(self.batch_size, self.total_runs - runs) if self.total_runs > 0 else self.batch_size
+            uneval_indices = np.flatnonzero(~evaluated)
+            debug("+++++++ new iteration; batch size = %d, unevaluated coordinates = %d" %
+                  (batch_size, len(uneval_indices)), obj=self, level=6)
+            if len(uneval_indices) == 0: break
+
+            # Train the model using the training set
+            X_train = X_all[eval_indices]
+            Y_train = np.minimum(np.array(eval_cost, dtype=float), 100)
+            if hist_samples:
+                X_train = np.vstack([X_train, X_hist])
+                Y_train = np.concatenate([Y_train, np.minimum(Y_hist, 100)])
+            debug("X train shape: %s" % str(X_train.shape), obj=self, level=6)
+            if incremental and fitted:
+                regr.n_estimators += self.trees_per_batch
+            regr.fit(X_train, 1.0 / Y_train)
+            fitted = True
+
+            # predict the costs of the candidates (or of a random pool of them) and take the best ones
+            if self.pool_size > 0 and len(uneval_indices) > self.pool_size:
+                uneval_indices = np.array(sorted(random.sample(list(uneval_indices), self.pool_size)))
+            pred = 1.0 / regr.predict(X_all[uneval_indices])
+            best = np.argsort(pred)[:batch_size]
+            debug('# of predicted values:\n%s' % str(pred[best]), obj=self)
+            indices = list(uneval_indices[best])
+
         sort_ind = np.argsort(eval_cost)
         best_coord = eval_coords[sort_ind[0]]
         best_perf_cost = eval_cost[sort_ind[0]]
 
-        debug("eval_params: %s" % str(eval_params[sort_ind[0]]), obj=self, level=6)
+        debug("eval_params: %s" % str(uneval_params[eval_indices[sort_ind[0]]]), obj=self, level=6)
         debug("Best performance cost: %s" % str(best_perf_cost), obj=self, level=6)
         debug("Best coordinate: %s" % str(best_coord), obj=self, level=6)
+
+        # perform a local search on the best coordinate (its feasible neighbors are proposed in batches)
+        if self.local_distance > 0 and not math.isinf(best_perf_cost) and \
+                (self.time_limit <= 0 or (time.time() - start_time) <= self.time_limit):
+            coord, perf_cost = yield from self.proposeBestNeighbor(best_coord, self.local_distance)
+            try:
+                perf_cost = sum([float(x) for x in perf_cost]) / len(perf_cost)
+            except (TypeError, ZeroDivisionError):
+                perf_cost = self.MAXFLOAT
+            if perf_cost < best_perf_cost and perf_cost > 0.0:
+                best_coord = coord
+                best_perf_cost = perf_cost
+                info('>>>> best coordinate found (local search): %s, cost: %e' % (coord, perf_cost))
         end_time = time.time()
         search_time = start_time - end_time
         speedup = float(eval_cost[0]) / float(best_perf_cost)
@@ -386,36 +290,28 @@ class Mlsearch(orio.main.tuner.search.search.Search):
                         % (self.__class__.__name__, vname))
                 self.local_distance = rhs
 
+            # the sizes of the regression forest
+            elif vname in (self.__TREES, self.__TREES_PER_BATCH):
+                if not isinstance(rhs, int) or rhs < 0 or (vname == self.__TREES and rhs == 0):
+                    err('orio.main.tuner.search.mlsearch: %s argument "%s" must be a positive integer%s'
+                        % (self.__class__.__name__, vname, ' or zero' if vname == self.__TREES_PER_BATCH else ''))
+                setattr(self, vname, rhs)
+
+            # the number of candidates predicted for each batch
+            elif vname == self.__POOL_SIZE:
+                if not isinstance(rhs, int) or rhs < 0:
+                    err('orio.main.tuner.search.mlsearch: %s argument "%s" must be a positive integer or zero'
+                        % (self.__class__.__name__, vname))
+                self.pool_size = rhs
+
+            # whether the prior results are added to the training set
+            elif vname == self.__HISTORY:
+                if not isinstance(rhs, bool):
+                    err('orio.main.tuner.search.mlsearch: %s argument "%s" must be a boolean: True or False'
+                        % (self.__class__.__name__, vname))
+                self.history = rhs
+
             # unrecognized algorithm-specific argument
             else:
                 err('orio.main.tuner.search.randomsearch: unrecognized %s algorithm-specific argument: "%s"' %
                     (self.__class__.__name__, vname))
-
-    # --------------------------------------------------
-
-    def __getNextCoord(self, coord_records, neigh_coords, init):
-        '''Get the next coordinate to be empirically tested'''
-
-        # if len(coord_records) == 0:
-        #  return [0] * self.total_dims
-
-        # info('neighcoords: %s' % neigh_coords)
-        # check if all coordinates have been explored
-        if len(coord_records) >= self.space_size:
-            return None
-
-        # pick the next neighbor coordinate in the list (if exists)
-        while len(neigh_coords) > 0:
-            coord = neigh_coords.pop(0)
-            if str(coord) not in coord_records:
-                coord_records[str(coord)] = None
-                return coord
-
-        # randomly pick a coordinate that has never been explored before
-        while True:
-            coord = self.getRandomCoord()
-            if str(coord) not in coord_records:
-                coord_records[str(coord)] = None
-                return coord
-
-    # --------------------------------------------------
@@ -67,6 +67,13 @@ class MSimplex(orio.main.tuner.search.search.Search):
 
         # read all algorithm-specific arguments
         self.__readAlgoArgs()
+
+        # without an explicit x0, the initial simplex is built around the best coordinate of the prior
+        # tuning sessions (if any)
+        if self.__X0 not in self.search_opts:
+            seeds = self.warmStartCoords(1)
+            if seeds:
+                self.x0 = seeds[0]
         
         # complain if more than 1 value is given for the reflection, expansion, or contraction coefficient.
         if len(self.refl_coefs)!=1 or len(self.exp_coefs)!=1 or len(self.cont_coefs)!=1:
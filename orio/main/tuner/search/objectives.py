@@ -0,0 +1,141 @@
+#
+# The objectives of a multi-objective search: the scalarization the search engines minimize, and the
+# archive of the Pareto-optimal coordinates
+#
+
+import math
+from orio.main.util.globals import *
+from orio.main.tuner.search.coord_space import meanCost
+
+#-----------------------------------------------------
+
+# the metrics of a measured coordinate that can be objectives
+OBJECTIVES = ('time', 'energy', 'size', 'compile_time', 'transfer_time')
+
+class Objectives:
+    '''
+    The objectives of a search (see OBJECTIVES), all minimized:
+       time           the mean execution time of the tested code (seconds)
+       energy         the mean energy consumed by the processor packages while it runs, read from the
+                      RAPL counters (joules)
+       size           the size of the test executable (bytes)
+       compile_time   the time taken to build the test executable (seconds)
+       transfer_time  the mean data transfer time of GPU codes (seconds)
+    The search engines minimize the weighted product of the objectives, e.g., the energy-delay product
+    for the objectives ['time', 'energy'] with weights [1, 1] (so that the scalarization does not
+    depend on the units of the metrics); it is computed for each timing repetition, from the time
+    and energy of the repetition. The coordinates whose metrics are not dominated by those of
+    another coordinate are kept in a Pareto archive.
+    '''
+
+    def __init__(self, names=None, weights=None):
+        self.names = list(names or ['time'])
+        self.weights = [float(w) for w in (weights or [1.0] * len(self.names))]
+        self.archive = ParetoArchive()
+        self.__missing = set()   # the metrics found missing (reported once)
+
+    def __str__(self):
+        return ','.join(['%s^%g' % (n, w) for n, w in zip(self.names, self.weights)])
+
+    def isScalarized(self):
+        '''Return True if the cost of a coordinate is not just its execution time'''
+        return self.names != ['time'] or self.weights != [1.0]
+
+    #-----------------------------------------------------
+
+    def metrics(self, perf_cost, energies=None, size=None, compile_time=None):
+        '''
+        Return the metrics of a measured coordinate, a dictionary indexed by objective name (the
+        metrics that were not measured are missing)
+        @param perf_cost: the (times, transfer times) of the coordinate
+        @param energies: the energies of the timing repetitions (None if not measured, and for the
+                         repetitions whose energy could not be resolved)
+        '''
+        times, transfers = perf_cost
+        metrics = {'time': meanCost(times)}
+        if transfers and not [t for t in transfers if math.isinf(t)]:
+            metrics['transfer_time'] = meanCost(transfers)
+        measured = [e for e in (energies or []) if e is not None]
+        if measured:
+            metrics['energy'] = meanCost(measured)
+        if size is not None:
+            metrics['size'] = float(size)
+        if compile_time is not None:
+            metrics['compile_time'] = float(compile_time)
+        return metrics
+
+    def vector(self, metrics):
+        '''Return the list of the objectives of a coordinate, or None if one of them is missing'''
+        if [n for n in self.names if n not in metrics]:
+            return None
+        return [metrics[n] for n in self.names]
+
+    def scalarize(self, perf_cost, metrics, energies=None):
+        '''
+        Return the (costs, transfer times) of a measured coordinate, where the cost of each timing
+        repetition is the weighted product of its objectives; a missing metric is left out of the
+        product (with a warning)
+        '''
+        times, transfers = perf_cost
+        costs = []
+        for i, t in enumerate(times):
+            if math.isinf(t):
+                costs.append(t)
+                continue
+            cost = 1.0
+            for name, weight in zip(self.names, self.weights):
+                if name == 'time':
+                    value = t
+                elif name == 'energy' and 'energy' in metrics:
+                    # the mean energy for the repetitions whose energy is unknown
+                    energy = energies[i] if i < len(energies) else None
+                    value = metrics['energy'] if energy is None else energy
+                elif name in metrics:
+                    value = metrics[name]
+                else:
+                    self.__warnMissing(name)
+                    continue
+                cost *= max(value, 0.0) ** weight
+            costs.append(cost)
+        return (costs, transfers)
+
+    def __warnMissing(self, name):
+        if name not in self.__missing:
+            self.__missing.add(name)
+            if name == 'energy':
+                warn('orio.main.tuner.search.objectives: the energy could not be measured (no readable RAPL ' +
+                     'counters in /sys/class/powercap), it is left out of the search objective')
+            else:
+                warn('orio.main.tuner.search.objectives: the %s of some coordinates is unknown, it is left out ' % name +
+                     'of their search objective')
+
+#-----------------------------------------------------
+
+def dominates(vector1, vector2):
+    '''Return True if the objectives vector1 are all lower or equal, and one is lower, than vector2'''
+    return all([x <= y for x, y in zip(vector1, vector2)]) and any([x < y for x, y in zip(vector1, vector2)])
+
+class ParetoArchive:
+    '''The Pareto-optimal coordinates found so far, with their objectives'''
+
+    def __init__(self):
+        self.entries = {}   # coordinate key -> objectives
+
+    def add(self, coord_key, vector):
+        '''Add a coordinate, unless it is dominated; remove the coordinates it dominates'''
+        if [v for v in vector if math.isinf(v) or math.isnan(v)]:
+            return False
+        for other in self.entries.values():
+            if dominates(other, vector) or other == vector:
+                return False
+        for key in [k for k, other in self.entries.items() if dominates(vector, other)]:
+            del self.entries[key]
+        self.entries[coord_key] = list(vector)
+        return True
+
+    def front(self):
+        '''Return the (coordinate key, objectives) pairs of the Pareto front, ordered by objectives'''
+        return sorted(self.entries.items(), key=lambda e: e[1])
+
+    def __len__(self):
+        return len(self.entries)
@@ -6,6 +6,7 @@ import sys, time
 import math
 import random
 import orio.main.tuner.search.search
+from orio.main.tuner.result_stream import coordFromKey
 from orio.main.util.globals import *
 
 
@@ -62,8 +63,9 @@ class Randomlocal(orio.main.tuner.search.search.Search):
         # initialize a storage to remember all coordinates that have been explored
         coord_records = {}
 
-        # initialize a list to store the neighboring coordinates
-        neigh_coords = []
+        # initialize a list of the (lazy) generators of the neighboring coordinates to explore, the
+        # coordinates seeded from prior tuning sessions (if any) first
+        neigh_coords = [iter(self.warmStartCoords())]
 
         # record the best coordinate and its best performance cost
         best_coord = None
@@ -119,7 +121,7 @@ class Randomlocal(orio.main.tuner.search.search.Search):
                     (perf_cost, _) = pcost  # ignore transfer costs -- GPUs only
                 else:
                     perf_cost = pcost
-                coord_val = eval(coord_str)
+                coord_val = coordFromKey(coord_str)
                 # info('%s %s' % (coord_val,perf_cost))
                 perf_params = self.coordToPerfParams(coord_val)
                 try:
@@ -136,9 +138,10 @@ class Randomlocal(orio.main.tuner.search.search.Search):
                     best_perf_cost = mean_perf_cost
                     info('>>>> best coordinate found: %s, cost: %e' % (coord_val, mean_perf_cost))
 
-            # if a better coordinate is found, explore the neighboring coordinates
-            if False and old_perf_cost != best_perf_cost:
-                neigh_coords.extend(self.getNeighbors(best_coord, self.local_distance))
+            # if a better coordinate is found, explore the feasible neighboring coordinates (in a random
+            # order, generated as they are needed)
+            if self.local_distance > 0 and best_coord is not None and old_perf_cost != best_perf_cost:
+                neigh_coords.append(self.iterNeighbors(best_coord, self.local_distance, randomized=True))
                 old_perf_cost = best_perf_cost
 
             # increment the number of runs
@@ -209,12 +212,13 @@ class Randomlocal(orio.main.tuner.search.search.Search):
         if len(coord_records) >= self.space_size:
             return None
 
-        # pick the next neighbor coordinate in the list (if exists)
+        # pick the next neighbor coordinate of the oldest generator that has one left (if exists)
         while len(neigh_coords) > 0:
-            coord = neigh_coords.pop(0)
-            if str(coord) not in coord_records:
-                coord_records[str(coord)] = None
-                return coord
+            for coord in neigh_coords[0]:
+                if str(coord) not in coord_records:
+                    coord_records[str(coord)] = None
+                    return coord
+            neigh_coords.pop(0)
 
         # randomly pick a coordinate that has never been explored before
         while init:
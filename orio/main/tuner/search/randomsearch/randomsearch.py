@@ -6,6 +6,7 @@ import sys, time
 import math
 import random
 import orio.main.tuner.search.search
+from orio.main.tuner.result_stream import coordFromKey
 from orio.main.util.globals import *
 import copy
 import json
@@ -59,21 +60,9 @@ class Randomsearch(orio.main.tuner.search.search.Search):
 
         info('\n----- begin random search -----')
 
-        # get the total number of coordinates to be tested at the same time
-        coord_count = 1
-        if self.use_parallel_search:
-            coord_count = self.num_procs
-
-        # initialize a storage to remember all coordinates that have been explored
-        coord_records = {}
-
-        # initialize a list to store the neighboring coordinates
-        neigh_coords = []
-
         # record the best coordinate and its best performance cost
         best_coord = None
         best_perf_cost = self.MAXFLOAT
-        old_perf_cost = best_perf_cost
 
         # record the number of runs
         runs = 0
@@ -82,7 +71,6 @@ class Randomsearch(orio.main.tuner.search.search.Search):
 
         # start the timer
         start_time = time.time()
-        init = True
 
 
         # randomly pick coordinates to be empirically tested
@@ -90,45 +78,20 @@ class Randomsearch(orio.main.tuner.search.search.Search):
         uneval_coords = []
         uneval_params = []
 
-        #default code without transformation
-        neigh_coords=[[0]*self.total_dims]
-
-        while len(uneval_coords) < self.init_samp and len(uneval_coords) <= self.total_runs:
-            coord = self.__getNextCoord(coord_records, neigh_coords, init)
-            coord_key = str(coord)
-
-            if not coord or len(coord) == 0:
-                break
-
-            # TODO: the valid point generation is extremely slow, reimplement
-            if coord_key not in coords:
-                coords[coord_key]=coord
-                # if the given coordinate is out of the search space
-                is_out = False
-                for i in range(0, self.total_dims):
-                    if coord[i] < 0 or coord[i] >= self.dim_uplimits[i]:
-                        is_out = True
-                        break
-                if is_out:
-                    continue
-                # test if the performance parameters are valid
-                perf_params = self.coordToPerfParams(coord)
-                perf_params1=copy.copy(perf_params)
-
-                try:
-                    is_valid = eval(self.constraint, perf_params1, dict(self.input_params))
-                except Exception as e:
-                    err('failed to evaluate the constraint expression: "%s"\n%s %s' % (self.constraint,e.__class__.__name__, e))
-                # if invalid performance parameters
-                if not is_valid:
-                    continue
-
-                temp=[]
-                for k in sorted(perf_params):
-                    temp.append(perf_params[k])
-                debug('sample-point:'+str(coord),obj=self,level=6)
-                uneval_coords.append(coord)
-                uneval_params.append(perf_params)
+        # the default code without transformation, the coordinates seeded from prior tuning sessions
+        # (if any), then valid coordinates picked at random
+        num_samples = min(self.init_samp, self.total_runs + 1)
+        default_coord = [0] * self.total_dims
+        if self.feasible_space.isValidCoord(default_coord):
+            uneval_coords.append(default_coord)
+        uneval_coords += [c for c in self.warmStartCoords() if c not in uneval_coords]
+        num_init = len(uneval_coords)
+        uneval_coords += self.feasible_space.sample(num_samples - len(uneval_coords),
+                                                    exclude=[str(c) for c in uneval_coords] + [str(default_coord)])
+        for coord in uneval_coords:
+            coords[str(coord)] = coord
+            uneval_params.append(self.coordToPerfParams(coord))
+            debug('sample-point:'+str(coord),obj=self,level=6)
 
 
         info('Size of search space: ' + str(len(coords)))
@@ -140,8 +103,9 @@ class Randomsearch(orio.main.tuner.search.search.Search):
         eval_cost = []
         num_eval_best=0
 
-        indices=random.sample(list(range(1,len(uneval_coords))),  self.total_dims)
-        indices.insert(0,0)
+        indices=random.sample(list(range(max(1,num_init),len(uneval_coords))),
+                              min(self.total_dims, len(uneval_coords) - max(1,num_init)))
+        indices = list(range(max(1,num_init))) + indices
         debug(msg='Current indices: ' + str(indices), obj=self, level=2)
         
 
@@ -317,7 +281,7 @@ class Randomsearch(orio.main.tuner.search.search.Search):
             for i, (coord_str, pcost) in enumerate(pcost_items):
                 if type(pcost) == tuple: (perf_cost,_) = pcost    # ignore transfer costs -- GPUs only
                 else: perf_cost = pcost
-                coord_val = eval(coord_str)
+                coord_val = coordFromKey(coord_str)
                 #info('%s %s' % (coord_val,perf_cost))
                 perf_params = self.coordToPerfParams(coord_val)
                 try:
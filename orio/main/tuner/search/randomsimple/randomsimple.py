@@ -71,7 +71,7 @@ class Randomsimple(orio.main.tuner.search.search.Search):
     def checkValidity(self, coord):
         perf_params = self.coordToPerfParams(coord)
         try:
-            is_valid = eval(self.constraint, perf_params, dict(self.input_params))
+            is_valid = self.feasible_space.isValid(perf_params)
         except Exception as e:
             err('failed to evaluate the constraint expression: "%s"\n%s %s' % (
             self.constraint, e.__class__.__name__, e))
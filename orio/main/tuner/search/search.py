@@ -1,8 +1,16 @@
 #
 # The search engine used for search space exploration
 #
-import sys, math, time
+import sys, math, time, re, hashlib, itertools, random
 from orio.main.util.globals import *
+from orio.main.tuner.result_cache import ResultCache, codeFragsSource, hostFingerprint
+from orio.main.tuner.result_stream import sessionResultsFile, coordFromKey
+from orio.main.tuner.checkpoint import sessionCheckpoint
+from orio.main.tuner.warm_start import sessionPriorResults
+from orio.main.tuner.codegen_pool import CodeGenPool, transformCode
+from orio.main.tuner.search.feasible_space import FeasibleSpace
+from orio.main.tuner.search.coord_space import CoordSpace, CostTable, meanCost
+from orio.main.tuner.search.objectives import Objectives
 from functools import reduce
 
 class Search:
@@ -30,6 +38,9 @@ class Search:
         if 'search_opts' in list(params.keys()): self.search_opts = params['search_opts']
         else: self.search_opts = {}
 
+        # the objectives minimized by the search (their weighted product), and their Pareto archive
+        self.objectives = Objectives(params.get('search_objectives'), params.get('search_objective_weights'))
+
         if 'axis_names' in list(params.keys()): 
             self.total_dims = len(params['axis_names'])
         else: 
@@ -42,11 +53,36 @@ class Search:
         self.space_size = 0
         if self.total_dims > 0:
             self.space_size = reduce(lambda x,y: x*y, self.dim_uplimits, 1)
+        self.coord_space = CoordSpace(self.dim_uplimits)
         
         if 'use_parallel_search' in list(params.keys()): self.use_parallel_search = params['use_parallel_search']
         else: self.use_parallel_search = False
         if 'ptdriver' in list(params.keys()): self.num_procs = params['ptdriver'].tinfo.num_procs
         else: self.num_procs = 1
+        if 'ptdriver' in list(params.keys()): self.num_workers = params['ptdriver'].num_workers
+        else: self.num_workers = 1
+        if 'ptdriver' in list(params.keys()): self.variants_per_binary = params['ptdriver'].variants_per_binary
+        else: self.variants_per_binary = 1
+        if 'ptdriver' in list(params.keys()): self.shared_libs = params['ptdriver'].shared_libs
+        else: self.shared_libs = False
+
+        # the number of coordinates an ask/tell search engine should propose at once: enough to keep
+        # the parallel search processes, or the build workers and multi-variant test executables, busy
+        if self.use_parallel_search:
+            self.batch_size = self.num_procs
+        else:
+            self.batch_size = self.num_workers * self.variants_per_binary
+            # with code transformation worker processes, enough coordinates for them to go on
+            # transforming while the codes transformed so far are built and measured
+            if Globals().codegen_procs > 1:
+                self.batch_size = max(self.batch_size, 2 * Globals().codegen_procs)
+
+        # the state of the ask/tell interface
+        self.__proposals = None       # the running proposals generator
+        self.__queued = []            # coordinates proposed but not asked yet
+        self.__pending = set()        # keys of the asked coordinates whose costs are not known yet
+        self.__told = {}              # the performance costs of the current batch of proposals
+        self.search_result = None     # the value returned by the proposals generator
         
         # the class variables that may be ignored when developing a new search engine subclass
         if 'cfrags' in list(params.keys()): self.cfrags = params['cfrags']
@@ -64,14 +100,58 @@ class Search:
         if 'odriver' in list(params.keys()): self.odriver = params['odriver']
         else: self.odriver = None
         self.input_params = params.get('input_params')
+
+        # the constraint, compiled once, and the coordinates that satisfy it
+        self.feasible_space = None
+        if self.axis_names is not None:
+            self.feasible_space = FeasibleSpace(self.axis_names, self.axis_val_ranges, self.constraint,
+                                                self.input_params)
         
         self.timing_code = ''
 
         self.verbose = Globals().verbose
-        self.perf_cost_records = {}
+        self.perf_cost_records = {}   # rank of an evaluated coordinate -> its (times, transfer times)
+        self.metric_records = {}      # rank of an evaluated coordinate -> its metrics (multi-objective searches)
+        self.cost_table = CostTable(self.space_size)   # rank of an evaluated coordinate -> its mean cost
         self.transform_time={}
         self.best_coord_info="None"
 
+        # coordinates whose transformed code is identical share a single measurement
+        self.variant_records = {}     # variant key -> rank of the measured coordinate
+        self.num_transformed = 0      # number of transformed coordinates
+        self.num_equivalent = 0       # how many of them reused the measurement of an equivalent variant
+
+        # the lowest (mean) cost measured so far, used to price tests that exceed the run timeout
+        self.best_measured_cost = self.MAXFLOAT
+        self.num_timed_out = 0        # number of coordinates whose test exceeded the run timeout
+
+        # performance costs measured in previous tuning sessions (if enabled)
+        self.result_cache = None
+        if Globals().cache_dir and self.ptdriver and self.cfrags is not None:
+            tinfo = self.ptdriver.tinfo
+            self.result_cache = ResultCache(Globals().cache_dir,
+                                            [codeFragsSource(self.cfrags), str(tinfo.build_cmd), str(tinfo.libs),
+                                             self.ptdriver.extra_compiler_opts, Globals().pre_cmd,
+                                             str(sorted(self.input_params or [])), hostFingerprint(),
+                                             str(self.objectives), self.ptdriver.compilerVersion(tinfo.build_cmd)])
+
+        # the per-session record of every measured coordinate (if any)
+        self.results_file = sessionResultsFile()
+
+        # the checkpoint of the session, and the performance costs recorded in it by an interrupted
+        # session of the same search (see search)
+        self.checkpoint = sessionCheckpoint()
+        self.checkpoint_key = None
+        self.resumed_costs = {}
+        self.resumed_metrics = {}
+
+        # the code transformation worker processes (created by the first batch, see __transformCoords)
+        self.codegen_pool = None
+
+        # the results of prior tuning sessions that seed the search (see warmStartCoords)
+        self.prior_results = sessionPriorResults()
+        self.__prior_samples = None
+
         # TODO pass it as an option
         #        if 'use_z3' in params.keys():
         try:
@@ -107,6 +187,97 @@ class Search:
         '''
         return False
     
+    #----------------------------------------------------------
+    # The ask/tell interface: a search engine that implements proposals() does not evaluate the
+    # coordinates it explores itself, it proposes them in batches (ask) and is given their costs (tell),
+    # so that any evaluator can measure a whole batch concurrently.
+
+    def proposals(self):
+        '''
+        The search algorithm of an ask/tell search engine, written as a generator. It yields lists of
+        coordinates to be evaluated and receives, as the value of each yield expression, the dictionary
+        of their performance costs indexed by coordinate string (in the format returned by getPerfCosts).
+        Its return value is the one of searchBestCoord: (best coordinate, best performance cost,
+        search time, number of runs).
+        '''
+        raise NotImplementedError('%s: unimplemented abstract function "proposals"' %
+                                  self.__class__.__name__)
+
+    def proposeCoords(self, coords):
+        '''
+        Propose the given coordinates from a proposals generator (with "yield from") and return the
+        list of their performance costs (the times of all repetitions), in the same order.
+        '''
+        unique_coords = []
+        for coord in coords:
+            if coord not in unique_coords:
+                unique_coords.append(coord)
+        perf_costs = yield unique_coords
+        costs = []
+        for coord in coords:
+            pcost = perf_costs.get(str(coord), ([self.MAXFLOAT], [self.MAXFLOAT]))
+            costs.append(pcost[0] if isinstance(pcost, tuple) else pcost)
+        return costs
+
+    def __advance(self, perf_costs):
+        '''Resume the proposals generator with the performance costs of its last batch'''
+        try:
+            batch = self.__proposals.send(perf_costs)
+            while not batch:
+                batch = self.__proposals.send({})
+            self.__queued = list(batch)
+        except StopIteration as e:
+            self.search_result = e.value
+            self.__queued = []
+        self.__told = {}
+
+    def ask(self, count=None):
+        '''
+        Return up to count (default: batch_size) coordinates whose performance costs the search needs,
+        or an empty list if the search is over (its result is then in search_result) or if it waits
+        for the costs of coordinates asked before.
+        '''
+        if self.__proposals is None:
+            self.__proposals = self.proposals()
+            self.__advance(None)
+        count = count or self.batch_size
+        batch = self.__queued[:count]
+        del self.__queued[:count]
+        self.__pending.update([str(c) for c in batch])
+        return batch
+
+    def tell(self, perf_costs):
+        '''
+        Report the performance costs (a dictionary indexed by coordinate string) of coordinates returned
+        by ask, in any order and grouping. The search proceeds once all the asked coordinates are known.
+        '''
+        for coord_key, pcost in perf_costs.items():
+            self.__pending.discard(coord_key)
+            self.__told[coord_key] = pcost
+        if not self.__pending and not self.__queued and self.__proposals is not None:
+            self.__advance(self.__told)
+
+    def askTellSearch(self):
+        '''Run the search of an ask/tell engine, evaluating each batch it asks for with getPerfCosts'''
+        while True:
+            coords = self.ask()
+            if not coords:
+                break
+            perf_costs = self.getPerfCosts(coords)
+            for coord in coords:
+                perf_costs.setdefault(str(coord), ([self.MAXFLOAT], [self.MAXFLOAT]))
+            self.tell(perf_costs)
+        return self.search_result
+
+    def runProposals(self, proposals):
+        '''Evaluate the batches of coordinates of a proposals generator, return its return value'''
+        try:
+            coords = next(proposals)
+            while True:
+                coords = proposals.send(self.getPerfCosts(coords) if coords else {})
+        except StopIteration as e:
+            return e.value
+
     #----------------------------------------------------------
 
     def search(self, startCoord=None):
@@ -117,6 +288,17 @@ class Search:
             return {}
 
 
+        # checkpoint the search from its start or, if it was interrupted, restore its random state and
+        # the performance costs it got: the search replays its steps up to where it stopped
+        if self.checkpoint and not Globals().extern:
+            self.checkpoint_key = self.checkpoint.searchKey(
+                [self.__class__.__name__, str(self.axis_names), str(self.axis_val_ranges), str(self.constraint),
+                 str(sorted(self.input_params or [])), str(sorted(self.search_opts.items())), str(self.objectives)])
+            self.resumed_costs = self.checkpoint.start(self.checkpoint_key)
+            self.resumed_metrics = self.checkpoint.metrics(self.checkpoint_key)
+            if self.resumed_costs:
+                info('resuming the search from %d performance costs of the checkpoint' % len(self.resumed_costs))
+
         if self.resume:
             startCoord = self.search_opts.get('start_coord')
             if not isinstance(startCoord,list):
@@ -125,7 +307,10 @@ class Search:
                 startCoord = self.__findLastCoord()
 
         # find the coordinate resulting in the best performance
-        best_coord,best_perf,search_time,runs = self.searchBestCoord(startCoord)
+        try:
+            best_coord,best_perf,search_time,runs = self.searchBestCoord(startCoord)
+        finally:
+            self.close()
         corr_transfer = self.MAXFLOAT
         if isinstance(best_perf,tuple): #unpack optionally
             corr_transfer = best_perf[1]
@@ -133,15 +318,39 @@ class Search:
 
         # if no best coordinate can be found
         if best_coord == None:
-            err ('the search cannot find a valid set of performance parameters. ' +
-                 'the search time limit might be too short, or the performance parameter ' +
-                 'constraints might prune out the entire search space.')
+            # the tuning cannot go on without performance parameters (an external search uses its own)
+            if self.num_timed_out > 0:
+                err('the search cannot find a valid set of performance parameters: the tests of %d coordinates ' %
+                    self.num_timed_out + 'exceeded the run timeout (run_timeout = %s seconds), which is likely ' %
+                    self.ptdriver.tinfo.run_timeout + 'too short for the tested code.', doexit=not Globals().extern)
+            else:
+                err ('the search cannot find a valid set of performance parameters. ' +
+                     'the search time limit might be too short, or the performance parameter ' +
+                     'constraints might prune out the entire search space.', doexit=not Globals().extern)
         else:
             self.best_coord_info = '%s=%s, cost=%e, transfer_time=%e, inputs=%s, search_space=%1.3e, search_time=%.2f, runs=%d' \
                                    % (best_coord, self.coordToPerfParams(best_coord), best_perf, corr_transfer, str(self.input_params), \
                                    self.space_size, search_time, runs)
             info('----- begin summary -----')
             info(' best coordinate: %s' % self.best_coord_info)
+            if self.result_cache:
+                info(' result cache hits: %d' % self.result_cache.hits)
+            if self.ptdriver.exe_cache:
+                info(' executable cache hits: %d' % self.ptdriver.exe_cache.hits)
+            if self.ptdriver.adaptive_reps and self.ptdriver.adaptive_reps.num_runs > 0:
+                areps = self.ptdriver.adaptive_reps
+                info(' adaptive repetitions: %d in %d runs (%.1f per run), %d runs stopped early' %
+                     (areps.num_samples, areps.num_runs, float(areps.num_samples) / areps.num_runs, areps.num_stopped))
+            if self.num_transformed > 0:
+                info(' equivalent variants: %d of %d transformed coordinates (%.1f%%) reused another measurement' %
+                     (self.num_equivalent, self.num_transformed, 100.0 * self.num_equivalent / self.num_transformed))
+            if self.objectives.isScalarized():
+                info(' objective: %s' % self.objectives)
+                front = self.objectives.archive.front()
+                info(' Pareto-optimal coordinates (%s):%s' % (', '.join(self.objectives.names), '' if front else ' none'))
+                for coord_key, vector in front:
+                    info('  %s=%s, %s' % (coord_key, self.coordToPerfParams(coordFromKey(coord_key)),
+                                          ', '.join(['%s=%e' % nv for nv in zip(self.objectives.names, vector)])))
             info('----- end summary -----')
 
                 
@@ -207,6 +416,121 @@ class Search:
             compile_time=self.ptdriver.compile_time[key]
         return compile_time
     
+    def __recordCost(self, coord_key, perf_cost, metrics=None):
+        '''
+        Remember the performance cost of an evaluated coordinate, indexed by its rank, and add the
+        coordinate to the Pareto archive if its metrics are known
+        '''
+        try:
+            rank = self.coord_space.rankOfKey(coord_key)
+        except ValueError:
+            return
+        self.perf_cost_records[rank] = perf_cost
+        self.cost_table[rank] = meanCost(perf_cost)
+        if metrics is not None:
+            self.metric_records[rank] = metrics
+            vector = self.objectives.vector(metrics)
+            if vector is not None:
+                self.objectives.archive.add(coord_key, vector)
+
+    def rankedCoords(self):
+        '''Return the successfully measured coordinates, from the lowest to the highest mean cost'''
+        return [self.coord_space.unrank(r) for r in self.cost_table.ranked()]
+
+    def __recordResult(self, coord_key, perf_params, perf_cost, status, measured_key=None):
+        '''
+        Append the (times, transfer times) of a coordinate to the results file of the session, with
+        the energies and executable size of its test (or of the test of measured_key, if it reused the
+        measurement of an equivalent coordinate)
+        '''
+        if self.results_file is None or not isinstance(perf_cost, tuple):
+            return
+        times, transfers = perf_cost
+        energies = binary_size = None
+        if status != 'cached':
+            energies = self.ptdriver.energy.get(measured_key or coord_key)
+            binary_size = self.ptdriver.binary_size.get(measured_key or coord_key)
+        self.results_file.record(coord_key, perf_params, self.input_params, times, transfers,
+                                 compile_time=self.getCompileTime(coord_key),
+                                 transform_time=self.getTransformTime(coord_key), status=status,
+                                 energies=energies, binary_size=binary_size)
+
+    def __scalarize(self, coord_key, perf_cost):
+        '''
+        Return the cost of a measured coordinate minimized by the search, the weighted product of its
+        objectives, and its metrics (None if the cost is just the execution time)
+        '''
+        if not self.objectives.isScalarized() or not isinstance(perf_cost, tuple) or not perf_cost[0]:
+            return perf_cost, None
+        energies = self.ptdriver.energy.get(coord_key)
+        metrics = self.objectives.metrics(perf_cost, energies, self.ptdriver.binary_size.get(coord_key),
+                                          self.ptdriver.compile_time.get(coord_key))
+        return self.objectives.scalarize(perf_cost, metrics, energies), metrics
+
+    def __checkpointCost(self, coord_key, perf_cost, metrics=None):
+        '''Record the (times, transfer times) of a coordinate, and its metrics, in the checkpoint of the search'''
+        if self.checkpoint_key is None or not isinstance(perf_cost, tuple):
+            return
+        self.checkpoint.record(self.checkpoint_key, coord_key, perf_cost, metrics)
+
+    #----------------------------------------------------------
+
+    def timeoutPerfCost(self):
+        '''
+        Return the performance cost assigned to a test that exceeded the run timeout: timeout_penalty
+        times the best cost measured so far, or an infinite cost if there is no penalty factor (or no
+        measurement yet)
+        '''
+        penalty = self.ptdriver.tinfo.timeout_penalty
+        if not penalty or self.best_measured_cost == self.MAXFLOAT:
+            return ([self.MAXFLOAT],[self.MAXFLOAT])
+        return ([penalty * self.best_measured_cost],[self.MAXFLOAT])
+
+    #----------------------------------------------------------
+
+    def variantKey(self, transformed_code, externals, perf_params):
+        '''
+        Return a hash identifying the test built for a transformed code: coordinates with the same key
+        generate the same code, compile it with the same command and run it with the same arguments
+        '''
+        code = transformed_code
+        if self.ptdriver.language != 'fortran':
+            code = re.sub(r'/\*.*?\*/', ' ', code, flags=re.S)   # annotations echo the parameter values
+            code = re.sub(r'//[^\n]*', ' ', code)
+        code = ' '.join(code.split())
+        cmdline_params = sorted([(k, str(v)) for k, v in perf_params.items() if k.startswith('__cmdline_')])
+        key = '\0'.join([code, repr(externals), self.ptdriver.expandBuildCmd(perf_params), repr(cmdline_params)])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    #----------------------------------------------------------
+
+    def __groupVariants(self, code_map, code_coords):
+        '''
+        Split the coordinates of code_map into groups of at most variants_per_binary coordinates whose
+        variants can be timed by the same test executable (same build command, command-line arguments
+        and externals)
+        '''
+        groups = {}
+        for k, (tcode, externals) in code_map.items():
+            perf_params = self.coordToPerfParams(code_coords[k])
+            cmdline_params = sorted([(n, str(v)) for n, v in perf_params.items() if n.startswith('__cmdline_')])
+            group_key = (self.ptdriver.expandBuildCmd(perf_params), repr(cmdline_params), externals)
+            groups.setdefault(group_key, []).append(k)
+
+        variant_groups = []
+        for keys in groups.values():
+            for i in range(0, len(keys), self.variants_per_binary):
+                variant_groups.append(keys[i:i + self.variants_per_binary])
+        return variant_groups
+
+    #----------------------------------------------------------
+
+    def close(self):
+        '''Stop the code transformation worker processes of the search (if any were started)'''
+        if self.codegen_pool:
+            self.codegen_pool.close()
+            self.codegen_pool = None
+
     #----------------------------------------------------------
 
     def getPerfCosts(self, coords):
@@ -225,18 +549,14 @@ class Search:
             coord_key = str(coord)
 
             # if the given coordinate is out of the search space
-            is_out = False
-            for i in range(0, self.total_dims):
-                if coord[i] < 0 or coord[i] >= self.dim_uplimits[i]:
-                    is_out = True
-                    break
-            if is_out:
+            if not self.coord_space.contains(coord):
                 perf_costs[coord_key] = ([self.MAXFLOAT],[self.MAXFLOAT])
                 continue
 
             # if the given coordinate has been computed before
-            if coord_key in self.perf_cost_records:
-                perf_costs[coord_key] = self.perf_cost_records[coord_key]
+            coord_rank = self.coord_space.rank(coord)
+            if coord_rank in self.perf_cost_records:
+                perf_costs[coord_key] = self.perf_cost_records[coord_rank]
                 continue
 
             # get the performance parameters
@@ -245,7 +565,7 @@ class Search:
             
             # test if the performance parameters are valid
             try:
-                is_valid = eval(self.constraint, perf_params, dict(self.input_params))
+                is_valid = self.feasible_space.isValid(perf_params)
             except Exception as e:
                 err('failed to evaluate the constraint expression: "%s"\n%s %s' % (self.constraint,e.__class__.__name__, e))
 
@@ -254,6 +574,24 @@ class Search:
                 perf_costs[coord_key] = ([self.MAXFLOAT],[self.MAXFLOAT])
                 continue
 
+            # if the given coordinate has been measured before the search was interrupted
+            if coord_key in self.resumed_costs:
+                resumed_cost = tuple(self.resumed_costs[coord_key])
+                self.__recordCost(coord_key, resumed_cost, self.resumed_metrics.get(coord_key))
+                perf_costs[coord_key] = resumed_cost
+                self.__recordResult(coord_key, perf_params, resumed_cost, 'cached')
+                continue
+
+            # if the given coordinate has been measured in a previous tuning session
+            if self.result_cache:
+                cached_cost, cached_metrics = self.result_cache.lookup(perf_params, with_metrics=True)
+                if cached_cost is not None:
+                    self.__recordCost(coord_key, cached_cost, cached_metrics)
+                    perf_costs[coord_key] = cached_cost
+                    self.__recordResult(coord_key, perf_params, cached_cost, 'cached')
+                    self.__checkpointCost(coord_key, cached_cost, cached_metrics)
+                    continue
+
             # store all unevaluated coordinates
             uneval_coords.append(coord)
 
@@ -272,10 +610,55 @@ class Search:
             _ = self.ptdriver.run(instrumented_code)
             Globals().executedOriginal = True
         
-        # get the transformed code for each corresponding coordinate for non-command-line parameters
+        # get the transformed code for each corresponding coordinate for non-command-line parameters; with
+        # code transformation worker processes, the coordinates transformed so far are measured in chunks
+        # while the workers transform the next ones
+        transformed_coords = self.__transformCoords(uneval_coords)
+        chunk_size = len(uneval_coords)
+        if self.codegen_pool and not self.use_parallel_search:
+            chunk_size = max(1, self.num_workers * self.variants_per_binary)
+        while True:
+            chunk = list(itertools.islice(transformed_coords, chunk_size))
+            if not chunk:
+                break
+            self.__measureChunk(chunk, perf_costs)
+        return perf_costs
+
+    #----------------------------------------------------------
+
+    def __transformCoords(self, coords):
+        '''
+        Generate the (coordinate, transformed code sequence, transformation time, error) of each of the
+        given coordinates, in order: transformed by the code transformation worker processes (if any) as
+        fast as they can, or else one at a time in this process when the coordinate is needed
+        '''
+        if self.modelBased():
+            for coord in coords:
+                yield coord, None, 0.0, None
+            return
+        if Globals().codegen_procs > 1 and len(coords) > 1 and self.codegen_pool is None and CodeGenPool.isAvailable():
+            self.codegen_pool = CodeGenPool(self.odriver, self.cfrags, Globals().codegen_procs)
+        if self.codegen_pool:
+            results = self.codegen_pool.imap([self.coordToPerfParams(coord) for coord in coords])
+            for coord, (transformed_code_seq, elapsed, error, metadata) in zip(coords, results):
+                # the metadata of the test code, as if the coordinate was transformed in this process
+                Globals().metadata.update(metadata)
+                yield coord, transformed_code_seq, elapsed, error
+            return
+        for coord in coords:
+            transformed_code_seq, elapsed, error = transformCode(self.odriver, self.cfrags, self.coordToPerfParams(coord))
+            yield coord, transformed_code_seq, elapsed, error
+
+    def __measureChunk(self, chunk, perf_costs):
+        '''
+        Measure the performance costs of a chunk of transformed coordinates (see __transformCoords),
+        and add them to perf_costs
+        '''
         code_map = {}
-        transformed_code_seq = []
-        for coord in uneval_coords:
+        code_coords = {}
+        equivalent_coords = {}   # coordinate key -> key of an equivalent coordinate measured in this batch
+        batch_variants = {}
+        for coord, transformed_code_seq, elapsed, error in chunk:
             if not Globals().disable_orio: always_print('.',end='')
             coord_key = str(coord)
             
@@ -288,25 +671,13 @@ class Search:
                 #self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
                 continue
             else: # Legacy, pure empirical
-                start = time.time()
-                #info('1. transformation time = %e'%time.time())
-                try:
-                    transformed_code_seq = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
-                    elapsed = (time.time() - start)
-                    #info('2. transformation time = %e'%time.time())
-                    self.transform_time[coord_key]=elapsed
-                except Exception:
+                self.transform_time[coord_key]=elapsed
+                if error is not None:
                     err('[search] failed evaluation of coordinate: %s=%s.\tException: %s' %\
-                        (str(coord), str(perf_params), str(sys.exc_info()[0])))
+                        (str(coord), str(perf_params), error))
                     # Do not stop if a single test fails, continue with other transformations
-                    #err('failed during evaluation of coordinate: %s=%s\n%s\nError:%s' \
-                    #% (str(coord), str(perf_params), str(e.__class__), e.message), 
-                    #code=0, doexit=False)
                     perf_costs[coord_key] = ([self.MAXFLOAT],[self.MAXFLOAT])
-                    
-                    elapsed = (time.time() - start)
-                    #info('2. transformation time = %e'%time.time())
-                    self.transform_time[coord_key]=elapsed
+                    self.__checkpointCost(coord_key, perf_costs[coord_key])
                     continue
             
             #info('transformation time = %e' % self.transform_time)
@@ -315,9 +686,27 @@ class Search:
                     err('internal error: the optimized annotation code cannot contain multiple versions', doexit=True)
     
                 transformed_code, _, externals = transformed_code_seq[0]
+                self.num_transformed += 1
+                variant_key = self.variantKey(transformed_code, externals, perf_params)
+                measured_rank = self.variant_records.get(variant_key)
+                if measured_rank in self.perf_cost_records:
+                    # the same test has already been measured for another coordinate
+                    self.num_equivalent += 1
+                    metrics = self.metric_records.get(measured_rank)
+                    self.__recordCost(coord_key, self.perf_cost_records[measured_rank], metrics)
+                    perf_costs[coord_key] = self.perf_cost_records[measured_rank]
+                    self.__checkpointCost(coord_key, perf_costs[coord_key], metrics)
+                    continue
+                code_coords[coord_key] = coord
+                if variant_key in batch_variants:
+                    self.num_equivalent += 1
+                    equivalent_coords[coord_key] = batch_variants[variant_key]
+                    continue
+                batch_variants[variant_key] = coord_key
+                self.variant_records[variant_key] = self.coord_space.rank(coord)
                 code_map[coord_key] = (transformed_code, externals)
         if code_map == {}: # nothing to test
-            return perf_costs
+            return
         #debug("search.py: about to test the following code segments (code_map):\n%s" % code_map, level=1)
         
         
@@ -325,23 +714,80 @@ class Search:
         new_perf_costs = None
         if self.modelBased():
             new_perf_costs = self.getModelPerfCosts(perf_params=perf_params,coord=coord_key)
-        if not new_perf_costs:
+        if not new_perf_costs and self.shared_libs and \
+                not [n for n in self.axis_names if n.startswith('__cmdline_')]:
+            # the variants are loaded into a harness that initializes the inputs once (for each problem size);
+            # the harness is the test code of an empty variant
+            harness_code = self.ptcodegen.generate({'[harness]': ('', '')})
+            test_codes = [(self.ptcodegen.generate({k: v}), self.coordToPerfParams(code_coords[k]), k)
+                          for k, v in code_map.items()]
+            new_perf_costs = self.ptdriver.runShlibs(harness_code, test_codes)
+        elif not new_perf_costs and not self.use_parallel_search and self.variants_per_binary > 1 and len(code_map) > 1:
+            # each sequential test code times a group of variants, one after the other
+            test_codes = []
+            for group in self.__groupVariants(code_map, code_coords):
+                group_code_map = dict([(k, code_map[k]) for k in group])
+                group_coord = group[0] if len(group) == 1 else None
+                test_codes.append((self.ptcodegen.generate(group_code_map),
+                                   self.coordToPerfParams(code_coords[group[0]]), group_coord))
+            new_perf_costs = self.ptdriver.runMany(test_codes)
+            # the variants of a test code that failed to build or run
+            for k in code_map:
+                if k not in new_perf_costs:
+                    new_perf_costs[k] = ([self.MAXFLOAT],[self.MAXFLOAT])
+        elif not new_perf_costs and not self.use_parallel_search and len(code_map) > 1:
+            # a sequential test code holds a single variant, let the driver compile them concurrently
+            test_codes = [(self.ptcodegen.generate({k: v}), self.coordToPerfParams(code_coords[k]), k)
+                          for k, v in code_map.items()]
+            new_perf_costs = self.ptdriver.runMany(test_codes)
+        elif not new_perf_costs:
             test_code = self.ptcodegen.generate(code_map)
-            perf_params = self.coordToPerfParams(uneval_coords[0])
+            coord_key = list(code_map.keys())[0]
+            perf_params = self.coordToPerfParams(code_coords[coord_key])
             new_perf_costs = self.ptdriver.run(test_code, perf_params=perf_params,coord=coord_key)
         #new_perf_costs = self.getPerfCostConfig(coord_key,perf_params)
+        # timed-out tests cost timeout_penalty times the best cost so far (if set), other tests may lower it
+        # with several objectives, the costs are the scalarized objectives (the measured times are recorded)
+        timed_out = set()
+        measured_costs = dict(new_perf_costs)
+        new_metrics = {}
+        for k, pcost in list(new_perf_costs.items()):
+            if k in self.ptdriver.timed_out:
+                self.ptdriver.timed_out.discard(k)
+                timed_out.add(k)
+                self.num_timed_out += 1
+                new_perf_costs[k] = measured_costs[k] = self.timeoutPerfCost()
+            elif isinstance(pcost, tuple) and pcost[0]:
+                new_perf_costs[k], new_metrics[k] = self.__scalarize(k, pcost)
+                self.best_measured_cost = min(self.best_measured_cost, meanCost(new_perf_costs[k]))
+        # equivalent coordinates get the performance cost of the one that was measured
+        for k, measured_key in equivalent_coords.items():
+            if measured_key in new_perf_costs:
+                new_perf_costs[k] = new_perf_costs[measured_key]
+                measured_costs[k] = measured_costs[measured_key]
+                new_metrics[k] = new_metrics.get(measured_key)
         # remember the performance cost of previously evaluated coordinate
-        self.perf_cost_records.update(list(new_perf_costs.items()))
+        for k, pcost in new_perf_costs.items():
+            self.__recordCost(k, pcost, new_metrics.get(k))
+        if self.result_cache:
+            for k, pcost in new_perf_costs.items():
+                # only successful sequential measurements are reused
+                if k in code_coords and equivalent_coords.get(k, k) not in timed_out and isinstance(pcost, tuple) and \
+                        self.MAXFLOAT not in pcost[0]:
+                    self.result_cache.store(self.coordToPerfParams(code_coords[k]), k, pcost, new_metrics.get(k))
+        for k, pcost in new_perf_costs.items():
+            if k in code_coords:
+                if equivalent_coords.get(k, k) in timed_out:
+                    status = 'timeout'
+                elif not isinstance(pcost, tuple) or not pcost[0] or [t for t in pcost[0] if math.isinf(t)]:
+                    status = 'failed'
+                else:
+                    status = 'ok'
+                self.__recordResult(k, self.coordToPerfParams(code_coords[k]), measured_costs.get(k, pcost), status,
+                                    measured_key=equivalent_coords.get(k))
+            self.__checkpointCost(k, pcost, new_metrics.get(k))
         # merge the newly obtained performance costs
         perf_costs.update(list(new_perf_costs.items()))
-        # also take the compile time
-        
-
-        #sys.exit()
-
-        #return the performance cost
-
-        return perf_costs
     
     #----------------------------------------------------------
 
@@ -368,7 +814,7 @@ class Search:
         
         # test if the performance parameters are valid
         try:
-            is_valid = eval(self.constraint, param_config)
+            is_valid = self.feasible_space.isValid(param_config)
         except Exception as e:
             err('failed to evaluate the constraint expression: "%s"\n%s %s' % (self.constraint,e.__class__.__name__, e))
 
@@ -462,12 +908,7 @@ class Search:
 
     def getCoordDistance(self, coord1, coord2):
         '''Return the distance between the given two coordinates'''
-
-        d_sqr = 0
-        for i in range(0, self.total_dims):
-            d_sqr += (coord2[i] - coord1[i])**2
-        d = math.sqrt(d_sqr)
-        return d
+        return self.coord_space.distance(coord1, coord2)
 
     #----------------------------------------------------------
 
@@ -504,28 +945,42 @@ class Search:
 
     #----------------------------------------------------------
 
+    def priorSamples(self):
+        '''
+        Return the results of prior tuning sessions mapped into the search space (the infeasible
+        coordinates left out), as (coordinate, cost, problem distance, problem size feature) tuples
+        ordered from the nearest problem size, then from the lowest cost (see PriorResults.samples)
+        '''
+        if self.prior_results is None or self.axis_names is None:
+            return []
+        if self.__prior_samples is None:
+            self.__prior_samples = [s for s in self.prior_results.samples(self.axis_names, self.axis_val_ranges,
+                                                                          self.input_params)
+                                    if self.feasible_space.isValidCoord(s[0])]
+        return self.__prior_samples
+
+    def warmStartCoords(self, count=None):
+        '''
+        Return the best distinct feasible coordinates of the prior tuning sessions (up to count, default:
+        the --warm-start-seeds option), from the nearest problem size, with which a search starts
+        '''
+        if count is None:
+            count = Globals().warm_start_seeds
+        coords = []
+        for coord, _, _, _ in self.priorSamples():
+            if len(coords) >= count:
+                break
+            if coord not in coords:
+                coords.append(coord)
+        if coords:
+            info('warm start: seeding the search with %d prior coordinates: %s' % (len(coords), coords))
+        return coords
+
+    #----------------------------------------------------------
+
     def getNeighbors(self, coord, distance):
         '''Return all the neighboring coordinates (within the specified distance)'''
-        
-        # get all valid distances
-        distances = [0] + list(range(1,distance+1,1)) + list(range(-1,-distance-1,-1))
-
-        # get all neighboring coordinates within the specified distance
-        neigh_coords = [[]]
-        for i in range(0, self.total_dims):
-            iuplimit = self.dim_uplimits[i]
-            cur_points = [coord[i]+d for d in distances]
-            cur_points = [x for x in cur_points if 0 <= x < iuplimit]
-            n_neigh_coords = []
-            for ncoord in neigh_coords:
-                n_neigh_coords.extend([ncoord[:]+[p] for p in cur_points])
-            neigh_coords = n_neigh_coords
-
-        # remove the current coordinate from the neighboring coordinates list
-        neigh_coords.remove(coord)
-        
-        # return all valid neighboring coordinates
-        return neigh_coords
+        return self.coord_space.neighbors(coord, distance)
 
     #----------------------------------------------------------
 
@@ -536,29 +991,63 @@ class Search:
         then we perform this local search recursively once the neighbor with the best performance
         cost is found.
         '''
+        return self.runProposals(self.proposeBestNeighbor(coord, distance))
 
-        # get all neighboring coordinates within the specified distance
-        neigh_coords = self.getNeighbors(coord, distance)
+    # the number of neighbors proposed at once by the best-improvement local search
+    NEIGHBOR_BATCH = 64
 
-        # record the best neighboring coordinate and its performance cost so far
-        best_coord = coord
-        best_perf_cost = self.getPerfCost(coord)
+    def iterNeighbors(self, coord, distance, randomized=False):
+        '''
+        Generate the feasible neighboring coordinates (within the specified distance) one at a time, in
+        a random order if randomized; the infeasible ones are skipped with the compiled constraint
+        '''
+        for neighbor in self.coord_space.iterNeighbors(coord, distance, random if randomized else None):
+            if self.feasible_space.isValidCoord(neighbor):
+                yield neighbor
 
-        # examine all neighboring coordinates
-        for n in neigh_coords:
-            perf_cost = self.getPerfCost(n)
-            if perf_cost < best_perf_cost:
-                best_coord = n
-                best_perf_cost = perf_cost
+    def proposeBestNeighbor(self, coord, distance, first_improvement=False, randomized=False):
+        '''
+        The proposals generator of searchBestNeighbor. The feasible neighbors are generated lazily and
+        proposed in batches (of NEIGHBOR_BATCH coordinates, or batch_size if larger); with
+        first_improvement, the search moves to the best neighbor of the first batch (of batch_size
+        coordinates) that holds a better one, instead of examining all the neighbors first.
+        '''
+        if first_improvement:
+            chunk_size = max(1, self.batch_size)
+        else:
+            chunk_size = max(self.NEIGHBOR_BATCH, self.batch_size)
+
+        while True:
+            # record the best neighboring coordinate and its performance cost so far
+            [perf_cost] = yield from self.proposeCoords([coord])
+            best_coord = coord
+            best_perf_cost = perf_cost
+
+            # examine the neighboring coordinates within the specified distance, batch by batch
+            neighbors = self.iterNeighbors(coord, distance, randomized)
+            while True:
+                neigh_coords = list(itertools.islice(neighbors, chunk_size))
+                if not neigh_coords:
+                    break
+                perf_costs = yield from self.proposeCoords(neigh_coords)
+                for n, perf_cost in zip(neigh_coords, perf_costs):
+                    if perf_cost < best_perf_cost:
+                        best_coord = n
+                        best_perf_cost = perf_cost
+                if first_improvement and best_coord != coord:
+                    break
+
+            # repeat this local search, if new best neighboring coordinate is found
+            if best_coord == coord:
+                break
+            coord = best_coord
 
-        # recursively apply this local search, if new best neighboring coordinate is found
-        if best_coord != coord:
-            return self.searchBestNeighbor(best_coord, distance)
-        
         # return the best neighboring coordinate and its performance cost
         return (best_coord, best_perf_cost)
     
     def __findLastCoord(self):
-        from stat import S_ISREG, ST_MTIME, ST_MODE
-        coord = None
-        return coord
+        '''Return the last coordinate recorded in the checkpoint of the search, or None'''
+        if self.checkpoint_key is None:
+            return None
+        coord_key = self.checkpoint.lastCoord(self.checkpoint_key)
+        return coordFromKey(coord_key) if coord_key else None
@@ -62,6 +62,13 @@ class Simplex(orio.main.tuner.search.search.Search):
         # read all algorithm-specific arguments
         self.__readAlgoArgs()
 
+        # without an explicit x0, the initial simplex is built around the best coordinate of the prior
+        # tuning sessions (if any)
+        if self.__X0 not in self.search_opts:
+            seeds = self.warmStartCoords(1)
+            if seeds:
+                self.x0 = seeds[0]
+
         # complain if both the search time limit and the total number of search runs are undefined
         if self.time_limit <= 0 and self.total_runs <= 0:
             err(('orio.main.tuner.search.simplex.simplex:  %s search requires the search time limit (time_limit, seconds) and/or the ' +
@@ -77,7 +84,12 @@ class Simplex(orio.main.tuner.search.search.Search):
         
         '''
         # TODO: implement startCoord support
-        
+        return self.askTellSearch()
+
+    # Method required by the ask/tell interface
+    def proposals(self):
+        '''The Nelder-Mead simplex search, proposing the coordinates it evaluates in batches'''
+
         if len(self.x0) != self.total_dims:
             err('orio.main.tuner.search.simplex: initial coordiniate x0 has to match the total dimensions')
 
@@ -121,7 +133,7 @@ class Simplex(orio.main.tuner.search.search.Search):
             info('\n(run %s) initial simplex: %s' % (runs+1, simplex))
 
             # get the performance cost of each coordinate in the simplex
-            perf_costs = list(map(self.getPerfCost, simplex))
+            perf_costs = yield from self.proposeCoords(simplex)
             perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in perf_costs]
             
             
@@ -192,7 +204,13 @@ class Simplex(orio.main.tuner.search.search.Search):
 
                 # reflection
                 refl_coords = self.__getReflection(worst_coord, centroid)
-                refl_perf_costs = list(map(self.getPerfCost, refl_coords))
+                if self.batch_size > 1 and len(refl_coords) == 1:
+                    # evaluate the candidates of all the possible moves at once (the ones that are not
+                    # taken are wasted, but the next moves find the others already measured)
+                    yield from self.proposeCoords(refl_coords + self.__getExpansion(refl_coords[0], centroid) +
+                                                  self.__getContraction(refl_coords[0], centroid) +
+                                                  self.__getContraction(worst_coord, centroid))
+                refl_perf_costs = yield from self.proposeCoords(refl_coords)
                 refl_perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in refl_perf_costs]
                 
                 refl_perf_cost = min(refl_perf_costs)
@@ -214,7 +232,7 @@ class Simplex(orio.main.tuner.search.search.Search):
 
                     # expansion
                     exp_coords = self.__getExpansion(refl_coord, centroid)
-                    exp_perf_costs = list(map(self.getPerfCost, exp_coords))
+                    exp_perf_costs = yield from self.proposeCoords(exp_coords)
                     exp_perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in exp_perf_costs]
                     
                     exp_perf_cost = min(exp_perf_costs)
@@ -236,7 +254,7 @@ class Simplex(orio.main.tuner.search.search.Search):
 
                     # outer contraction
                     cont_coords = self.__getContraction(refl_coord, centroid)
-                    cont_perf_costs = list(map(self.getPerfCost, cont_coords))
+                    cont_perf_costs = yield from self.proposeCoords(cont_coords)
                     cont_perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in cont_perf_costs]
                     
                     cont_perf_cost = min(cont_perf_costs)
@@ -254,7 +272,7 @@ class Simplex(orio.main.tuner.search.search.Search):
                 
                     # inner contraction
                     cont_coords = self.__getContraction(worst_coord, centroid)
-                    cont_perf_costs = list(map(self.getPerfCost, cont_coords))
+                    cont_perf_costs = yield from self.proposeCoords(cont_coords)
                     cont_perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in cont_perf_costs]
                     
                     cont_perf_cost = min(cont_perf_costs)
@@ -272,7 +290,7 @@ class Simplex(orio.main.tuner.search.search.Search):
 
                     # shrinkage
                     simplex = self.__getShrinkage(best_coord, simplex)
-                    perf_costs = list(map(self.getPerfCost, simplex))
+                    perf_costs = yield from self.proposeCoords(simplex)
                     perf_costs = [x[0] if len(x)==1 else sum(x[1:])/(len(x)-1) for x in perf_costs]
                     
                     info('--> shrinkage on %s' % best_coord )
@@ -297,8 +315,8 @@ class Simplex(orio.main.tuner.search.search.Search):
 
                 # perform a local search on the best simplex coordinate
                 (best_simplex_coord,
-                 best_simplex_perf_cost) = self.searchBestNeighbor(best_simplex_coord,
-                                                                   self.local_distance)
+                 best_simplex_perf_cost) = yield from self.proposeBestNeighbor(best_simplex_coord,
+                                                                               self.local_distance)
                  
                  
                 best_simplex_perf_cost = best_simplex_perf_cost[0]
@@ -0,0 +1,46 @@
+import pytest
+import os
+import random
+from os.path import abspath, dirname, join
+
+def run_orcc(example, search="Bayesopt", extra_args="arg total_runs=10;"): 
+    # dispatch to Orio's main
+    code = join(abspath(dirname(dirname(__file__))),example)
+    os.system("sed -e 's|@SEARCH@|%s|' -e 's|@EXTRA_ARGS@|%s|' %s.in > %s" % (search,extra_args,code,code))
+    with pytest.raises(SystemExit) as exc:
+        from orio.main.util.globals import Globals
+        Globals.reset()
+        import orio.main.orio_main
+        cmd = ['orcc','-v','--stop-on-error','--logdir=orio/main/tuner/search/tests', code]
+        print((' '.join(cmd)))
+        orio.main.orio_main.start(cmd, orio.main.orio_main.C_CPP)
+    return exc.value.code
+
+def test_bayesopt(capsys, caplog):
+    ret_code = run_orcc('tests/axpy4.c')
+    assert ret_code == 0
+
+def test_bayesopt_args(capsys, caplog):
+    ret_code = run_orcc('tests/axpy4.c', extra_args='arg total_runs=10; arg bayesopt_init_samples=4; ' +
+                        'arg bayesopt_candidates=50; arg bayesopt_gamma=0.2; arg bayesopt_local_distance=1;')
+    assert ret_code == 0
+
+def test_bayesopt_pick_batch():
+    from orio.main.util.globals import Globals
+    Globals.reset()
+    Globals({})
+    from orio.main.tuner.search.bayesopt.bayesopt import Bayesopt
+    search = Bayesopt({'axis_names': ['T', 'U', 'V'],
+                       'axis_val_ranges': [[1, 2, 4, 8, 16], list(range(1, 9)), [False, True]],
+                       'pparam_constraint': 'T * U <= 16 and (V or U > 1)',
+                       'search_total_runs': 20, 'search_opts': {'candidates': 20}})
+    random.seed(1)
+    eval_coords = search.feasible_space.sample(6)
+    eval_costs = [float(sum(c)) for c in eval_coords[:-1]] + [search.MAXFLOAT]
+    eval_keys = set([str(c) for c in eval_coords])
+    batch = search._Bayesopt__pickBatch(eval_coords, eval_costs, eval_keys, 8)
+    # the constant liar picks distinct, unmeasured, feasible coordinates
+    assert len(batch) == 8
+    assert len(set([str(c) for c in batch])) == len(batch)
+    assert not set([str(c) for c in batch]) & eval_keys
+    assert [c for c in batch if not search.feasible_space.isValidCoord(c)] == []
@@ -0,0 +1,55 @@
+import pytest
+import itertools, random
+from orio.main.tuner.search.coord_space import CoordSpace, CostTable, meanCost
+
+def test_rank_unrank():
+    space = CoordSpace([3, 1, 4, 2])
+    assert space.size == 24
+    coords = [list(reversed(c)) for c in itertools.product(range(2), range(4), range(1), range(3))]
+    # mixed radix, the first axis varying fastest
+    for r, coord in enumerate(coords):
+        assert space.rank(coord) == r
+        assert space.unrank(r) == coord
+        assert space.rankOfKey(str(coord)) == r
+        assert space.keyOfRank(r) == str(coord)
+    assert space.unrank(1) == [1, 0, 0, 0]
+    assert space.unrank(3) == [0, 0, 1, 0]
+
+def test_rank_unrank_large():
+    # beyond the range of machine integers
+    space = CoordSpace([1000] * 8)
+    rng = random.Random(1)
+    for _ in range(100):
+        coord = [rng.randrange(1000) for _ in range(8)]
+        assert space.unrank(space.rank(coord)) == coord
+    assert space.rank([999] * 8) == space.size - 1 == 1000 ** 8 - 1
+
+def test_contains():
+    space = CoordSpace([3, 2])
+    assert space.contains([2, 1])
+    assert not space.contains([3, 0])
+    assert not space.contains([0, -1])
+    assert CoordSpace([]).size == 0
+
+@pytest.mark.parametrize('size', [10, CostTable.ARRAY_LIMIT, CostTable.ARRAY_LIMIT + 1, 10 ** 12])
+def test_cost_table(size):
+    table = CostTable(size)
+    # an array of doubles up to ARRAY_LIMIT coordinates, a dictionary beyond
+    assert (table._CostTable__costs is None) == (size > CostTable.ARRAY_LIMIT)
+    assert len(table) == 0
+    ranks = [0, 7, size - 1]
+    for r, cost in zip(ranks, [3.0, 1.0, 2.0]):
+        table[r] = cost
+    table[7] = 0.5                  # a cost replaced is counted once
+    table[5] = float('inf')         # a failed coordinate is measured, but not ranked
+    assert len(table) == 4
+    assert 7 in table and 5 in table and 1 not in table
+    assert table.get(7) == 0.5
+    assert table.get(1) is None and table.get(1, -1.0) == -1.0
+    assert table.items() == [(0, 3.0), (5, float('inf')), (7, 0.5), (size - 1, 2.0)]
+    assert table.ranked() == [7, size - 1, 0]
+
+def test_mean_cost():
+    assert meanCost(([5.0, 1.0, 2.0], [0.0])) == 1.5
+    assert meanCost([4.0]) == 4.0
+    assert meanCost([]) == float('inf')
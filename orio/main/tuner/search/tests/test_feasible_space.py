@@ -0,0 +1,74 @@
+import pytest
+import itertools, random
+from orio.main.tuner.search.feasible_space import FeasibleSpace
+
+AXIS_NAMES = ['T1', 'T2', 'U', 'VEC']
+AXIS_VAL_RANGES = [[1, 2, 4, 8, 16], [1, 2, 4, 8, 16], list(range(1, 7)), [False, True]]
+CONSTRAINT = 'True and (T1 <= T2) and (T1 * U <= 16) and (not VEC or U % 2 == 0) and (T2 <= N)'
+INPUT_PARAMS = [('N', 8)]
+
+def feasibleCoords(constraint=CONSTRAINT):
+    '''Return the coordinates of the space that satisfy a plain eval of the constraint'''
+    coords = []
+    for coord in itertools.product(*[range(len(r)) for r in AXIS_VAL_RANGES]):
+        perf_params = dict([(n, r[i]) for n, r, i in zip(AXIS_NAMES, AXIS_VAL_RANGES, coord)])
+        if eval(constraint, perf_params, dict(INPUT_PARAMS)):
+            coords.append(list(coord))
+    return sorted(coords)
+
+def feasibleSpace(index_limit=None, constraint=CONSTRAINT):
+    space = FeasibleSpace(AXIS_NAMES, AXIS_VAL_RANGES, constraint, INPUT_PARAMS)
+    if index_limit is not None:
+        space.INDEX_LIMIT = index_limit
+    return space
+
+def test_conjuncts():
+    space = feasibleSpace()
+    # T1 <= T2 and T2 <= N (an input parameter) are checked once T2 is assigned, T1 * U <= 16 once U
+    # is, and the conjunct of VEC last; the constant True first
+    assert [c is not None for c in space.axis_checks] == [False, True, True, True]
+    assert space.constant_check is not None
+
+def test_is_valid():
+    space = feasibleSpace()
+    expected = feasibleCoords()
+    for coord in itertools.product(*[range(len(r)) for r in AXIS_VAL_RANGES]):
+        assert space.isValidCoord(list(coord)) == (list(coord) in expected)
+
+def test_index():
+    space = feasibleSpace()
+    expected = feasibleCoords()
+    assert 0 < len(expected) < space.space_size
+    # the enumeration with the conjuncts checked axis by axis is lexicographic
+    assert list(space.coords()) == sorted(expected, key=lambda c: tuple(c))
+    assert space.size() == len(expected)
+    assert feasibleSpace(index_limit=10).index() is None
+    assert feasibleSpace(constraint='N > 8').size() == 0
+
+@pytest.mark.parametrize('index_limit', [None, 0])
+def test_sample(index_limit):
+    space = feasibleSpace(index_limit)
+    expected = feasibleCoords()
+    rng = random.Random(1)
+    exclude = set([str(c) for c in expected[::3]])
+    coords = space.sample(len(expected), exclude=exclude, rng=rng)
+    keys = [str(c) for c in coords]
+    assert len(keys) == len(set(keys))
+    assert not set(keys) & exclude
+    assert [c for c in coords if c not in expected] == []
+    # the feasible coordinates not excluded are all found
+    assert len(coords) == len(expected) - len(exclude)
+    assert space.sample(5, rng=rng, exclude=[str(c) for c in expected]) == []
+
+def test_sample_uniform():
+    # without retrying the axes, each feasible coordinate is about as likely to be sampled
+    space = feasibleSpace(index_limit=0)
+    expected = feasibleCoords()
+    rng = random.Random(2)
+    counts = dict([(str(c), 0) for c in expected])
+    for _ in range(200 * len(expected)):
+        for coord in space.sample(1, rng=rng):
+            counts[str(coord)] += 1
+    mean = float(sum(counts.values())) / len(expected)
+    assert mean == 200
+    assert 0.7 * mean < min(counts.values()) and max(counts.values()) < 1.3 * mean
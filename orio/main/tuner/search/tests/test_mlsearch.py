@@ -21,3 +21,8 @@ def test_mlsearch(capsys, caplog):
     ret_code = run_orcc('tests/axpy4.c')
     assert ret_code == 0
 
+def test_mlsearch_refit(capsys, caplog):
+    ret_code = run_orcc('tests/axpy4.c', extra_args='arg total_runs=10; arg mlsearch_trees=50; ' +
+                        'arg mlsearch_trees_per_batch=0; arg mlsearch_pool_size=4;')
+    assert ret_code == 0
+
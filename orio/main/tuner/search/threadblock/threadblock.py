@@ -4,6 +4,7 @@
 
 import sys, time
 import orio.main.tuner.search.search
+from orio.main.tuner.result_stream import coordFromKey
 from orio.main.util.globals import *
 
 
@@ -95,7 +96,7 @@ class ThreadBlock(orio.main.tuner.search.search.Search):
                 # compare to the best result
             pcost_items = sorted(list(map(lambda x: eval(x), list(perf_costs.items()))))
             for coord_str, (perf_cost, transfer_costs) in pcost_items:
-                coord_val = eval(coord_str)
+                coord_val = coordFromKey(coord_str)
                 # info('cost: %s' % (perf_cost))
                 floatNums = [float(x) for x in perf_cost]
                 transferFloats = [float(x) for x in transfer_costs]
@@ -60,6 +60,70 @@ double getClock() {
 #endif
 '''
 
+# the energy consumed by the processor packages, read from the RAPL counters of the Linux powercap
+# interface (in microjoules, wrapping around at max_energy_range_uj); compiled into the test code with
+# -DORIO_ENERGY. The counters are only updated about once per millisecond, so that the energy is read
+# over a window of consecutive timing repetitions lasting at least ORIO_ENERGY_WINDOW seconds (or
+# ending with the last repetition): orio_energyEnd returns the energy of the window when the repetition
+# closes it, and sets *reps to its number of repetitions (0 while the window is open). It returns -1 if
+# the counters are not readable, or did not change during the window.
+ENERGY_CODE = r'''
+#ifdef ORIO_ENERGY
+#ifndef ORIO_ENERGY_WINDOW
+#define ORIO_ENERGY_WINDOW 0.01
+#endif
+#define ORIO_RAPL_MAX_PACKAGES 64
+extern double getClock();
+static int orio_rapl_packages = -1;
+static double orio_rapl_start[ORIO_RAPL_MAX_PACKAGES], orio_rapl_range[ORIO_RAPL_MAX_PACKAGES];
+static double orio_energy_window_start;
+static int orio_energy_window_reps = 0;
+static double orio_raplRead(int package, const char *counter) {
+  char path[128];
+  double value = -1;
+  FILE *f;
+  sprintf(path, "/sys/class/powercap/intel-rapl:%d/%s", package, counter);
+  f = fopen(path, "r");
+  if (f != NULL) {
+    if (fscanf(f, "%lf", &value) != 1) value = -1;
+    fclose(f);
+  }
+  return value;
+}
+static void orio_energyStart() {
+  int i;
+  if (orio_rapl_packages < 0) {
+    for (orio_rapl_packages = 0; orio_rapl_packages < ORIO_RAPL_MAX_PACKAGES; orio_rapl_packages++) {
+      if (orio_raplRead(orio_rapl_packages, "energy_uj") < 0) break;
+      orio_rapl_range[orio_rapl_packages] = orio_raplRead(orio_rapl_packages, "max_energy_range_uj");
+    }
+  }
+  if (orio_energy_window_reps > 0) return;
+  for (i = 0; i < orio_rapl_packages; i++)
+    orio_rapl_start[i] = orio_raplRead(i, "energy_uj");
+  orio_energy_window_start = getClock();
+}
+static double orio_energyEnd(int last, int *reps) {
+  int i;
+  double energy = 0, delta;
+  orio_energy_window_reps++;
+  *reps = 0;
+  if (!last && getClock() - orio_energy_window_start < ORIO_ENERGY_WINDOW) return -1;
+  *reps = orio_energy_window_reps;
+  orio_energy_window_reps = 0;
+  if (orio_rapl_packages <= 0) return -1;
+  for (i = 0; i < orio_rapl_packages; i++) {
+    delta = orio_raplRead(i, "energy_uj") - orio_rapl_start[i];
+    if (delta < 0) delta += orio_rapl_range[i];
+    energy += delta;
+  }
+  return energy > 0 ? energy * 1.0e-6 : -1;
+}
+#endif
+'''
+
+#-----------------------------------------------------
+
 SEQ_DEFAULT = r'''
 #include <stdio.h>
 #include <stdlib.h>
@@ -102,6 +166,86 @@ extern double getClock();
 
 #-----------------------------------------------------
 
+# several variants timed one after the other by a single sequential executable
+# (the switch body is repeated for each variant)
+SEQ_MULTI_DEFAULT = r'''
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <limits.h>
+#include <time.h>
+
+/*@ global @*/
+/*@ external @*/
+
+extern double getClock(); 
+
+//int main(int argc, char *argv[]) { // part of declaration generation
+  /*@ declarations @*/  
+  /*@ prologue @*/
+
+  int orio_i;
+
+  /*@ begin switch body @*/
+  /*
+   Coordinate: /*@ coordinate @*/ 
+  */
+  
+  /*@ begin outer measurement @*/
+  for (orio_i=0; orio_i<ORIO_REPS; orio_i++) {
+    /*@ begin inner measurement @*/
+    
+    /*@ tested code @*/
+
+    /*@ end inner measurement @*/
+    if (orio_i==0) {
+      /*@ validation code @*/
+    }
+  }
+  /*@ end outer measurement @*/
+  /*@ end switch body @*/
+  
+  /*@ epilogue @*/
+  return 0;
+}
+'''
+
+#-----------------------------------------------------
+
+# the main loop of a long-lived sequential test harness: the inputs are initialized once by the
+# test code (compiled with -DORIO_SHLIB_HARNESS), then each variant, compiled into a shared library
+# whose path is read from the standard input, is loaded, timed (by its renamed main) and unloaded
+SEQ_SHLIB_HARNESS = r'''
+#include <stdio.h>
+#include <string.h>
+#include <dlfcn.h>
+
+int orio_shlib_harness(int argc, char *argv[]) {
+  char orio_lib_name[4096];
+  while (fgets(orio_lib_name, sizeof(orio_lib_name), stdin) != NULL) {
+    void *orio_lib;
+    int (*orio_variant)(int, char **);
+    orio_lib_name[strcspn(orio_lib_name, "\n")] = '\0';
+    orio_lib = dlopen(orio_lib_name, RTLD_NOW | RTLD_LOCAL);
+    if (orio_lib == NULL) {
+      fprintf(stderr, "%s\n", dlerror());
+    } else {
+      *(void **) (&orio_variant) = dlsym(orio_lib, "orio_variant");
+      if (orio_variant == NULL)
+        fprintf(stderr, "%s\n", dlerror());
+      else
+        orio_variant(argc, argv);
+      dlclose(orio_lib);
+    }
+    printf("@@done\n");
+    fflush(stdout);
+  }
+  return 0;
+}
+'''
+
+#-----------------------------------------------------
+
 PAR_DEFAULT = r'''
 
 #include <stdio.h>
@@ -422,7 +566,7 @@ int main(int argc, char *argv[]) {
     /*@ tested code @*/
 
     /*@ end inner measurement @*/
-    printf("{'/*@ coordinate @*/' : (%g,%g)}\n", orcu_elapsed, orcu_transfer);
+    printf("{\"coord\": \"/*@ coordinate @*/\", \"time\": %g, \"transfer\": %g}\n", orcu_elapsed, orcu_transfer);
   }
   /*@ end outer measurement @*/
   cudaEventDestroy(tstart); cudaEventDestroy(tstop);
@@ -502,14 +646,19 @@ class PerfTestSkeletonCode:
     def __init__(self, code, use_parallel_search, language='c'):
         '''To instantiate the skeleton code for the performance testing'''
 
+        # the skeleton used to time several variants in one sequential executable (if possible)
+        self.multi_code = None
         if code == None:
             if use_parallel_search:
                 code = PAR_DEFAULT
             else:
                 if language == 'c':
                     code = SEQ_DEFAULT
+                    self.multi_code = SEQ_MULTI_DEFAULT
                 else:
                     code = SEQ_DEFAULT_CUDA
+        elif not use_parallel_search and re.search(self.__SWITCHBODY_TAG, code):
+            self.multi_code = code
 
         self.code = code
         self.use_parallel_search = use_parallel_search
@@ -624,11 +773,14 @@ class PerfTestSkeletonCode:
         # check the given tested code mapping
         if len(tested_code_map) == 0:
             err('main.tuner.skeleton_code internal error:  the number of tested codes cannot be zero')
-        if not self.use_parallel_search and len(tested_code_map) != 1:
+        if not self.use_parallel_search and len(tested_code_map) != 1 and self.multi_code is None:
             err('main.tuner.skeleton_code internal error:  the number of tested sequential codes must be exactly one')
 
         # initialize the performance-testing code
         code = self.code
+        multi_variant = not self.use_parallel_search and len(tested_code_map) > 1
+        if multi_variant:
+            code = self.multi_code
 
         # add cuda kernel definitions if any
         g = Globals()
@@ -662,6 +814,23 @@ class PerfTestSkeletonCode:
                 par_externals += externals
             code = re.sub(self.__EXTERNAL_TAG, par_externals, code)
             code = re.sub(self.__SWITCHBODY_TAG, tcode, code)
+
+        # insert several sequential codes, timed one after the other (they share the same externals)
+        elif multi_variant:
+            switch_body_code = re.search(self.__SWITCHBODY_TAG, code).group(1)
+            tcode = ''
+            for i, (coord_key, (code_value, externals)) in enumerate(tested_code_map.items()):
+                scode = switch_body_code
+                scode = re.sub(self.__BEGIN_INNER_MEASURE_TAG, begin_inner_measure_code, scode)
+                scode = re.sub(self.__END_INNER_MEASURE_TAG, re.sub(self.__COORD_TAG, coord_key, end_inner_measure_code), scode)
+                scode = re.sub(self.__BEGIN_OUTER_MEASURE_TAG, begin_outer_measure_code, scode)
+                scode = re.sub(self.__END_OUTER_MEASURE_TAG, re.sub(self.__COORD_TAG, coord_key, end_outer_measure_code), scode)
+                scode = re.sub(self.__COORD_TAG, coord_key, scode)
+                scode = re.sub(self.__TCODE_TAG, code_value, scode)
+                tcode += '\n  /* variant %s */\n  {\n' % i + scode + '\n  }\n'
+            code = re.sub(self.__EXTERNAL_TAG, externals, code)
+            # the variants have already been through re.sub, insert them verbatim
+            code = re.sub(self.__SWITCHBODY_TAG, lambda m: tcode, code)
             
         # insert the sequential code
         else:
@@ -2,7 +2,7 @@
 # The tuner class to initiate the empirical performance tuning process
 #
 
-import re, sys, os
+import re, sys, os, math
 
 from orio.main.util.globals import *
 import orio.main.dyn_loader, orio.main.tspec.tspec, orio.main.tuner.ptest_codegen, orio.main.tuner.ptest_driver
@@ -107,6 +107,9 @@ class PerfTuner:
         class_name = tinfo.search_algo
         mod_name = '.'.join([SEARCH_MOD_NAME, class_name.lower(), class_name.lower()])
         search_class = self.dloader.loadClass(mod_name, class_name)
+        if Globals().shard and class_name != 'Exhaustive':
+            warn('the --shard option is only supported by the Exhaustive search, the %s search explores ' % class_name +
+                 'the whole search space')
 
         # convert the search time limit (from minutes to seconds) and get the total number of
         # search runs
@@ -118,9 +121,21 @@ class PerfTuner:
         # get the search-algorithm-specific arguments
         search_opts = dict(tinfo.search_opts)
         
+        # with successive halving, only the smallest problem size is searched, each larger problem size
+        # measures the best promote_fraction of the coordinates ranked on the previous one
+        promote_fraction = tinfo.search_promote_fraction
+        racing = promote_fraction is not None and len(ptcodegens) > 1 and not Globals().extern
+        if racing:
+            tuning_order = sorted(range(len(ptcodegens)),
+                                  key=lambda i: self.__problemSizeMagnitude(ptcodegens[i].input_params))
+        else:
+            tuning_order = list(range(len(ptcodegens)))
+        ranked_coords = None
+
         # perform the performance tuning for each distinct problem size
-        optimized_code_seq = []
-        for ptcodegen in ptcodegens:
+        optimized_codes = {}
+        for ptcodegen_index in tuning_order:
+            ptcodegen = ptcodegens[ptcodegen_index]
             if Globals().verbose:
                 info('\n----- begin empirical tuning for problem size -----')
                 # Sort y variable name... not sure it's really necessary
@@ -141,6 +156,8 @@ class PerfTuner:
                                        'search_total_runs':search_total_runs, 
                                        'search_resume':search_resume,
                                        'search_opts':search_opts,
+                                       'search_objectives':tinfo.search_objectives,
+                                       'search_objective_weights':tinfo.search_objective_weights,
                                        'ptcodegen':ptcodegen, 
                                        'ptdriver':ptdriver, 'odriver':self.odriver,
                                        'use_parallel_search':use_parallel_search,
@@ -148,7 +165,16 @@ class PerfTuner:
 
             
             # search for the best performance parameters
-            best_perf_params, best_perf_cost = search_eng.search()
+            try:
+                if racing and ranked_coords:
+                    best_perf_params, best_perf_cost, ranked_coords = self.__raceCoords(search_eng, ranked_coords,
+                                                                                        promote_fraction)
+                else:
+                    best_perf_params, best_perf_cost = search_eng.search()
+                    if racing:
+                        ranked_coords = search_eng.rankedCoords()
+            finally:
+                search_eng.close()
 
             # output the best performance parameters
             if Globals().verbose and not Globals().extern:
@@ -198,14 +224,51 @@ class PerfTuner:
             optimized_code = info_code + optimized_code
 
             # store the optimized for this problem size
-            optimized_code_seq.append((optimized_code, ptcodegen.input_params[:], externals))
+            optimized_codes[ptcodegen_index] = (optimized_code, ptcodegen.input_params[:], externals)
 
-        # return the optimized code
+        # return the optimized code (in the order of the problem sizes)
+        optimized_code_seq = [optimized_codes[i] for i in range(len(ptcodegens))]
         return optimized_code_seq
 
     # Private methods
     #-------------------------------------------------
 
+    def __problemSizeMagnitude(self, input_params):
+        '''Return the product of the numeric input parameter values, used to order the problem sizes'''
+        magnitude = 1
+        for pname, pvalue in input_params:
+            if isinstance(pvalue, (int, float)) and not isinstance(pvalue, bool):
+                magnitude *= abs(pvalue)
+        return magnitude
+
+    def __raceCoords(self, search_eng, ranked_coords, promote_fraction):
+        '''
+        Measure the best promote_fraction of the coordinates ranked on a smaller problem size, and return
+        the best performance parameters and cost, and the new ranking of the measured coordinates
+        '''
+        num_promoted = max(1, int(math.ceil(promote_fraction * len(ranked_coords))))
+        promoted = ranked_coords[:num_promoted]
+        info('----- successive halving: measuring the best %d of %d coordinates of the previous problem size -----' %
+             (num_promoted, len(ranked_coords)))
+
+        # in batches of the number of coordinates the search engine measures at once
+        batch_size = max(1, search_eng.batch_size)
+        for i in range(0, len(promoted), batch_size):
+            search_eng.getPerfCosts(promoted[i:i + batch_size])
+        ranked = search_eng.rankedCoords()
+        if not ranked:
+            err('orio.main.tuner.tuner: none of the coordinates promoted from the previous problem size could ' +
+                'be measured for problem size %s' % search_eng.input_params)
+
+        best_coord = ranked[0]
+        best_perf_params = search_eng.coordToPerfParams(best_coord)
+        best_perf_cost = search_eng.getPerfCost(best_coord)
+        info('----- begin summary -----')
+        info(' best coordinate: %s=%s, inputs=%s, promoted=%d' % (best_coord, best_perf_params,
+                                                                  str(search_eng.input_params), num_promoted))
+        info('----- end summary -----')
+        return (best_perf_params, best_perf_cost, ranked)
+
     def __extractTuningInfo(self, code, line_no):
         '''Extract tuning information from the given annotation code'''
 
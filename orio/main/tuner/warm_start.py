@@ -0,0 +1,102 @@
+#
+# The results of prior tuning sessions, used to warm-start the searches
+#
+
+import math
+from orio.main.util.globals import *
+from orio.main.tuner.merge_results import readResults, meanCost
+
+#-----------------------------------------------------
+
+def problemDistance(input_params1, input_params2):
+    '''
+    Return the distance between two problem sizes (dictionaries of input parameter values): the sum of
+    the absolute differences of the logarithms of their positive numeric input parameters, the other
+    input parameters counting 1 if they differ
+    '''
+    distance = 0.0
+    for name in set(input_params1.keys()) | set(input_params2.keys()):
+        v1 = input_params1.get(name)
+        v2 = input_params2.get(name)
+        if isinstance(v1, (int, float)) and isinstance(v2, (int, float)) and v1 > 0 and v2 > 0:
+            distance += abs(math.log(v1) - math.log(v2))
+        elif v1 != v2:
+            distance += 1.0
+    return distance
+
+def problemMagnitude(input_params):
+    '''Return the logarithm of the product of the positive numeric input parameters (a size feature)'''
+    return sum([math.log(v) for v in input_params.values()
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0])
+
+class PriorResults:
+    '''
+    The successfully measured coordinates of prior tuning sessions, read from their results files
+    (--results-file), e.g., for a neighboring problem size, with an older compiler, or for a sibling
+    kernel with the same performance parameters. The records are mapped into the search space of a
+    search by parameter value: the values that are not in the current range of a numeric parameter are
+    mapped to the nearest one, the records with a missing or unknown parameter are ignored.
+    '''
+
+    def __init__(self, filenames):
+        self.filenames = filenames
+        try:
+            results, num_bad = readResults(filenames)
+        except IOError as e:
+            err('orio.main.tuner.warm_start: cannot read the results file\n --> %s: %s' % (e.__class__.__name__, e))
+        if num_bad:
+            warn('orio.main.tuner.warm_start: ignored %d malformed lines of the prior results files' % num_bad)
+        self.records = []
+        for table in results.values():
+            for rec in table.values():
+                cost = meanCost(rec['times'])
+                if cost is not None and cost > 0.0 and isinstance(rec.get('params'), dict):
+                    self.records.append((rec['params'], dict(rec.get('input_params', {})), cost))
+        info('warm start: %d prior results read from %s' % (len(self.records), ', '.join(filenames)))
+
+    def __valueIndex(self, value, values):
+        '''Return the index of a parameter value in the range of values of an axis (or of the nearest one)'''
+        for i, v in enumerate(values):
+            if v == value or (isinstance(v, tuple) and list(v) == value):
+                return i
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            numeric = [(abs(v - value), i) for i, v in enumerate(values)
+                       if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if numeric:
+                return min(numeric)[1]
+        return None
+
+    def samples(self, axis_names, axis_val_ranges, input_params):
+        '''
+        Return the prior results mapped into a search space, as (coordinate, cost, problem distance,
+        problem size feature) tuples, ordered from the nearest problem size, then from the lowest cost
+        @param input_params: the (name, value) pairs of the input parameters of the search
+        '''
+        input_params = dict([(n, v) for n, v in (input_params or []) if n != '__builtins__'])
+        samples = []
+        for params, prior_input_params, cost in self.records:
+            coord = []
+            for name, values in zip(axis_names, axis_val_ranges):
+                index = self.__valueIndex(params[name], values) if name in params else None
+                if index is None:
+                    break
+                coord.append(index)
+            else:
+                samples.append((coord, cost, problemDistance(input_params, prior_input_params),
+                                problemMagnitude(prior_input_params)))
+        samples.sort(key=lambda s: (s[2], s[1]))
+        return samples
+
+#-----------------------------------------------------
+
+_prior_results = {}
+
+def sessionPriorResults():
+    '''Return the prior results that warm-start the searches of this session, or None if there are none'''
+    filenames = Globals().warm_start_files
+    if not filenames:
+        return None
+    key = tuple(filenames)
+    if key not in _prior_results:
+        _prior_results[key] = PriorResults(filenames)
+    return _prior_results[key]
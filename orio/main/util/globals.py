@@ -118,6 +118,35 @@ class Globals:
                 self.post_cmd = cmdline['post_cmd']
             else:
                 self.post_cmd = None
+            if 'cache_dir' in list(cmdline.keys()):
+                self.cache_dir = cmdline['cache_dir']
+            else:
+                self.cache_dir = None         # directory of the persistent result cache (disabled if None)
+            if 'shard' in list(cmdline.keys()):
+                self.shard = cmdline['shard']
+            else:
+                self.shard = None             # (i, N): explore the i-th of N parts of the search space
+            if 'warm_start_files' in list(cmdline.keys()):
+                self.warm_start_files = cmdline['warm_start_files']
+            else:
+                self.warm_start_files = []    # results files of prior sessions that seed the searches
+            if 'warm_start_seeds' in list(cmdline.keys()):
+                self.warm_start_seeds = cmdline['warm_start_seeds']
+            else:
+                self.warm_start_seeds = 5     # the number of prior coordinates seeded into each search
+            if 'transform_cache_size' in list(cmdline.keys()):
+                self.transform_cache_size = cmdline['transform_cache_size']
+            else:
+                self.transform_cache_size = 256   # the number of transformed code regions kept for reuse
+            if 'codegen_procs' in list(cmdline.keys()):
+                self.codegen_procs = cmdline['codegen_procs']
+            else:
+                self.codegen_procs = 0        # the number of code transformation worker processes (0: none)
+            self.worker = False               # True in a code transformation worker process
+            if 'exe_cache_size' in list(cmdline.keys()):
+                self.exe_cache_size = cmdline['exe_cache_size']
+            else:
+                self.exe_cache_size = 512     # maximum size of the compiled test executable cache (MB)
     
             
             # Configure logging
@@ -129,6 +158,8 @@ class Globals:
                 thelogger = logging.getLogger(cmdline['logger'])
             else:
                 thelogger = logging.getLogger("Orio")
+            self.results_file = None          # the JSON-lines record of all the measured coordinates
+            self.checkpoint_file = None       # the checkpoint of the searches, to resume an interrupted session
             if 'logfile' in list(cmdline.keys()):
                 self.logfile = cmdline['logfile']
             else:
@@ -139,6 +170,17 @@ class Globals:
                     if 'logdir' in list(cmdline.keys()):
                         self.logfile = os.path.join(cmdline['logdir'],self.logfile)
                     thelogger.addHandler(logging.FileHandler(filename=self.logfile))
+                    self.results_file = self.logfile[:-len('.log')] + '.results.jsonl'
+                    self.checkpoint_file = self.logfile[:-len('.log')] + '.checkpoint.jsonl'
+            if 'results_file' in list(cmdline.keys()):
+                self.results_file = cmdline['results_file']
+            if 'resume_file' in list(cmdline.keys()):
+                self.resume_file = cmdline['resume_file']
+                self.checkpoint_file = self.resume_file   # the resumed session goes on in the same file
+            else:
+                self.resume_file = None       # the checkpoint of the interrupted session to resume
+            if 'checkpoint_file' in list(cmdline.keys()):
+                self.checkpoint_file = cmdline['checkpoint_file']
                     
             # Stopping on error
             if 'stop-on-error' in list(cmdline.keys()):
@@ -208,6 +250,16 @@ class Globals:
         def incrementCounter(self):
             self.counter += 1
             return self.counter
+
+        def startWorker(self):
+            """ Start using this (forked) copy of the global state in a code transformation worker process """
+            self.worker = True
+            self.resetTransformState()
+
+        def resetTransformState(self):
+            """ Clear the state left behind by the code transformations of the previous coordinate """
+            self.cunit_declarations = []
+            self.metadata['loop_transformations'] = []
     
     pass   # end of Globals class
 
@@ -0,0 +1,120 @@
+#
+# The registry of the PLY lexers and parsers: each grammar is built once per process, and its LALR
+# tables are cached on disk across runs
+#
+
+import hashlib, os, threading, types
+import orio.tool.ply.lex, orio.tool.ply.yacc
+
+#-----------------------------------------------------
+
+# the environment variable that sets the directory of the cached parser tables (empty: no disk cache)
+CACHE_DIR_VAR = 'ORIO_PARSER_CACHE_DIR'
+
+def cacheDir():
+    '''
+    Return the directory of the cached parser tables, or None if they are not cached on disk: the
+    ORIO_PARSER_CACHE_DIR environment variable, or a directory of the user cache directory that is
+    specific to the version of the table format of PLY
+    '''
+    if CACHE_DIR_VAR in os.environ:
+        return os.environ[CACHE_DIR_VAR] or None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'orio', 'ply-%s' % orio.tool.ply.yacc.__tabversion__)
+
+#-----------------------------------------------------
+
+class CachedParser:
+    '''
+    A parser of the registry; each parse reads the tokens from a fresh copy of the lexer of the
+    grammar module (unless another lexer is given), starting at line 1
+    '''
+
+    def __init__(self, parser, module):
+        self.parser = parser
+        self.module = module
+
+    def parse(self, text, lexer=None, **kwargs):
+        if lexer is None:
+            lexer = getLexer(self.module)
+        return self.parser.parse(text, lexer=lexer, **kwargs)
+
+_lock = threading.RLock()
+_lexers = {}     # grammar module (or lexer class) -> lexer
+_parsers = {}    # (grammar module name, start symbol) -> CachedParser
+
+def getLexer(module, **kwargs):
+    '''
+    Return a fresh copy of the lexer defined by the token rules (t_ functions) of a module, or of an
+    object (e.g., the lexer class instances whose build method calls lex), built once per process
+    (per class for objects)
+    @param kwargs: the arguments of lex, used when the lexer is built
+    '''
+    key = module if isinstance(module, types.ModuleType) else module.__class__
+    with _lock:
+        lexer = _lexers.get(key)
+        if lexer is None:
+            lexer = _lexers[key] = orio.tool.ply.lex.lex(module=module, **kwargs)
+    lexer = lexer.clone()
+    lexer.lineno = 1
+    return lexer
+
+def getParser(module, start=None, check_recursion=True, errorlog=None):
+    '''
+    Return the LALR parser of the grammar of a module (its p_ functions), built once per process; its
+    tables are read from (or written to) the cache directory, where they are keyed by the hash of
+    the grammar, so that they are only generated again when the grammar changes
+    @param start: the start symbol, if not the one of the grammar
+    '''
+    key = (module.__name__, start)
+    with _lock:
+        if key not in _parsers:
+            _parsers[key] = CachedParser(_buildParser(module, start, check_recursion, errorlog), module)
+        return _parsers[key]
+
+#-----------------------------------------------------
+
+def grammarHash(module, start=None):
+    '''Return the hash of the grammar of a module (its tokens, precedence and productions)'''
+    pdict = dict([(k, getattr(module, k)) for k in dir(module)])
+    if start is not None:
+        pdict['start'] = start
+    pinfo = orio.tool.ply.yacc.ParserReflect(pdict, log=orio.tool.ply.yacc.NullLogger())
+    pinfo.get_all()
+    signature = '\0'.join(['LALR', orio.tool.ply.yacc.__tabversion__, pinfo.signature()])
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()[:16]
+
+def _buildParser(module, start, check_recursion, errorlog):
+    '''Build the parser of a module from the cached tables, generating (and caching) them if needed'''
+    options = dict(method='LALR', debug=0, module=module, start=start, check_recursion=check_recursion,
+                   optimize=1, write_tables=0, errorlog=errorlog)
+    cache_dir = cacheDir()
+    if cache_dir is not None:
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+        except OSError:
+            cache_dir = None
+    if cache_dir is None:
+        return orio.tool.ply.yacc.yacc(**options)
+
+    filename = os.path.join(cache_dir, '%s-%s.pickle' % (module.__name__, grammarHash(module, start)))
+    if os.path.exists(filename):
+        try:
+            return orio.tool.ply.yacc.yacc(picklefile=filename, **options)
+        except Exception:
+            # a corrupted table file: generate the tables again
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    # the tables are written to a temporary file, renamed once complete, so that concurrent processes
+    # never read a partial table file
+    tmp_filename = '%s.%d.%d.tmp' % (filename, os.getpid(), threading.get_ident())
+    parser = orio.tool.ply.yacc.yacc(picklefile=tmp_filename, **options)
+    try:
+        os.replace(tmp_filename, filename)
+    except OSError:
+        pass
+    return parser
@@ -3,7 +3,8 @@
 #
 
 import sys
-import variable, tool.ply.lex, tool.ply.yacc
+import variable
+import orio.main.util.parser_registry as parser_registry
 from orio.main.util.globals import *
 
 #------------------------------------------------
@@ -122,10 +123,6 @@ def getParser(start_line_no):
     global __start_line_no 
     __start_line_no = start_line_no
 
-    # create the lexer and parser
-    lexer = tool.ply.lex.lex()
-    parser = tool.ply.yacc.yacc(method='LALR', debug=0, optimize=1, write_tables=0)
-
-    # return the parser
-    return parser
+    # get the parser (built once, its lexer is created for each parse)
+    return parser_registry.getParser(sys.modules[__name__])
 
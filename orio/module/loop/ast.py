@@ -36,8 +36,10 @@
 #   simplify the input language.
 #
 from orio.module.loop import codegen
-from orio.main.util.globals import Globals
-import copy
+import copy, itertools
+
+# the ids of the AST nodes, unique within the process
+_node_ids = itertools.count(1)
 
 #-----------------------------------------------
 # AST - Abstract Syntax Tree
@@ -45,16 +47,18 @@ import copy
 
 class AST:
 
+    # the nodes have no instance dictionaries (the transformations create many of them, e.g., when
+    # unrolling loops), and their meta data dictionaries are only allocated when used
+    __slots__ = ('line_no', 'parent', '_meta', 'id', 'temp')
+
     def __init__(self, line_no = '', parent = None, meta={}):
         '''Create an abstract syntax tree node'''
         self.line_no = line_no           # may be null (i.e. empty string)
         self.parent = parent
-        self.meta = copy.deepcopy(meta)
-        self.initMeta('uses')
-        self.initMeta('defs')
-        self.id = str(Globals().incrementCounter())
+        self._meta = copy.deepcopy(meta) if meta else None
+        self.id = next(_node_ids)
         self.temp = None
-        
+
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         raise NotImplementedError('%s: abstract function "replicate" not implemented' %
@@ -64,6 +68,17 @@ class AST:
         '''Visitor pattern accept function'''
         visitor.visit(self,params)
 
+    @property
+    def meta(self):
+        '''The meta data of this node (e.g., the id of a loop), allocated when first used'''
+        if self._meta is None:
+            self._meta = {}
+        return self._meta
+
+    @meta.setter
+    def meta(self, meta):
+        self._meta = meta
+
     def initMeta(self, key, val=0):
         self.meta[key] = val
 
@@ -74,7 +89,7 @@ class AST:
             self.meta[key] = val 
             
     def getMeta(self, key):
-        if self.meta.get(key): return self.meta[key]
+        if self._meta and self._meta.get(key): return self._meta[key]
         else: return 0
                      
     def __repr__(self):
@@ -90,6 +105,7 @@ class AST:
 #-----------------------------------------------
 
 class Exp(AST):
+    __slots__ = ()
 
     def __init__(self, line_no = '', parent = None, meta={}):
         '''Create an expression'''
@@ -100,77 +116,81 @@ class Exp(AST):
 #-----------------------------------------------
 
 class NumLitExp(Exp):
+    __slots__ = ('val', 'lit_type')
 
     INT = 1
     FLOAT = 2
     
     def __init__(self, val, lit_type, line_no = '', parent = None, meta={}):
         '''Create a numeric literal'''
-        Exp.__init__(self, line_no, parent)
+        Exp.__init__(self, line_no, parent, meta)
         self.val = val
         self.lit_type = lit_type
-        self.meta = meta
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return NumLitExp(self.val, self.lit_type, self.line_no, meta=copy.deepcopy(self.meta))
+        return NumLitExp(self.val, self.lit_type, self.line_no, meta=self._meta)
         
 #-----------------------------------------------
 # String Literal
 #-----------------------------------------------
 
 class StringLitExp(Exp):
+    __slots__ = ('val',)
 
     def __init__(self, val, line_no = '', meta={}):
         '''Create a string literal'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.val = val
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return StringLitExp(self.val, self.line_no, meta=copy.deepcopy(self.meta))
+        return StringLitExp(self.val, self.line_no, meta=self._meta)
         
 #-----------------------------------------------
 # Identifier
 #-----------------------------------------------
 
 class IdentExp(Exp):
+    __slots__ = ('name',)
 
     def __init__(self, name, line_no = '', meta={}):
         '''Create an identifier'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.name = name
         
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return IdentExp(self.name, self.line_no, meta=copy.deepcopy(self.meta))
+        return IdentExp(self.name, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Array Reference
 #-----------------------------------------------
 
 class ArrayRefExp(Exp):
+    __slots__ = ('exp', 'sub_exp')
 
     def __init__(self, exp, sub_exp, line_no = '', meta={}):
         '''Create an array reference'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.exp = exp
         self.sub_exp = sub_exp
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         return ArrayRefExp(self.exp.replicate(), self.sub_exp.replicate(), 
-                           self.line_no, meta=copy.deepcopy(self.meta))
+                           self.line_no, meta=self._meta)
         
 #-----------------------------------------------
 # Function Call
 #-----------------------------------------------
 
 class FunCallExp(Exp):
+    __slots__ = ('exp', 'args')
 
     def __init__(self, exp, args, line_no = '', meta={}):
         '''Create a function call'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.exp = exp
         self.args = args
         
@@ -178,13 +198,14 @@ class FunCallExp(Exp):
         '''Replicate this abstract syntax tree node'''
         return FunCallExp(self.exp.replicate(), 
                           [a.replicate() for a in self.args], 
-                          self.line_no, meta=copy.deepcopy(self.meta))
+                          self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Unary Expression
 #-----------------------------------------------
 
 class UnaryExp(Exp):
+    __slots__ = ('exp', 'op_type')
     PLUS = 1
     MINUS = 2
     LNOT = 3
@@ -197,19 +218,20 @@ class UnaryExp(Exp):
 
     def __init__(self, exp, op_type, line_no = '', meta={}):
         '''Create a unary operation expression'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.exp = exp
         self.op_type = op_type
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return UnaryExp(self.exp.replicate(), self.op_type, self.line_no, meta=copy.deepcopy(self.meta))
+        return UnaryExp(self.exp.replicate(), self.op_type, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Binary Operation
 #-----------------------------------------------
 
 class BinOpExp(Exp):
+    __slots__ = ('lhs', 'rhs', 'op_type')
     MUL = 1
     DIV = 2
     MOD = 3
@@ -234,7 +256,7 @@ class BinOpExp(Exp):
 
     def __init__(self, lhs, rhs, op_type, line_no = '', meta={}):
         '''Create a binary operation expression'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.lhs = lhs
         self.rhs = rhs
         self.op_type = op_type
@@ -248,15 +270,16 @@ class BinOpExp(Exp):
         '''Replicate this abstract syntax tree node'''
         self.lhs
         return BinOpExp(self.lhs.replicate(), self.rhs.replicate(), 
-                        self.op_type, self.line_no, meta=copy.deepcopy(self.meta))
+                        self.op_type, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Ternary Operation
 #-----------------------------------------------
 class TernaryExp(Exp):
+    __slots__ = ('test', 'true_expr', 'false_expr')
     def __init__(self, test, true_expr, false_expr, line_no = '', meta={}):
         '''Create a ternary operation expression'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.test = test
         self.true_expr = true_expr
         self.false_expr = false_expr
@@ -264,47 +287,49 @@ class TernaryExp(Exp):
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         return TernaryExp(self.test.replicate(), self.true_expr.replicate(), 
-                          self.false_expr.replicate(), self.line_no, meta=copy.deepcopy(self.meta))
+                          self.false_expr.replicate(), self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Parenthesized Expression
 #-----------------------------------------------
 
 class ParenthExp(Exp):
+    __slots__ = ('exp',)
 
     def __init__(self, exp, line_no = '', meta={}):
         '''Create a parenthesized expression'''
-        Exp.__init__(self, line_no, meta)
+        Exp.__init__(self, line_no, meta=meta)
         self.exp = exp
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return ParenthExp(self.exp.replicate(), self.line_no, meta=copy.deepcopy(self.meta))
+        return ParenthExp(self.exp.replicate(), self.line_no, meta=self._meta)
         
 #-----------------------------------------------
 # Comments
 #-----------------------------------------------
 class Comment(AST):
+    __slots__ = ('text',)
 
     def __init__(self, comment, line_no = '', meta={}):
-        AST.__init__(self, line_no, meta)
+        AST.__init__(self, line_no, meta=meta)
         self.text = comment
 
     def replicate(self):
         '''Replicates the comment node'''
-        return Comment(self.text, self.line_no, meta=copy.deepcopy(self.meta))
+        return Comment(self.text, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Statement
 #-----------------------------------------------
 
 class Stmt(AST):
+    __slots__ = ('label',)
 
     def __init__(self, line_no = '', label=None, meta={}):
         '''Create a statement'''
-        AST.__init__(self, line_no, meta)
+        AST.__init__(self, line_no, meta=meta)
         self.label = label
-        self.meta = copy.deepcopy(meta)
     
     def setLabel(self, label):
         self.label = label
@@ -318,6 +343,7 @@ class Stmt(AST):
 #-----------------------------------------------
 
 class ExpStmt(Stmt):
+    __slots__ = ('exp',)
 
     def __init__(self, exp, line_no = '', label=None, meta={}):
         '''Create an expression statement'''
@@ -329,9 +355,10 @@ class ExpStmt(Stmt):
         r_e = self.exp
         if r_e:
             r_e = r_e.replicate()
-        return ExpStmt(r_e, self.line_no, self.label, meta=copy.deepcopy(self.meta))
+        return ExpStmt(r_e, self.line_no, self.label, meta=self._meta)
 
 class GotoStmt(Stmt):
+    __slots__ = ('target',)
     def __init__(self, target, line_no = '', label=None, meta={}):
         '''Create an expression statement'''
         Stmt.__init__(self, line_no, label, meta)
@@ -339,13 +366,14 @@ class GotoStmt(Stmt):
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return GotoStmt(self.target, self.line_no, self.label, meta=copy.deepcopy(self.meta))
+        return GotoStmt(self.target, self.line_no, self.label, meta=self._meta)
      
 #-----------------------------------------------
 # Compound Statement
 #-----------------------------------------------
 
 class CompStmt(Stmt):
+    __slots__ = ('stmts',)
 
     def __init__(self, stmts, line_no = '', label=None, meta={}):
         '''Create a compound statement'''
@@ -357,13 +385,14 @@ class CompStmt(Stmt):
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         return CompStmt([s.replicate() for s in self.stmts], 
-                        self.line_no, self.label, meta=copy.deepcopy(self.meta))
+                        self.line_no, self.label, meta=self._meta)
     
 #-----------------------------------------------
 # If-Then-Else
 #-----------------------------------------------
 
 class IfStmt(Stmt):
+    __slots__ = ('test', 'true_stmt', 'false_stmt')
 
     def __init__(self, test, true_stmt, false_stmt = None, line_no = '', label=None, meta={}):
         '''Create an if statement'''
@@ -378,13 +407,14 @@ class IfStmt(Stmt):
         if f_s:
             f_s = f_s.replicate()
         return IfStmt(self.test.replicate(), self.true_stmt.replicate(),
-                       f_s, self.line_no, self.label, meta=copy.deepcopy(self.meta))
+                       f_s, self.line_no, self.label, meta=self._meta)
 
 #-----------------------------------------------
 # For Loop
 #-----------------------------------------------
 
 class ForStmt(Stmt):
+    __slots__ = ('init', 'test', 'iter', 'stmt')
 
     def __init__(self, init, test, itr, stmt, line_no = '', label=None, meta={}, parent=None):
         '''Create a for-loop statement'''
@@ -408,13 +438,14 @@ class ForStmt(Stmt):
         if r_it:
             r_it = r_it.replicate()
         return ForStmt(r_in, r_t, r_it, self.stmt.replicate(), #label='loop_' + self.line_no
-                       line_no=self.line_no, meta=copy.deepcopy(self.meta), parent=self.parent)
+                       line_no=self.line_no, meta=self._meta, parent=self.parent)
 
 #-----------------------------------------------
 # Assignment
 #-----------------------------------------------
 
 class AssignStmt(Stmt):
+    __slots__ = ('var', 'exp')
 
     def __init__(self, var, exp, line_no = '', label=None, meta={}):
         '''Create an assign ment statement.'''
@@ -429,13 +460,14 @@ class AssignStmt(Stmt):
         self.var.updateMeta('defs')
         newexp = self.exp.replicate()
         newexp.updateMeta('uses')
-        return AssignStmt(self.var, newexp, self.line_no, self.label, meta=copy.deepcopy(self.meta))
+        return AssignStmt(self.var, newexp, self.line_no, self.label, meta=self._meta)
 
 #-----------------------------------------------
 # Transformation
 #-----------------------------------------------
 
 class TransformStmt(Stmt):
+    __slots__ = ('name', 'args', 'stmt')
 
     def __init__(self, name, args, stmt, line_no = '', label=None, meta={}):
         '''Create a transformation statement'''
@@ -447,27 +479,29 @@ class TransformStmt(Stmt):
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         return TransformStmt(self.name, self.args[:], self.stmt.replicate(), 
-                             self.line_no, meta=copy.deepcopy(self.meta))
+                             self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # New AST
 #-----------------------------------------------
 
 class NewAST(AST):
+    __slots__ = ()
 
     def __init__(self, line_no = '', meta={}):
         '''Create a newly-added statement'''
-        AST.__init__(self, line_no, meta)
+        AST.__init__(self, line_no, meta=meta)
 
 #-----------------------------------------------
 # Variable Declaration
 #-----------------------------------------------
 
 class VarDecl(NewAST):
+    __slots__ = ('type_name', 'var_names', 'qualifier')
 
     def __init__(self, type_name, var_names, line_no = '', meta={}, qual=''):
         '''Create a variable declaration'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.type_name = type_name
         self.var_names = var_names
         self.qualifier = qual
@@ -476,13 +510,14 @@ class VarDecl(NewAST):
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
         return VarDecl(self.type_name, self.var_names[:],
-                       self.line_no, meta=copy.deepcopy(self.meta), qual=self.qualifier)
+                       self.line_no, meta=self._meta, qual=self.qualifier)
 
 class VarDeclInit(NewAST):
+    __slots__ = ('type_name', 'var_name', 'init_exp', 'qualifier')
 
     def __init__(self, type_name, var_name, init_exp, line_no = '', meta={}, qual=''):
         '''Create an initializing variable declaration'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.type_name = type_name
         self.var_name  = var_name
         self.init_exp  = init_exp
@@ -490,10 +525,11 @@ class VarDeclInit(NewAST):
 
     def replicate(self):
         return VarDeclInit(self.type_name, self.var_name, self.init_exp,
-                           self.line_no, meta=copy.deepcopy(self.meta), qual=self.qualifier)
+                           self.line_no, meta=self._meta, qual=self.qualifier)
 
 
 class DeclStmt(NewAST):
+    __slots__ = ('decls',)
     def __init__(self):
         self.decls = []
 
@@ -508,26 +544,28 @@ class DeclStmt(NewAST):
 #-----------------------------------------------
 
 class FieldDecl(NewAST):
+    __slots__ = ('ty', 'name')
 
     def __init__(self, ty, name, line_no = '', meta={}):
         '''Create a field declaration'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.ty = ty
         self.name = name
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return FieldDecl(self.ty, self.name, self.line_no, meta=copy.deepcopy(self.meta))
+        return FieldDecl(self.ty, self.name, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Function Declaration
 #-----------------------------------------------
 
 class FunDecl(NewAST):
+    __slots__ = ('name', 'return_type', 'modifiers', 'params', 'body')
 
     def __init__(self, name, return_type, modifiers, params, body, line_no = '', meta={}):
         '''Create a function declaration'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.name = name
         self.return_type = return_type
         self.modifiers = modifiers
@@ -538,67 +576,71 @@ class FunDecl(NewAST):
         '''Replicate this abstract syntax tree node'''
         return FunDecl(self.fun_name, self.return_type, self.modifiers[:], 
                        self.params[:], self.body.replicate(), self.line_no,
-                       meta=copy.deepcopy(self.meta))
+                       meta=self._meta)
 
 #-----------------------------------------------
 # Pragma Directive
 #-----------------------------------------------
 
 class Pragma(NewAST):
+    __slots__ = ('pstring',)
 
     def __init__(self, pstring, line_no = '', meta={}):
         '''Create a pragma directive'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.pstring = pstring
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return Pragma(self.pstring, self.line_no, meta=copy.deepcopy(self.meta))
+        return Pragma(self.pstring, self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Container
 #-----------------------------------------------
 
 class Container(NewAST):
+    __slots__ = ('ast',)
 
     def __init__(self, ast, line_no = '', meta={}):
         '''Create a container AST (to protect the contained AST from any code transformations)'''
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.ast = ast
 
     def replicate(self):
         '''Replicate this abstract syntax tree node'''
-        return Container(self.ast.replicate(), self.line_no, meta=copy.deepcopy(self.meta))
+        return Container(self.ast.replicate(), self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # While Loop
 #-----------------------------------------------
 
 class WhileStmt(NewAST):
+    __slots__ = ('test', 'stmt')
 
     def __init__(self, test, stmt, line_no = '', meta={}):
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.test = test
         self.stmt = stmt
     
     def replicate(self):
         return WhileStmt(self.test.replicate(), self.stmt.replicate(), 
-                         self.line_no, meta=copy.deepcopy(self.meta))
+                         self.line_no, meta=self._meta)
 
 #-----------------------------------------------
 # Cast expression
 #-----------------------------------------------
 
 class CastExpr(NewAST):
+    __slots__ = ('ctype', 'expr')
 
     def __init__(self, ty, expr, line_no = '', meta={}):
-        NewAST.__init__(self, line_no, meta)
+        NewAST.__init__(self, line_no, meta=meta)
         self.ctype = ty
         self.expr = expr
     
     def replicate(self):
         return CastExpr(self.ctype, self.expr.replicate(), self.line_no, 
-                        meta=copy.deepcopy(self.meta))
+                        meta=self._meta)
 
 
 if __name__ == '__main__':
@@ -2,12 +2,20 @@
 # The class for loop transformation module
 #
 
+import collections, copy
 from orio.main.util.globals import *
 from orio.module.module import Module
 from orio.module.loop import astvisitors, codegen, parser, transformation, ast
 
 #-----------------------------------------
 
+# the ASTs of the most recently parsed annotated code regions, indexed by (line number, module body
+# code, annotation body code); they are never transformed, each transformation works on a copy
+PARSED_REGIONS_LIMIT = 64
+_parsed_regions = collections.OrderedDict()
+
+#-----------------------------------------
+
 class Loop(Module):
     '''Loop transformation module'''
     
@@ -22,8 +30,15 @@ class Loop(Module):
 
     #---------------------------------------------------------------------
     
-    def transform(self):
-        '''To apply loop transformations on the annotated code'''
+    def __parse(self):
+        '''
+        Return the AST of the annotated code, parsed once per code region: the search transforms the
+        same code for each coordinate, only the performance parameters change
+        '''
+        key = (self.line_no, self.module_body_code, self.annot_body_code)
+        if key in _parsed_regions:
+            _parsed_regions.move_to_end(key)
+            return _parsed_regions[key]
 
         # parse the code to get the AST
         debug("orio.module.loop.loop.Loop: about to parse the code to get the AST", obj=self, level=4)
@@ -45,6 +60,19 @@ class Loop(Module):
                 annotated_stmt = ast.CompStmt(annotated_stmts[0])
             stmts[0].stmt = annotated_stmt
 
+        _parsed_regions[key] = stmts
+        if len(_parsed_regions) > PARSED_REGIONS_LIMIT:
+            _parsed_regions.popitem(last=False)
+        return stmts
+
+    #---------------------------------------------------------------------
+    
+    def transform(self):
+        '''To apply loop transformations on the annotated code'''
+
+        # get a copy of the AST of the code (the transformations modify the AST in place)
+        stmts = copy.deepcopy(self.__parse())
+
         # apply transformations
         debug("orio.module.loop.loop.Loop: after parsing done, before transformation", obj=self, level=4)
         t = transformation.Transformation(self.perf_params, self.verbose, self.language, self.tinfo)
@@ -4,8 +4,7 @@
 
 import sys
 from orio.module.loop import ast
-import orio.tool.ply.lex
-import orio.tool.ply.yacc
+import orio.main.util.parser_registry as parser_registry
 from orio.main.util.globals import *
 
 #------------------------------------------------
@@ -742,12 +741,8 @@ def getParser(start_line_no):
     global __line_no
     __line_no = start_line_no
 
-    # create the lexer and parser
-    lexer = orio.tool.ply.lex.lex()
-    parser = orio.tool.ply.yacc.yacc(method='LALR', debug=0, optimize=1, write_tables=0)
-
-    # return the parser
-    return parser
+    # get the parser (built once, its lexer is created for each parse)
+    return parser_registry.getParser(sys.modules[__name__])
     
 
 
@@ -1,8 +1,8 @@
 #!/usr/bin/env python
 
 import sys, os
-import orio.tool.ply.lex, orio.tool.ply.yacc
 import orio.main.util.globals as g
+import orio.main.util.parser_registry as parser_registry
 import orio.module.loops.ast as ast
 
 #----------------------------------------------------------------------------------------------------------------------
@@ -111,7 +111,7 @@ class LoopsLexer:
         g.err('orio.module.loops.lexer: illegal character (%s) at line %s' % (t.value[0], t.lexer.lineno))
     
     def build(self, **kwargs):
-        self.lexer = orio.tool.ply.lex.lex(module=self, **kwargs)
+        self.lexer = parser_registry.getLexer(self, **kwargs)
     
     def test(self, data):
         self.lexer.input(data)
@@ -535,7 +535,7 @@ def parse(start_line_no, text):
     l.build(debug=0)
     l.lexdata = text
     
-    parser = orio.tool.ply.yacc.yacc(method='LALR', debug=0, optimize=1, write_tables=0)
+    parser = parser_registry.getParser(sys.modules[__name__])
     theresult = parser.parse(text, lexer=l, debug=0)
     return theresult
 
@@ -5,6 +5,7 @@
 import sys, os
 import orio.tool.ply.lex, orio.tool.ply.yacc
 import orio.main.util.globals as g
+import orio.main.util.parser_registry as parser_registry
 import orio.module.splingo.ast as ast
 
 #----------------------------------------------------------------------------------------------------------------------
@@ -326,9 +327,7 @@ def parse(text):
     elixir = SpLingoLexer()
     elixir.build(debug=0, optimize=1)
 
-  parser = orio.tool.ply.yacc.yacc(debug=0, optimize=1, write_tables=0,
-                                   errorlog=orio.tool.ply.yacc.NullLogger()
-                                   )
+  parser = parser_registry.getParser(sys.modules[__name__], errorlog=orio.tool.ply.yacc.NullLogger())
   return parser.parse(text, lexer=elixir, debug=0)
 
 
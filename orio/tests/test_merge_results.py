@@ -0,0 +1,60 @@
+import pytest
+import json
+from orio.main.tuner.merge_results import meanCost, readResults, bestResults, main
+
+def record(coord, uf, times, n=1000, status='ok'):
+    return json.dumps({'coord': coord, 'params': {'UF': uf}, 'input_params': {'N': n}, 'times': times,
+                       'transfers': [], 'status': status})
+
+def writeShards(tmp_path):
+    # the shards 0/2 and 1/2 of an exhaustive search of two problem sizes
+    shard0 = tmp_path / 'shard0.jsonl'
+    shard0.write_text('\n'.join([record('[0]', 1, [9.0, 4.0, 4.0]),
+                                 record('[2]', 3, [None], status='timeout'),
+                                 record('[0]', 1, [9.0, 3.0], n=2000),
+                                 '{"coord": "[4]", "times": [1.0',
+                                 '']) + '\n')
+    shard1 = tmp_path / 'shard1.jsonl'
+    shard1.write_text('\n'.join([record('[1]', 2, [9.0, 2.0, 3.0]),
+                                 record('[2]', 3, [9.0, 1.0]),
+                                 record('[1]', 2, [9.0, 1.0]),
+                                 record('[1]', 2, [], n=2000, status='failed'),
+                                 'not json']) + '\n')
+    return [str(shard0), str(shard1)]
+
+def test_mean_cost():
+    assert meanCost([9.0, 2.0, 4.0]) == 3.0
+    assert meanCost([5.0]) == 5.0
+    assert meanCost([]) is None
+    assert meanCost([1.0, None]) is None
+
+def test_read_results(tmp_path):
+    filenames = writeShards(tmp_path)
+    results, num_bad = readResults(filenames)
+    assert num_bad == 2
+    small, large = json.dumps([['N', 1000]]), json.dumps([['N', 2000]])
+    assert sorted(results.keys()) == [small, large]
+    assert sorted(results[small].keys()) == ['[0]', '[1]', '[2]']
+    # the first successful record of a coordinate is kept, a failed one is replaced
+    assert results[small]['[1]']['times'] == [9.0, 2.0, 3.0]
+    assert results[small]['[2]']['times'] == [9.0, 1.0]
+    assert results[small]['[2]']['file'] == filenames[1]
+    assert results[large]['[1]']['status'] == 'failed'
+
+    best = bestResults(results)
+    assert best[small]['coord'] == '[2]'
+    assert best[large]['coord'] == '[0]'
+    assert bestResults({'{}': {'[0]': json.loads(record('[0]', 1, []))}}) == {'{}': None}
+
+def test_main(tmp_path, capsys):
+    filenames = writeShards(tmp_path)
+    output = tmp_path / 'merged.jsonl'
+    assert main(['ormerge', '-o', str(output)] + filenames) == 0
+    out, err = capsys.readouterr()
+    assert 'ignored 2 malformed lines' in err
+    assert "best coordinate: [2]={'UF': 3}, cost=1.000000e+00" in out
+    assert ' coordinates: 2 (1 failed)' in out
+    merged = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [(r['input_params']['N'], r['coord']) for r in merged] == \
+        [(1000, '[0]'), (1000, '[1]'), (1000, '[2]'), (2000, '[0]'), (2000, '[1]')]
+    assert 'file' not in merged[0]
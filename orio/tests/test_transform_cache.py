@@ -0,0 +1,88 @@
+import pytest
+from orio.main.util.globals import Globals
+from orio.main.transform_cache import TrackedParams, TransformCache, recordedMetadata
+
+def transform(cache, region_key, annotation, perf_params, fun):
+    # the way the optimization driver transforms a region: look it up, or transform and store it
+    cached = cache.lookup(region_key, perf_params)
+    if cached is not None:
+        return cached
+    tracked = cache.track(perf_params)
+    result = fun(tracked)
+    cache.store(region_key, annotation, tracked, result)
+    return result
+
+def test_eval_reads():
+    params = TrackedParams({'T1': 4, 'T2': 8, 'U1': 2})
+    assert eval('T1 * U1', params) == 8
+    assert params.names >= set(['T1', 'U1'])
+    assert 'T2' not in params.names
+    assert not params.read_all
+
+def test_read_all():
+    for read in (lambda p: p.copy(), lambda p: list(p.items()), lambda p: list(p), lambda p: dict(p)):
+        params = TrackedParams({'T1': 4, 'T2': 8})
+        read(params)
+        assert params.read_all
+
+    cache = TransformCache(10)
+    transform(cache, 'r', 'transform Unroll(ufactor=U1)', {'U1': 2, 'T1': 4}, lambda p: ('%s' % p.copy(), ''))
+    # the region read all the parameters: changing any of them misses
+    assert cache.lookup('r', {'U1': 2, 'T1': 8}) is None
+    assert cache.lookup('r', {'U1': 2, 'T1': 4}) is not None
+
+def test_annotation_names():
+    cache = TransformCache(10)
+    transform(cache, 'r', 'transform Unroll(ufactor=U1)', {'U1': 2, 'T1': 4}, lambda p: ('code', ''))
+    # U1 is named by the annotation, though the transformation did not read it
+    assert cache.lookup('r', {'U1': 2, 'T1': 16}) == ('code', '')
+    assert cache.lookup('r', {'U1': 4, 'T1': 4}) is None
+
+def test_changing_dependencies():
+    # the tile size is only read when tiling is enabled
+    def tile(p):
+        if p['TILE']:
+            return ('tiled %d' % p['T'], '')
+        return ('untiled', '')
+
+    cache = TransformCache(10)
+    calls = []
+    fun = lambda p: calls.append(1) or tile(p)
+    assert transform(cache, 'r', '', {'TILE': False, 'T': 4, 'U': 1}, fun) == ('untiled', '')
+    assert transform(cache, 'r', '', {'TILE': False, 'T': 8, 'U': 2}, fun) == ('untiled', '')
+    assert len(calls) == 1
+    assert transform(cache, 'r', '', {'TILE': True, 'T': 4, 'U': 1}, fun) == ('tiled 4', '')
+    assert transform(cache, 'r', '', {'TILE': True, 'T': 8, 'U': 1}, fun) == ('tiled 8', '')
+    assert transform(cache, 'r', '', {'TILE': True, 'T': 8, 'U': 2}, fun) == ('tiled 8', '')
+    assert transform(cache, 'r', '', {'TILE': False, 'T': 16, 'U': 4}, fun) == ('untiled', '')
+    assert len(calls) == 3
+    # another region does not share the cached codes
+    assert cache.lookup('other', {'TILE': False, 'T': 4, 'U': 1}) is None
+
+def test_lru_eviction():
+    cache = TransformCache(2)
+    for t in (1, 2):
+        transform(cache, 'r', '', {'T': t}, lambda p: ('code %d' % p['T'], ''))
+    assert cache.lookup('r', {'T': 1}) == ('code 1', '')
+    # T=2 is the least recently used
+    transform(cache, 'r', '', {'T': 3}, lambda p: ('code %d' % p['T'], ''))
+    assert cache.lookup('r', {'T': 2}) is None
+    assert cache.lookup('r', {'T': 1}) == ('code 1', '')
+    assert cache.lookup('r', {'T': 3}) == ('code 3', '')
+
+def test_disabled():
+    cache = TransformCache(0)
+    assert not isinstance(cache.track({'T': 1}), TrackedParams)
+    transform(cache, 'r', '', {'T': 1}, lambda p: ('code', ''))
+    assert cache.lookup('r', {'T': 1}) is None
+
+def test_recorded_metadata():
+    Globals.reset()
+    Globals({})
+    Globals().metadata['device'] = 'gpu0'
+    with recordedMetadata() as metadata:
+        Globals().metadata['WI'] = 64
+        Globals().metadata.update({'device': 'gpu0', 'CB': 1})
+    assert metadata == {'WI': 64, 'device': 'gpu0', 'CB': 1}
+    assert type(Globals().metadata) is dict
+    assert Globals().metadata['WI'] == 64
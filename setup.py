@@ -25,7 +25,7 @@ setuptools.setup(name='orio',
                  packages=setuptools.find_packages(exclude=['test*']),
                  package_dir={'orio': 'orio'},
                  data_files=[('examples', glob.glob("examples/*"))],
-                 scripts=['scripts/orcc', 'orf', 'orcuda', 'orcl'],
+                 scripts=['scripts/orcc', 'scripts/ormerge', 'orf', 'orcuda', 'orcl'],
                  classifiers=[
                      "Programming Language :: Python :: 3",
                      "License :: OSI Approved :: MIT License",
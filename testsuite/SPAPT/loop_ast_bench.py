@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#
+# A micro-benchmark of the ASTs of the loop module on the SPAPT kernels: the time taken to parse the
+# annotated loop region of each kernel, to replicate its AST, and to transform it for randomly chosen
+# coordinates of its tuning space (that satisfy its constraints), and the memory held by the parsed and
+# replicated ASTs and allocated at most by the transformation for the first coordinate.
+#
+# usage: loop_ast_bench.py [--variants=<n>] [--max-factor=<n>] [--replicas=<n>] [--seed=<n>] [--digest]
+#                          [<kernel file> ...]
+#   (by default: 3 variants per kernel, factors of at most 8, 100 replicas, all the src1 kernels of SPAPT)
+#
+# --digest prints the digest of the code generated for all the variants, with the names of the
+# generated variables numbered by the global counter normalized, so that the generated code can be
+# compared before and after a change of the AST classes.
+#
+
+import getopt, glob, hashlib, os, random, re, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.setrecursionlimit(10000)
+
+from orio.main.util.globals import Globals
+from orio.module.loop import parser
+from orio.module.loop.loop import Loop
+
+#----------------------------------------------------------------
+
+def readKernel(filename):
+    '''Return the (parameter ranges, constraints, loop regions) of a SPAPT kernel'''
+    src = open(filename).read()
+    spec = re.sub(r'(?m)^\s*#.*$', '', src)
+    defs = {}
+    for name, value in re.findall(r'\b(?:param|let)\s+(\w+)\s*=\s*(.*?);', spec):
+        defs[name] = eval(value, dict(defs))
+    params = [(n, list(eval(r, dict(defs))))
+              for n, r in re.findall(r'\bparam\s+(\w+)\[\]\s*=\s*(.*?);', spec)]
+    constraints = re.findall(r'\bconstraint\s+\w+\s*=\s*(.*?);', spec, re.S)
+    regions = []
+    for m in re.finditer(r'/\*@\s*begin\s+Loop\s*\((.*?)\)\s*@\*/(.*?)/\*@\s*end\s*@\*/', src, re.S):
+        regions.append((m.group(1), m.group(2), src.count('\n', 0, m.start()) + 1))
+    return params, constraints, regions
+
+def sampleCoords(params, constraints, count, max_factor, rand):
+    '''
+    Return the performance parameters of randomly chosen coordinates that satisfy the constraints, with
+    unroll and register tiling factors (the U and RT parameters) of at most max_factor
+    '''
+    ranges = []
+    for name, values in params:
+        if re.match(r'(U|RT)\d*_', name):
+            values = [v for v in values if not isinstance(v, int) or v <= max_factor] or values[:1]
+        ranges.append((name, values))
+    coords = []
+    for _ in range(1000 * count):
+        if len(coords) == count:
+            break
+        perf_params = dict([(n, rand.choice(r)) for n, r in ranges])
+        try:
+            if all([eval(c, {}, dict(perf_params)) for c in constraints]):
+                coords.append(perf_params)
+        except Exception:
+            pass
+    return coords
+
+def transformAll(regions, coords):
+    '''Return the code generated for each coordinate (None if the transformation failed)'''
+    codes = []
+    for perf_params in coords:
+        try:
+            codes.append(''.join([Loop(perf_params, mod_code, annot_code, line_no, 0).transform()
+                                  for mod_code, annot_code, line_no in regions]))
+        except BaseException:
+            codes.append(None)
+    return codes
+
+def timed(fun):
+    '''Return the result of a call and the time it took'''
+    start = time.time()
+    result = fun()
+    return result, time.time() - start
+
+def traced(fun):
+    '''Return the memory held by the result of a call and the peak memory it allocated'''
+    tracemalloc.start()
+    result = fun()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak
+
+#----------------------------------------------------------------
+
+def main(argv):
+    opts, args = getopt.getopt(argv, '', ['variants=', 'max-factor=', 'replicas=', 'seed=', 'digest'])
+    opts = dict(opts)
+    num_variants = int(opts.get('--variants', 3))
+    max_factor = int(opts.get('--max-factor', 8))
+    num_replicas = int(opts.get('--replicas', 100))
+    seed = int(opts.get('--seed', 1))
+    filenames = args or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*', '*src1.c')))
+
+    Globals({})
+    digest = hashlib.md5()
+    totals = [0.0] * 6
+    print('%-24s %9s %9s %9s %9s %9s %9s %6s' % ('kernel', 'parse(s)', 'AST(KB)', 'repl(s)', 'repl(KB)',
+                                                 'xform(s)', 'peak(KB)', 'ok'))
+    for filename in filenames:
+        params, constraints, regions = readKernel(filename)
+        coords = sampleCoords(params, constraints, num_variants, max_factor, random.Random(seed))
+
+        parse = lambda: [parser.getParser(line_no).parse(mod_code) for mod_code, _, line_no in regions]
+        asts, parse_time = timed(parse)
+        ast_size = traced(parse)[0]
+        replicate = lambda: [[[s.replicate() for s in stmts] for stmts in asts] for _ in range(num_replicas)]
+        repl_time = timed(replicate)[1]
+        repl_size = traced(replicate)[0]
+        codes, xform_time = timed(lambda: transformAll(regions, coords))
+        xform_peak = traced(lambda: transformAll(regions, coords[:1]))[1]
+
+        for code in codes:
+            digest.update(re.sub(r'\b(orio_lbound)\d+', r'\1', str(code)).encode('utf-8'))
+        stats = [parse_time, ast_size / 1024.0, repl_time, repl_size / 1024.0 / num_replicas,
+                 xform_time, xform_peak / 1024.0]
+        totals = [t + s for t, s in zip(totals, stats)]
+        print('%-24s %9.4f %9.1f %9.4f %9.1f %9.3f %9.1f %3d/%-2d' %
+              tuple([os.path.basename(filename)[:24]] + stats + [len([c for c in codes if c]), len(codes)]))
+    print('%-24s %9.4f %9.1f %9.4f %9.1f %9.3f %9.1f' % tuple(['total'] + totals))
+    if '--digest' in opts:
+        print('digest of the generated code: %s' % digest.hexdigest())
+
+if __name__ == '__main__':
+    main(sys.argv[1:])